@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="picture_renditions",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -8,7 +8,6 @@ from django.db import models
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from helpers.models import TrackingModel
-from PIL import Image
 
 GENDER = (('M', 'Male'), ('F', 'Female'))
 
@@ -66,6 +65,7 @@ class User(AbstractUser, TrackingModel):
     postal_code = models.CharField(max_length=20, blank=True, null=True)
     address = models.CharField(max_length=60, blank=True, null=True)
     picture = models.ImageField(upload_to='profile_pictures/%y/%m/%d/', default='default.png', null=True)
+    picture_renditions = models.JSONField(default=dict, blank=True, editable=False)
     referral_code = models.CharField(max_length=20, unique=True, blank=True, null=True)
 
     is_student = models.BooleanField(default=False)
@@ -113,16 +113,8 @@ class User(AbstractUser, TrackingModel):
         if not self.pk:
             # generate referral code if user is being created
             self.referral_code = self.generate_referral_code()
+        # picture renditions are generated in the background, see accounts.signals
         super().save(*args, **kwargs)
-        
-        try:
-            img = Image.open(self.picture.path)
-            if img.height > 300 or img.width > 300:
-                output_size = (300, 300)
-                img.thumbnail(output_size)
-                img.save(self.picture.path)
-        except:
-            pass
 
     def delete(self, *args, **kwargs):
         if self.picture.url != settings.MEDIA_URL + 'default.png':
@@ -1,8 +1,27 @@
 from rest_framework import pagination
+from rest_framework.settings import api_settings
 
 
 class CustomPageNumberPagination(pagination.PageNumberPagination):
     page_size = 1
     page_size_query_param = 'count'
     max_page_size = 5
-    page_query_param = 'p'
\ No newline at end of file
+    page_query_param = 'p'
+
+
+class CustomCursorPagination(pagination.CursorPagination):
+    """
+    Keyset pagination: no COUNT(*) and no OFFSET, so deep pages cost the same
+    as the first one. Rows are keyed on id, newest first, unless the client
+    asks for an ordering. The cursor only positions on the first ordering
+    field, so any other ordering pages rows that tie on it by offset.
+    """
+    page_size = 20
+    page_size_query_param = 'count'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return super().get_ordering(request, queryset, view)
+        # unique and increasing with created_at, so it's a true keyset
+        return ('-id',)
@@ -1,9 +1,11 @@
 from accounts import models
+from helpers.serializers import RenditionsField
 from rest_framework import serializers
 
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(max_length=128, min_length=6, write_only=True)
+    picture_renditions = RenditionsField('picture')
 
     class Meta:
         model = models.User
@@ -15,6 +17,8 @@ class RegisterSerializer(serializers.ModelSerializer):
 
 
 class UserSerializer(serializers.ModelSerializer):
+    picture_renditions = RenditionsField('picture')
+
     class Meta:
         model = models.User
         fields = '__all__'
@@ -0,0 +1,14 @@
+from accounts.models import User
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+from helpers.images import remember_image, schedule_renditions
+
+
+@receiver(post_init, sender=User)
+def remember_picture(sender, instance, **kwargs):
+    remember_image(instance, 'picture')
+
+
+@receiver(post_save, sender=User)
+def update_picture_renditions(sender, instance, created, **kwargs):
+    schedule_renditions(instance, 'picture', created)
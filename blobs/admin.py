@@ -0,0 +1,4 @@
+from blobs import models
+from django.contrib import admin
+
+admin.site.register(models.MediaBlob)
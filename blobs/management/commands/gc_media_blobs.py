@@ -0,0 +1,42 @@
+import datetime
+
+from blobs.storage import (collect_garbage, collect_unregistered_files,
+                           recount_references)
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes the media blobs no file field has pointed at for the grace '
+        'period, with their files, and the files left without a blob by '
+        'rolled back transactions. Run it periodically, e.g. daily.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=float, default=None,
+            help='Defaults to MEDIA_BLOB_GC_GRACE_HOURS.',
+        )
+        parser.add_argument(
+            '--recount', action='store_true',
+            help='Recompute reference counts from the file fields first.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the blobs and files that would be deleted.')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            changed = recount_references()
+            self.stdout.write(f'Fixed the reference count of {changed} blobs.')
+
+        grace_hours = options['grace_hours']
+        if grace_hours is None:
+            grace_hours = getattr(settings, 'MEDIA_BLOB_GC_GRACE_HOURS', 24)
+        grace = datetime.timedelta(hours=grace_hours)
+        removed = collect_garbage(grace, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        unregistered = collect_unregistered_files(grace, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f'{removed} blobs and {unregistered} files without a blob would be deleted.')
+        else:
+            self.stdout.write(f'Deleted {removed} blobs and {unregistered} files without a blob.')
@@ -0,0 +1,38 @@
+# Generated by Django 4.1.7 on 2026-10-18 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("sha256", models.CharField(max_length=64, unique=True)),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("size", models.PositiveBigIntegerField()),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="mediablob",
+            index=models.Index(
+                fields=["ref_count", "updated_at"], name="mediablob_gc_idx"
+            ),
+        ),
+    ]
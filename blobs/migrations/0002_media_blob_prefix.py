@@ -0,0 +1,42 @@
+# Generated by Django 4.1.7 on 2026-10-18 11:54
+
+from django.db import migrations, models
+
+
+def fill_prefixes(apps, schema_editor):
+    # the directory in front of the hash, e.g. "videos" for the
+    # "videos/<sha256>/lecture.mp4" names blobs were first stored under
+    MediaBlob = apps.get_model("blobs", "MediaBlob")
+    blobs = list(MediaBlob.objects.only("id", "sha256", "name"))
+    for blob in blobs:
+        prefix = blob.name.split(blob.sha256)[0].rstrip("/")
+        if prefix.rpartition("/")[2] == blob.sha256[:2]:
+            prefix = prefix.rpartition("/")[0]
+        blob.prefix = prefix
+    MediaBlob.objects.bulk_update(blobs, ["prefix"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("blobs", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mediablob",
+            name="prefix",
+            field=models.CharField(default="", max_length=255),
+        ),
+        migrations.RunPython(fill_prefixes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="mediablob",
+            name="sha256",
+            field=models.CharField(max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name="mediablob",
+            constraint=models.UniqueConstraint(
+                fields=("sha256", "prefix"), name="unique_media_blob"
+            ),
+        ),
+    ]
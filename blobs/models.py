@@ -0,0 +1,27 @@
+from django.db import models
+from helpers.models import TrackingModel
+
+
+class MediaBlob(TrackingModel):
+    """
+    A stored file, addressed by the SHA-256 of its content and shared by
+    every file field with the same prefix that uploaded the same bytes, see
+    blobs.storage.
+    """
+    sha256 = models.CharField(max_length=64)
+    prefix = models.CharField(max_length=255, default='')  # the field's upload_to, e.g. "videos/blobs"
+    name = models.CharField(max_length=255, unique=True)  # in the default storage
+    size = models.PositiveBigIntegerField()
+    # how many file fields point at it; orphans are removed by gc_media_blobs
+    ref_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['sha256', 'prefix'], name='unique_media_blob'),
+        ]
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at'], name='mediablob_gc_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
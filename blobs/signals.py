@@ -0,0 +1,48 @@
+from blobs.storage import change_ref_count, get_blob_fields, store_blob
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_save)
+
+
+def get_file_name(instance, field_name):
+    # read from __dict__ so a deferred field doesn't cost a query
+    value = instance.__dict__.get(field_name)
+    return getattr(value, 'name', value) or None
+
+
+def remember_files(sender, instance, **kwargs):
+    instance._loaded_blob_names = {
+        field_name: get_file_name(instance, field_name) for model, field_name in get_blob_fields() if model is sender
+    }
+
+
+def store_uploads(sender, instance, **kwargs):
+    # swap new uploads for their blob before the field would save them
+    for model, field_name in get_blob_fields():
+        if model is not sender or field_name not in instance.__dict__:
+            continue
+        file = getattr(instance, field_name)
+        if file and not file._committed:
+            setattr(instance, field_name, store_blob(file.field, instance, file).name)
+
+
+def count_references(sender, instance, **kwargs):
+    for field_name, previous in instance._loaded_blob_names.items():
+        if field_name not in instance.__dict__:
+            continue
+        name = get_file_name(instance, field_name)
+        if name != previous:
+            change_ref_count(name, 1)
+            change_ref_count(previous, -1)
+            instance._loaded_blob_names[field_name] = name
+
+
+def release_references(sender, instance, **kwargs):
+    for name in instance._loaded_blob_names.values():
+        change_ref_count(name, -1)
+
+
+for model in {model for model, _ in get_blob_fields()}:
+    post_init.connect(remember_files, sender=model, dispatch_uid=f'blobs-remember-{model._meta.label}')
+    pre_save.connect(store_uploads, sender=model, dispatch_uid=f'blobs-store-{model._meta.label}')
+    post_save.connect(count_references, sender=model, dispatch_uid=f'blobs-count-{model._meta.label}')
+    post_delete.connect(release_references, sender=model, dispatch_uid=f'blobs-release-{model._meta.label}')
@@ -0,0 +1,200 @@
+import hashlib
+import os
+from collections import Counter
+from itertools import islice
+
+from blobs.models import MediaBlob
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+
+def get_blob_fields():
+    """
+    The (model, field name) pairs whose uploads are stored as blobs, from
+    MEDIA_BLOB_FIELDS entries like "course.Video.video_file".
+    """
+    fields = []
+    for path in getattr(settings, 'MEDIA_BLOB_FIELDS', ()):
+        model_label, field_name = path.rsplit('.', 1)
+        fields.append((apps.get_model(model_label), field_name))
+    return fields
+
+
+def hash_file(file):
+    """
+    Returns the SHA-256 and size of a file, read a chunk at a time so
+    large uploads aren't held in memory.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return digest.hexdigest(), size
+
+
+def find_blob(sha256, prefix, size=None):
+    blobs = MediaBlob.objects.filter(sha256=sha256.lower(), prefix=prefix)
+    if size is not None:
+        blobs = blobs.filter(size=size)
+    return blobs.first()
+
+
+def get_blob_prefix(field, instance):
+    # under the field's own upload_to, so per-prefix settings like
+    # MEDIA_URL_CACHE_EXCLUDE keep working, e.g. "videos/blobs"
+    return field.generate_filename(instance, 'blobs')
+
+
+def get_blob_name(prefix, sha256, filename):
+    # only the content picks the name, so a duplicate doesn't show the first
+    # uploader's filename; the extension is kept for the content type
+    extension = os.path.splitext(filename)[1].lower()
+    return f'{prefix}/{sha256[:2]}/{sha256}{extension}'
+
+
+def register_blob(field, prefix, sha256, name, size):
+    """
+    Records a file just stored under ``name``. If the same content was
+    stored concurrently, that copy wins and this one is deleted.
+    """
+    try:
+        with transaction.atomic():
+            return MediaBlob.objects.create(sha256=sha256, prefix=prefix, name=name, size=size)
+    except IntegrityError:
+        field.storage.delete(name)
+        return MediaBlob.objects.get(sha256=sha256, prefix=prefix)
+
+
+def store_blob(field, instance, file):
+    """
+    Stores an uploaded file by its content. Content that is already stored
+    under the field's prefix isn't sent to the storage again; the existing
+    blob is returned instead.
+    """
+    sha256, size = hash_file(file)
+    prefix = get_blob_prefix(field, instance)
+    blob = find_blob(sha256, prefix, size)
+    if blob is not None:
+        # keeps an orphan from being collected before the reference is saved
+        MediaBlob.objects.filter(pk=blob.pk).update(updated_at=timezone.now())
+        return blob
+    name = field.storage.save(get_blob_name(prefix, sha256, file.name), file, max_length=field.max_length)
+    return register_blob(field, prefix, sha256, name, size)
+
+
+def change_ref_count(name, delta):
+    if not name or not delta:
+        return
+    # files stored before blobs existed have no row and are left alone
+    MediaBlob.objects.filter(name=name).update(
+        ref_count=Greatest(F('ref_count') + delta, 0), updated_at=timezone.now()
+    )
+
+
+def recount_references():
+    """
+    Recomputes every blob's ref_count from the blob fields, for references
+    changed by queryset updates or bulk operations that skip signals.
+    Returns the number of blobs whose count changed.
+    """
+    counts = Counter()
+    for model, field_name in get_blob_fields():
+        rows = model._default_manager.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+        for row in rows.order_by().values(field_name).annotate(references=Count('pk')):
+            counts[row[field_name]] += row['references']
+
+    changed = []
+    for blob in MediaBlob.objects.only('id', 'name', 'ref_count').iterator():
+        if blob.ref_count != counts[blob.name]:
+            blob.ref_count = counts[blob.name]
+            blob.updated_at = timezone.now()
+            changed.append(blob)
+    MediaBlob.objects.bulk_update(changed, ['ref_count', 'updated_at'], batch_size=500)
+    return len(changed)
+
+
+def collect_garbage(grace, batch_size=500, dry_run=False):
+    """
+    Deletes the blobs nothing has pointed at for ``grace`` (a timedelta),
+    and their files once the row is gone. The grace period covers uploads
+    whose row hasn't been saved yet. Returns the number of blobs removed.
+    """
+    orphans = MediaBlob.objects.filter(ref_count=0, updated_at__lt=timezone.now() - grace)
+    if dry_run:
+        return orphans.count()
+
+    removed = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            # checked again under the lock, in case one was referenced since
+            batch = list(orphans.select_for_update().filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            names = [blob.name for blob in batch]
+            MediaBlob.objects.filter(pk__in=[blob.pk for blob in batch]).delete()
+            transaction.on_commit(lambda names=names: delete_files(names))
+        removed += len(batch)
+    return removed
+
+
+def get_blob_directories():
+    """
+    The (storage, prefix) pairs that blob files are stored under, one per
+    blob field's upload_to.
+    """
+    directories = set()
+    for model, field_name in get_blob_fields():
+        field = model._meta.get_field(field_name)
+        directories.add((field.storage, get_blob_prefix(field, model())))
+    return directories
+
+
+def iter_stored_files(storage, directory):
+    try:
+        directories, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in files:
+        yield f'{directory}/{name}'
+    for name in directories:
+        yield from iter_stored_files(storage, f'{directory}/{name}')
+
+
+def collect_unregistered_files(grace, batch_size=500, dry_run=False):
+    """
+    Deletes the files under the blob directories that have had no blob row
+    for ``grace``: those stored by a transaction that was rolled back, which
+    took their row with it, or by a process that died before recording
+    them. Returns the number of files removed.
+    """
+    cutoff = timezone.now() - grace
+    removed = 0
+    for storage, prefix in get_blob_directories():
+        files = iter_stored_files(storage, prefix)
+        while True:
+            names = list(islice(files, batch_size))
+            if not names:
+                break
+            registered = set(MediaBlob.objects.filter(name__in=names).values_list('name', flat=True))
+            for name in names:
+                if name in registered or storage.get_modified_time(name) >= cutoff:
+                    continue
+                if not dry_run:
+                    storage.delete(name)
+                removed += 1
+    return removed
+
+
+def delete_files(names):
+    for name in names:
+        default_storage.delete(name)
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import tempfile
+from io import StringIO
+
+from blobs.models import MediaBlob
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from project.models import ProjectAttachment
+
+
+class MediaBlobTestCase(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media_root = directory.name
+        storage_settings = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=self.media_root,
+        )
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+        self.content = b'%PDF-1.4 syllabus'
+        self.sha256 = hashlib.sha256(self.content).hexdigest()
+
+    def attach(self, name='syllabus.pdf', content=None):
+        return ProjectAttachment.objects.create(name=name, file=SimpleUploadedFile(name, content or self.content))
+
+    def get_stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        )
+
+    def gc(self, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('gc_media_blobs', '--grace-hours=0', *args, stdout=StringIO())
+
+    def test_duplicate_uploads_are_stored_once(self):
+        attachment = self.attach()
+        copy = self.attach('COPY.PDF')
+
+        self.assertEqual(attachment.file.name, f'project_attachments/blobs/{self.sha256[:2]}/{self.sha256}.pdf')
+        self.assertEqual(copy.file.name, attachment.file.name)
+        self.assertEqual(self.get_stored_files(), [attachment.file.name])
+        blob = MediaBlob.objects.get()
+        self.assertEqual((blob.sha256, blob.size, blob.ref_count), (self.sha256, len(self.content), 2))
+
+    def test_references_follow_changes(self):
+        attachment = self.attach()
+        copy = self.attach()
+
+        copy.file = SimpleUploadedFile('other.pdf', b'other content')
+        copy.save()
+        self.assertEqual(MediaBlob.objects.get(sha256=self.sha256).ref_count, 1)
+
+        attachment.delete()
+        self.assertEqual(MediaBlob.objects.get(sha256=self.sha256).ref_count, 0)
+        self.assertEqual(MediaBlob.objects.get(name=copy.file.name).ref_count, 1)
+
+    def test_orphans_are_collected(self):
+        attachment = self.attach()
+        kept = self.attach('kept.pdf', b'kept content')
+        attachment.delete()
+
+        self.gc()
+
+        self.assertEqual(list(MediaBlob.objects.values_list('name', flat=True)), [kept.file.name])
+        self.assertEqual(self.get_stored_files(), [kept.file.name])
+
+    def test_collect_keeps_blobs_within_the_grace_period(self):
+        self.attach().delete()
+
+        call_command('gc_media_blobs', stdout=StringIO())
+
+        self.assertEqual(MediaBlob.objects.count(), 1)
+
+    def test_recount_fixes_references_changed_without_signals(self):
+        attachment = self.attach()
+        ProjectAttachment.objects.filter(pk=attachment.pk).update(file='')
+
+        self.gc('--recount')
+
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertEqual(self.get_stored_files(), [])
+
+
+    def test_files_of_rolled_back_uploads_are_collected(self):
+        kept = self.attach('kept.pdf', b'kept content')
+        try:
+            with transaction.atomic():
+                self.attach()
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(len(self.get_stored_files()), 2)
+
+        self.gc()
+
+        self.assertEqual(list(MediaBlob.objects.values_list('name', flat=True)), [kept.file.name])
+        self.assertEqual(self.get_stored_files(), [kept.file.name])
+
+    def test_collect_keeps_new_files_without_a_blob(self):
+        try:
+            with transaction.atomic():
+                self.attach()
+                raise ValueError
+        except ValueError:
+            pass
+
+        call_command('gc_media_blobs', stdout=StringIO())
+
+        self.assertEqual(len(self.get_stored_files()), 1)
@@ -13,4 +13,7 @@ admin.site.register(models.Module)
 admin.site.register(models.Lesson)
 admin.site.register(models.Video)
 admin.site.register(models.File)
-admin.site.register(models.Enrollment)
\ No newline at end of file
+admin.site.register(models.Enrollment)
+admin.site.register(models.LessonCompletion)
+admin.site.register(models.QuizAttempt)
+admin.site.register(models.ChunkedUpload)
\ No newline at end of file
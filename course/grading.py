@@ -0,0 +1,121 @@
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from course.models import Answer, Enrollment, Question, QuizAttempt
+from django.db.models import Max
+from django.utils import timezone
+
+KeyEntry = namedtuple('KeyEntry', ['marks', 'choices', 'text'])
+
+
+def normalize_text(value):
+    return ' '.join(str(value).split()).casefold()
+
+
+def to_choice_ids(response):
+    if isinstance(response, (list, tuple, set)):
+        values = response
+    else:
+        values = [response]
+    try:
+        return frozenset(int(value) for value in values)
+    except (TypeError, ValueError):
+        return frozenset()
+
+
+def percentage(earned, available):
+    if not available:
+        return None
+    return (Decimal(min(earned, available) * 100) / available).quantize(Decimal('0.01'))
+
+
+class AnswerKey:
+    """
+    The marking scheme of one quiz, keyed by question id. Questions with
+    correct Answer rows are multiple choice and need exactly the correct set
+    of answer ids; the rest are compared against Question.correct_answer.
+    """
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    def score(self, answers):
+        score = 0
+        for question_id, response in (answers or {}).items():
+            try:
+                entry = self.entries.get(int(question_id))
+            except (TypeError, ValueError):
+                continue
+            if entry and self.is_correct(entry, response):
+                score += entry.marks
+        return score
+
+    def is_correct(self, entry, response):
+        if entry.choices:
+            return to_choice_ids(response) == entry.choices
+        return bool(entry.text) and isinstance(response, str) and normalize_text(response) == entry.text
+
+
+def load_answer_keys(quiz_ids):
+    """
+    Loads the answer keys of several quizzes in two queries, whatever the
+    number of questions.
+    """
+    choices = defaultdict(set)
+    for question_id, answer_id in Answer.objects.filter(
+        question__quiz__in=quiz_ids, is_correct=True
+    ).values_list('question_id', 'id'):
+        choices[question_id].add(answer_id)
+
+    keys = defaultdict(AnswerKey)
+    for question_id, quiz_id, marks, correct_answer in Question.objects.filter(
+        quiz__in=quiz_ids
+    ).values_list('id', 'quiz_id', 'marks', 'correct_answer'):
+        keys[quiz_id].entries[question_id] = KeyEntry(
+            marks, frozenset(choices[question_id]), normalize_text(correct_answer)
+        )
+    return keys
+
+
+def grade_attempts(attempts, batch_size=1000):
+    """
+    Scores the given attempts, saves them and refreshes the grades of their
+    enrollments. Answer keys are loaded once per call, so callers should pass
+    attempts in batches rather than one at a time.
+    """
+    attempts = list(attempts)
+    if not attempts:
+        return attempts
+
+    keys = load_answer_keys({attempt.quiz_id for attempt in attempts})
+    graded_at = timezone.now()
+    for attempt in attempts:
+        attempt.score = keys[attempt.quiz_id].score(attempt.answers)
+        attempt.graded_at = graded_at
+
+    QuizAttempt.objects.bulk_update(attempts, ['score', 'graded_at'], batch_size=batch_size)
+    update_enrollment_grades({attempt.enrollment_id for attempt in attempts}, batch_size=batch_size)
+    return attempts
+
+
+def update_enrollment_grades(enrollment_ids, batch_size=1000):
+    """
+    Sets Enrollment.grade to the percentage of marks earned over the quizzes
+    taken, counting the best attempt at each quiz.
+    """
+    enrollment_ids = list(enrollment_ids)
+    for start in range(0, len(enrollment_ids), batch_size):
+        batch = enrollment_ids[start:start + batch_size]
+        earned = defaultdict(int)
+        available = defaultdict(int)
+        best_scores = QuizAttempt.objects.filter(
+            enrollment__in=batch, score__isnull=False
+        ).order_by().values('enrollment', 'quiz', 'quiz__total_marks').annotate(best=Max('score'))
+        for row in best_scores:
+            earned[row['enrollment']] += row['best']
+            available[row['enrollment']] += row['quiz__total_marks']
+
+        enrollments = [
+            Enrollment(pk=enrollment_id, grade=percentage(earned[enrollment_id], available[enrollment_id]))
+            for enrollment_id in batch
+        ]
+        Enrollment.objects.bulk_update(enrollments, ['grade'], batch_size=batch_size)
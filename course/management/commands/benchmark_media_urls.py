@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from psmain.storage_backends import MediaStorage
+from storages.backends.s3boto3 import S3Boto3Storage
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures the cost of building presigned media URLs for a list page, '
+        'with and without the URL cache. Signing happens locally, so dummy '
+        'credentials are used and nothing is sent to S3.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--pages', type=int, default=50)
+
+    def handle(self, *args, **options):
+        storage = MediaStorage(
+            access_key='benchmark', secret_key='benchmark', custom_domain=None, region_name='us-east-1'
+        )
+        names = [f'course_images/benchmark-{i}.png' for i in range(options['page_size'])]
+        storage.get_url_cache().delete_many([storage.get_url_cache_key(name, storage.querystring_expire) for name in names])
+
+        for label, url in (
+            ('uncached', lambda name: S3Boto3Storage.url(storage, name)),
+            ('cold cache', storage.url),
+            ('warm cache', storage.url),
+        ):
+            pages = 1 if label == 'cold cache' else options['pages']
+            started = time.perf_counter()
+            for _ in range(pages):
+                for name in names:
+                    url(name)
+            elapsed = (time.perf_counter() - started) / pages
+            self.stdout.write(f'{label}: {elapsed * 1000:.2f} ms per page of {len(names)} URLs')
@@ -0,0 +1,75 @@
+import random
+import time
+
+from accounts.models import User
+from course.models import (Course, CourseContent, CourseDetails,
+                           CourseMetadata, Program)
+from course.search import IcontainsSearchBackend, get_search_backend
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from membership.models import Instructor
+from project.models import Project
+
+WORDS = [
+    'python', 'django', 'react', 'data', 'science', 'machine', 'learning', 'web',
+    'design', 'cloud', 'security', 'mobile', 'product', 'devops', 'testing', 'api',
+    'frontend', 'backend', 'database', 'analytics', 'career', 'startup', 'advanced', 'intro',
+]
+FILLER_WORDS = [f'lorem{n}' for n in range(5000)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the configured search backend with the icontains path on a '
+        'generated catalog. Everything is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--courses', type=int, default=100000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--query', default='python django')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.create_catalog(options['courses'], options['batch_size'])
+
+            backend = get_search_backend()
+            for name, search_backend in (('icontains', IcontainsSearchBackend()), (type(backend).__name__, backend)):
+                elapsed = self.time_search(search_backend, options['query'], options['repeat'])
+                self.stdout.write(f'{name}: {elapsed * 1000:.2f} ms per search (first page of 20)')
+
+            transaction.set_rollback(True)
+
+    def create_catalog(self, count, batch_size):
+        user = User.objects.create_user(username='benchmark', email='benchmark@example.com')
+        instructor = Instructor.objects.create(instructor=user)
+        program = Program.objects.create(title='Benchmark Program', duration=12)
+        project = Project.objects.create(title='Benchmark Project', description='', owner=user)
+        backend = get_search_backend()
+
+        for start in range(0, count, batch_size):
+            size = min(batch_size, count - start)
+            metadata = CourseMetadata.objects.bulk_create([CourseMetadata(level='beginner') for _ in range(size)])
+            content = CourseContent.objects.bulk_create([CourseContent() for _ in range(size)])
+            details = CourseDetails.objects.bulk_create([
+                CourseDetails(instructor=instructor, program=program, projects=project) for _ in range(size)
+            ])
+            courses = Course.objects.bulk_create([
+                Course(
+                    title=f"{' '.join(random.sample(WORDS, 3))} {start + i}",
+                    slug=f'benchmark-course-{start + i}',
+                    description=' '.join(random.choices(FILLER_WORDS, k=38) + random.sample(WORDS, 2)),
+                    metadata=metadata[i],
+                    content=content[i],
+                    details=details[i],
+                )
+                for i in range(size)
+            ])
+            backend.index(Course, courses)
+
+    def time_search(self, backend, query, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            list(backend.search(Course.objects.all(), query)[:20])
+        return (time.perf_counter() - started) / repeat
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from course.models import ChunkedUpload
+from course.uploads import discard_chunks
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Deletes uploads that were not completed in time, along with their chunks on disk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Time an upload has to complete after it was started.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        uploads = ChunkedUpload.objects.filter(completed_at__isnull=True, created_at__lt=cutoff)
+
+        count = 0
+        for upload in uploads.iterator():
+            discard_chunks(upload)
+            count += 1
+        uploads.delete()
+
+        self.stdout.write(f'Cleared {count} abandoned uploads.')
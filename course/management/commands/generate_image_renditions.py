@@ -0,0 +1,31 @@
+from accounts.models import User
+from course.models import CourseDetails, Program
+from django.core.management.base import BaseCommand
+from helpers.images import update_renditions
+
+IMAGE_FIELDS = ((User, 'picture'), (Program, 'image'), (CourseDetails, 'image'))
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates the renditions of images uploaded before renditions existed. '
+        'Images that already have renditions are skipped unless --all is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Regenerate every rendition.')
+
+    def handle(self, *args, **options):
+        for model, field_name in IMAGE_FIELDS:
+            field = model._meta.get_field(field_name)
+            queryset = model._default_manager.exclude(**{f'{field_name}__isnull': True}).exclude(
+                **{field_name: ''}
+            ).exclude(**{field_name: field.get_default()})
+            if not options['all']:
+                queryset = queryset.filter(**{f'{field_name}_renditions': {}})
+
+            generated = 0
+            for pk, name in queryset.values_list('pk', field_name).iterator():
+                update_renditions(model._meta.label, pk, field_name, name)
+                generated += 1
+            self.stdout.write(f'Generated renditions for {generated} {model._meta.verbose_name_plural}.')
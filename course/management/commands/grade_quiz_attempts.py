@@ -0,0 +1,35 @@
+from course.grading import grade_attempts
+from course.models import QuizAttempt
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Grades quiz attempts in batches and writes the results back to '
+        'Enrollment.grade. Only ungraded attempts are graded unless --regrade '
+        'is given, e.g. after an answer key was corrected.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quiz', type=int, action='append', dest='quizzes', help='Limit to these quiz ids.')
+        parser.add_argument('--regrade', action='store_true')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        attempts = QuizAttempt.objects.only('id', 'enrollment', 'quiz', 'answers')
+        if options['quizzes']:
+            attempts = attempts.filter(quiz__in=options['quizzes'])
+        if not options['regrade']:
+            attempts = attempts.filter(score__isnull=True)
+
+        batch_size = options['batch_size']
+        last_pk = 0
+        graded = 0
+        while True:
+            batch = list(attempts.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            graded += len(grade_attempts(batch, batch_size=batch_size))
+
+        self.stdout.write(f'Graded {graded} quiz attempts.')
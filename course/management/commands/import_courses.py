@@ -0,0 +1,37 @@
+import json
+
+from course.serializers import CourseSerializer
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports courses from a JSON file holding a list of courses in the '
+        'format accepted by the courses API. The whole file is imported in one '
+        'transaction, in batches of bulk inserts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        with open(options['path']) as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            raise CommandError('Expected a list of courses.')
+
+        batch_size = options['batch_size']
+        created = 0
+        with transaction.atomic():
+            for start in range(0, len(data), batch_size):
+                serializer = CourseSerializer(data=data[start:start + batch_size], many=True)
+                if not serializer.is_valid():
+                    errors = {
+                        start + i: error for i, error in enumerate(serializer.errors) if error
+                    }
+                    raise CommandError(f'Invalid courses, nothing was imported: {errors}')
+                created += len(serializer.save())
+
+        self.stdout.write(f'Imported {created} courses.')
@@ -0,0 +1,21 @@
+from course.models import Course, Program
+from course.search import get_search_backend
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the program and course full-text search index. Run it after '
+        'writes that skip signals, like QuerySet.update() on titles or descriptions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        for model in (Program, Course):
+            with transaction.atomic():
+                backend.rebuild(model, batch_size=options['batch_size'])
+            self.stdout.write(f'Rebuilt the {model._meta.verbose_name} search index.')
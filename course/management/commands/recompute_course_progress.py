@@ -0,0 +1,35 @@
+from course.models import CourseDetails, Enrollment
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Recounts published lessons per course and recomputes Enrollment.progress '
+        'from lesson completions, in batches. Run it after publishing or '
+        'unpublishing modules or lessons.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='courses', help='Limit to these course ids.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        details = CourseDetails.objects.all()
+        enrollments = Enrollment.objects.filter(course__isnull=False)
+        if options['courses']:
+            details = details.filter(course__id__in=options['courses'])
+            enrollments = enrollments.filter(course__in=options['courses'])
+
+        courses = details.refresh_lesson_count()
+
+        batch_size = options['batch_size']
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(enrollments.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            updated += Enrollment.objects.filter(pk__in=batch).recompute_progress()
+
+        self.stdout.write(f'Recounted lessons for {courses} courses and recomputed progress for {updated} enrollments.')
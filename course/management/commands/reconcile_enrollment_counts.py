@@ -0,0 +1,36 @@
+from course.models import CourseDetails
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+
+class Command(BaseCommand):
+    help = 'Recounts CourseDetails.enrollment_count from Enrollment rows, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = 0
+        checked = fixed = 0
+
+        while True:
+            batch = list(
+                CourseDetails.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+            checked += len(batch)
+
+            drifted = list(
+                CourseDetails.objects.filter(pk__in=batch)
+                .with_actual_enrollment_count()
+                .exclude(enrollment_count=F('actual_enrollment_count'))
+                .values_list('pk', flat=True)
+            )
+            if drifted:
+                # recount in the UPDATE itself so enrollments made meanwhile aren't lost
+                fixed += CourseDetails.objects.filter(pk__in=drifted).refresh_enrollment_count()
+
+        self.stdout.write(f'Checked {checked} courses, fixed {fixed} enrollment counts.')
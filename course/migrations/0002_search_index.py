@@ -0,0 +1,55 @@
+from django.db import migrations
+
+SEARCH_INDEXES = {
+    "course_program": ("title", "description"),
+    "course_course": ("title", "slug", "description"),
+}
+
+# title, slug, description in decreasing weight
+POSTGRES_WEIGHTS = ("A", "B", "C")
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, fields in SEARCH_INDEXES.items():
+        if vendor == "sqlite":
+            columns = ", ".join(fields)
+            values = ", ".join(f"COALESCE({field}, '')" for field in fields)
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {table}_fts USING fts5({columns})"
+            )
+            schema_editor.execute(
+                f"INSERT INTO {table}_fts (rowid, {columns}) SELECT id, {values} FROM {table}"
+            )
+        elif vendor == "postgresql":
+            vector = " || ".join(
+                f"setweight(to_tsvector('english', COALESCE({field}, '')), '{weight}')"
+                for field, weight in zip(fields, POSTGRES_WEIGHTS)
+            )
+            schema_editor.execute(
+                f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+                f"GENERATED ALWAYS AS ({vector}) STORED"
+            )
+            schema_editor.execute(
+                f"CREATE INDEX {table}_search_vector_idx ON {table} USING GIN (search_vector)"
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in SEARCH_INDEXES:
+        if vendor == "sqlite":
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+        elif vendor == "postgresql":
+            schema_editor.execute(f"DROP INDEX IF EXISTS {table}_search_vector_idx")
+            schema_editor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("course", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:53
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def populate_lesson_count(apps, schema_editor):
+    CourseDetails = apps.get_model("course", "CourseDetails")
+    Lesson = apps.get_model("course", "Lesson")
+    lessons = (
+        Lesson.objects.filter(
+            module__course__details=OuterRef("pk"),
+            module__is_published=True,
+            is_published=True,
+        )
+        .order_by()
+        .values("module__course__details")
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    CourseDetails.objects.update(lesson_count=Coalesce(Subquery(lessons), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("course", "0002_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="coursedetails",
+            name="lesson_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="enrollment",
+            name="completed_lessons",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="LessonCompletion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "enrollment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="completions",
+                        to="course.enrollment",
+                    ),
+                ),
+                (
+                    "lesson",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="completions",
+                        to="course.lesson",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created_at",),
+                "abstract": False,
+                "unique_together": {("enrollment", "lesson")},
+            },
+        ),
+        migrations.RunPython(populate_lesson_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:01
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def populate_total_marks(apps, schema_editor):
+    Quiz = apps.get_model("course", "Quiz")
+    Question = apps.get_model("course", "Question")
+    marks = (
+        Question.objects.filter(quiz=OuterRef("pk"))
+        .order_by()
+        .values("quiz")
+        .annotate(total=Sum("marks"))
+        .values("total")
+    )
+    Quiz.objects.update(total_marks=Coalesce(Subquery(marks), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("course", "0003_lesson_completion"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuizAttempt",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("answers", models.JSONField(default=dict)),
+                ("score", models.PositiveIntegerField(blank=True, null=True)),
+                ("graded_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "enrollment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="quiz_attempts",
+                        to="course.enrollment",
+                    ),
+                ),
+                (
+                    "quiz",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attempts",
+                        to="course.quiz",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created_at",),
+                "abstract": False,
+            },
+        ),
+        migrations.RunPython(populate_total_marks, migrations.RunPython.noop),
+    ]
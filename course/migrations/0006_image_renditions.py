@@ -0,0 +1,22 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("course", "0005_chunked_upload"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="coursedetails",
+            name="image_renditions",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="program",
+            name="image_renditions",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
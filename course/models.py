@@ -1,6 +1,13 @@
+from collections import Counter, defaultdict
+
+from course.search import get_search_backend
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.core.validators import FileExtensionValidator
 from django.db import models
-from django.db.models import Q
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import (Cast, Coalesce, Greatest, Least,
+                                        NullIf, Round)
 from django.urls import reverse
 from django.utils.text import slugify
 from django_extensions.db.fields import AutoSlugField
@@ -24,10 +31,7 @@ class ProgramManager(models.Manager):
     def search(self, query=None):
         qs = self.get_queryset()
         if query is not None:
-            or_lookup = (Q(title__icontains=query) | 
-                         Q(description__icontains=query)
-                        )
-            qs = qs.filter(or_lookup).distinct() # distinct() is often necessary with Q lookups
+            qs = get_search_backend().search(qs, query)
         return qs
 
 
@@ -35,6 +39,7 @@ class Program(TrackingModel):
     title = models.CharField(max_length=150, unique=True)
     description = models.TextField(null=True, blank=True)
     image = models.ImageField(upload_to='program_images/', blank=True, null=True)
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     duration = models.PositiveIntegerField(help_text='Duration in weeks')
@@ -52,13 +57,30 @@ class CourseManager(models.Manager):
     def search(self, query=None):
         qs = self.get_queryset()
         if query is not None:
-            or_lookup = (Q(title__icontains=query) | 
-                         Q(description__icontains=query)|  
-                         Q(slug__icontains=query)
-                        )
-            qs = qs.filter(or_lookup).distinct() # distinct() is often necessary with Q lookups
+            qs = get_search_backend().search(qs, query)
         return qs
 
+    def catalog(self):
+        # Loads the one-to-one parts, instructor, program and skills up front so
+        # a page of courses costs the same number of queries whatever its size.
+        return self.get_queryset().select_related(
+            'metadata',
+            'content',
+            'details',
+            'details__instructor',
+            'details__program',
+        ).prefetch_related('details__skills')
+
+    def outline(self):
+        # One query per level of the module -> lesson -> video/file tree;
+        # prefetch_related stitches the levels together in memory.
+        return self.get_queryset().prefetch_related(
+            models.Prefetch('modules', queryset=Module.objects.order_by('order', 'id')),
+            models.Prefetch('modules__lesson_set', queryset=Lesson.objects.order_by('order', 'id')),
+            models.Prefetch('modules__lesson_set__video_set', queryset=Video.objects.order_by('id')),
+            models.Prefetch('modules__lesson_set__file_set', queryset=File.objects.order_by('id')),
+        )
+
 
 class CourseMetadata(models.Model):
     level = models.CharField(max_length=25, choices=LEVEL_CHOICES)
@@ -78,16 +100,49 @@ class CourseContent(models.Model):
         verbose_name_plural = 'Course content'
 
 
+class CourseDetailsQuerySet(models.QuerySet):
+    def change_enrollment_count(self, delta):
+        # A single UPDATE ... SET enrollment_count = enrollment_count + delta keeps
+        # concurrent enrollments from overwriting each other without row locks
+        # held across the request.
+        return self.update(enrollment_count=Greatest(F('enrollment_count') + delta, 0))
+
+    def _actual_enrollment_count(self):
+        enrollments = Enrollment.objects.filter(
+            course__details=OuterRef('pk')
+        ).order_by().values('course__details').annotate(total=Count('id')).values('total')
+        return Coalesce(Subquery(enrollments), 0)
+
+    def with_actual_enrollment_count(self):
+        return self.annotate(actual_enrollment_count=self._actual_enrollment_count())
+
+    def refresh_enrollment_count(self):
+        return self.update(enrollment_count=self._actual_enrollment_count())
+
+    def refresh_lesson_count(self):
+        # Only published lessons in published modules count towards progress.
+        lessons = Lesson.objects.filter(
+            module__course__details=OuterRef('pk'),
+            module__is_published=True,
+            is_published=True,
+        ).order_by().values('module__course__details').annotate(total=Count('id')).values('total')
+        return self.update(lesson_count=Coalesce(Subquery(lessons), 0))
+
+
 class CourseDetails(models.Model):
     image = models.ImageField(upload_to='course_images/', null=True, blank=True)
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     duration = models.PositiveIntegerField(default=12)
     enrollment_count = models.PositiveIntegerField(default=0)
+    lesson_count = models.PositiveIntegerField(default=0)
     enrollment_deadline = models.DateField(null=True, blank=True)
 
     instructor = models.ForeignKey(Instructor, on_delete=models.CASCADE)
     program = models.ForeignKey(Program, on_delete=models.CASCADE)
     skills = models.ManyToManyField(TechSkill)
     projects = models.ForeignKey(Project, on_delete=models.CASCADE)  # I am not sure this is needed
+
+    objects = CourseDetailsQuerySet.as_manager()
     
     class Meta:
         verbose_name_plural = 'Course details'
@@ -95,7 +150,8 @@ class CourseDetails(models.Model):
 
 class Course(TrackingModel):
     title = models.CharField(max_length=200, null=True)
-    slug = AutoSlugField(populate_from='title', unique=True)
+    # keeps slugs set before saving, e.g. by bulk imports (see course.utils.unique_slugs)
+    slug = AutoSlugField(populate_from='title', unique=True, overwrite_on_add=False)
     description = models.TextField(blank=True, null=True)
     is_published = models.BooleanField(default=False)
     active = models.BooleanField(default=False)
@@ -113,11 +169,22 @@ class Course(TrackingModel):
         return f"{self.description[:200]}..."
 
 
+class QuizQuerySet(models.QuerySet):
+    def refresh_total_marks(self):
+        marks = Question.objects.filter(
+            quiz=OuterRef('pk')
+        ).order_by().values('quiz').annotate(total=Sum('marks')).values('total')
+        return self.update(total_marks=Coalesce(Subquery(marks), 0))
+
+
 class Quiz(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
+    # Derived from Question.marks, see course.signals
     total_marks = models.PositiveIntegerField(default=0)
 
+    objects = QuizQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
@@ -143,7 +210,8 @@ class Answer(models.Model):
 
 class Module(TrackingModel):
     title = models.CharField(max_length=200)
-    slug = AutoSlugField(populate_from='title', unique=True)
+    # keeps slugs set before saving, e.g. by the outline editor
+    slug = AutoSlugField(populate_from='title', unique=True, overwrite_on_add=False)
     description = models.TextField(blank=True)
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='modules')
     order = models.PositiveIntegerField(default=0)
@@ -199,6 +267,67 @@ class File(TrackingModel):
     def __str__(self):
         return self.title
 
+
+class ChunkedUpload(TrackingModel):
+    """
+    A resumable upload into a file field, sent as numbered chunks that are
+    kept on local disk until the upload is completed (see course.uploads).
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chunked_uploads')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveBigIntegerField()
+    field_name = models.CharField(max_length=50)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.filename
+
+    @property
+    def chunk_count(self):
+        return -(-self.size // self.chunk_size)
+
+
+class EnrollmentQuerySet(models.QuerySet):
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False, **kwargs):
+        objs = super().bulk_create(objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts, **kwargs)
+        course_ids = [obj.course_id for obj in objs if obj.course_id]
+
+        if ignore_conflicts or kwargs.get('update_conflicts'):
+            # Skipped or updated rows are not reported back, so recount the
+            # affected courses rather than guessing at the increment.
+            CourseDetails.objects.filter(course__id__in=set(course_ids)).refresh_enrollment_count()
+        else:
+            new_enrollments = defaultdict(list)
+            for course_id, count in Counter(course_ids).items():
+                new_enrollments[count].append(course_id)
+            for count, ids in new_enrollments.items():
+                CourseDetails.objects.filter(course__id__in=ids).change_enrollment_count(count)
+        return objs
+
+    def _progress(self, completed_lessons):
+        lesson_count = CourseDetails.objects.filter(course=OuterRef('course')).values('lesson_count')[:1]
+        percentage = Cast(completed_lessons, FloatField()) * 100.0 / NullIf(Subquery(lesson_count), 0)
+        return Coalesce(Round(Least(percentage, 100.0), 2), 0.0)
+
+    def change_completed_lessons(self, delta):
+        # Progress is derived from the course's cached lesson_count inside the
+        # same UPDATE, so a completion costs one statement whatever the course size.
+        completed_lessons = Greatest(F('completed_lessons') + delta, 0)
+        return self.update(completed_lessons=completed_lessons, progress=self._progress(completed_lessons))
+
+    def recompute_progress(self):
+        completions = LessonCompletion.objects.filter(
+            enrollment=OuterRef('pk'),
+            lesson__module__is_published=True,
+            lesson__is_published=True,
+        ).order_by().values('enrollment').annotate(total=Count('id')).values('total')
+        completed_lessons = Coalesce(Subquery(completions), 0)
+        return self.update(completed_lessons=completed_lessons, progress=self._progress(completed_lessons))
+
         
 class Enrollment(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
@@ -209,6 +338,29 @@ class Enrollment(models.Model):
     is_completed = models.BooleanField(default=False)
     progress = models.DecimalField(max_digits=5, decimal_places=2, default=0.00)
     grade = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    completed_lessons = models.PositiveIntegerField(default=0)
+
+    objects = EnrollmentQuerySet.as_manager()
 
     class Meta:
         unique_together = ('student', 'course', 'program',)
+
+
+class LessonCompletion(TrackingModel):
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='completions')
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='completions')
+
+    class Meta(TrackingModel.Meta):
+        unique_together = ('enrollment', 'lesson',)
+
+
+class QuizAttempt(TrackingModel):
+    enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='quiz_attempts')
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempts')
+    # {question id: answer id, list of answer ids or free text}
+    answers = models.JSONField(default=dict)
+    score = models.PositiveIntegerField(null=True, blank=True)
+    graded_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.quiz} attempt #{self.pk}'
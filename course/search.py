@@ -0,0 +1,148 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+# Fields indexed per model, in decreasing order of weight.
+SEARCH_FIELDS = {
+    'course.program': ('title', 'description'),
+    'course.course': ('title', 'slug', 'description'),
+}
+
+POSTGRES_SEARCH_CONFIG = 'english'
+
+
+def get_search_fields(model):
+    return SEARCH_FIELDS[model._meta.label_lower]
+
+
+def get_search_terms(query):
+    return re.findall(r'\w+', query or '')
+
+
+class IcontainsSearchBackend:
+    """
+    Unindexed fallback: an icontains OR-chain over the search fields.
+    """
+    def search(self, queryset, query):
+        or_lookup = Q()
+        for field in get_search_fields(queryset.model):
+            or_lookup |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(or_lookup).distinct()  # distinct() is often necessary with Q lookups
+
+    def index(self, model, instances):
+        pass
+
+    def remove(self, model, pks):
+        pass
+
+    def rebuild(self, model, batch_size=1000):
+        pass
+
+
+class SQLiteFTSSearchBackend(IcontainsSearchBackend):
+    """
+    Ranked search over an FTS5 table named ``<db_table>_fts`` whose rowid is
+    the indexed row's primary key. The table is kept in sync by
+    ``course.signals``, so writes that skip signals, like QuerySet.update()
+    or bulk_create(), leave it stale until ``rebuild_search_index`` runs.
+    """
+    def get_index_table(self, model):
+        return f'{model._meta.db_table}_fts'
+
+    def get_match_expression(self, query):
+        # Quote every term so FTS5 operators in user input are matched literally,
+        # and prefix-match the terms so results update on every keystroke.
+        return ' '.join('"%s"*' % term for term in get_search_terms(query))
+
+    def search(self, queryset, query):
+        expression = self.get_match_expression(query)
+        if not expression:
+            return super().search(queryset, query)
+
+        model = queryset.model
+        index_table = self.get_index_table(model)
+        pk_column = f'{model._meta.db_table}.{model._meta.pk.column}'
+        # A join lets the MATCH drive the query and rank every hit in one pass;
+        # the ORM has no way to express a join against the virtual table.
+        return queryset.extra(
+            tables=[index_table],
+            where=[f'{index_table}.rowid = {pk_column}', f'{index_table} MATCH %s'],
+            params=[expression],
+            # bm25() is lower for better matches
+            select={'search_rank': f'-bm25({index_table})'},
+        ).order_by('-search_rank', '-pk')
+
+    def index(self, model, instances):
+        index_table = self.get_index_table(model)
+        fields = get_search_fields(model)
+        rows = [
+            [instance.pk] + [getattr(instance, field) or '' for field in fields]
+            for instance in instances
+        ]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {index_table} WHERE rowid = %s', [row[:1] for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {index_table} (rowid, {", ".join(fields)}) '
+                f'VALUES ({", ".join(["%s"] * (len(fields) + 1))})',
+                rows,
+            )
+
+    def remove(self, model, pks):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.get_index_table(model)} WHERE rowid = %s',
+                [[pk] for pk in pks],
+            )
+
+    def rebuild(self, model, batch_size=1000):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.get_index_table(model)}')
+
+        batch = []
+        for instance in model._default_manager.only(*get_search_fields(model)).iterator(chunk_size=batch_size):
+            batch.append(instance)
+            if len(batch) == batch_size:
+                self.index(model, batch)
+                batch = []
+        self.index(model, batch)
+
+
+class PostgresSearchBackend(IcontainsSearchBackend):
+    """
+    Ranked search over a generated, GIN-indexed ``search_vector`` tsvector
+    column. Postgres keeps the column up to date, so there is nothing to sync.
+    """
+    def get_tsquery(self, query):
+        return ' & '.join(f'{term}:*' for term in get_search_terms(query))
+
+    def search(self, queryset, query):
+        tsquery = self.get_tsquery(query)
+        if not tsquery:
+            return super().search(queryset, query)
+
+        vector = f'{queryset.model._meta.db_table}.search_vector'
+        params = (POSTGRES_SEARCH_CONFIG, tsquery)
+        return queryset.annotate(
+            search_match=RawSQL(f'{vector} @@ to_tsquery(%s, %s)', params, output_field=BooleanField()),
+            search_rank=RawSQL(f'ts_rank({vector}, to_tsquery(%s, %s))', params, output_field=FloatField()),
+        ).filter(search_match=True).order_by('-search_rank', '-pk')
+
+
+VENDOR_SEARCH_BACKENDS = {
+    'sqlite': SQLiteFTSSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_search_backend():
+    # not cached, so SEARCH_BACKEND changes take effect straight away
+    backend_path = getattr(settings, 'SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+    return VENDOR_SEARCH_BACKENDS.get(connection.vendor, IcontainsSearchBackend)()
@@ -0,0 +1,111 @@
+from course.models import (Course, CourseDetails, Enrollment, Lesson,
+                           LessonCompletion, Module, Program, Question, Quiz)
+from course.search import get_search_backend
+from django.db.models import Exists
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from helpers.images import remember_image, schedule_renditions
+
+
+@receiver(post_save, sender=Program)
+@receiver(post_save, sender=Course)
+def update_search_index(sender, instance, **kwargs):
+    get_search_backend().index(sender, [instance])
+
+
+@receiver(post_delete, sender=Program)
+@receiver(post_delete, sender=Course)
+def remove_from_search_index(sender, instance, **kwargs):
+    get_search_backend().remove(sender, [instance.pk])
+
+
+@receiver(post_init, sender=Enrollment)
+def remember_enrollment_course(sender, instance, **kwargs):
+    # read from __dict__ so a deferred course_id doesn't cost a query
+    instance._loaded_course_id = instance.__dict__.get('course_id')
+
+
+@receiver(post_save, sender=Enrollment)
+def update_enrollment_count(sender, instance, created, **kwargs):
+    previous_course_id = None if created else instance._loaded_course_id
+    if previous_course_id != instance.course_id:
+        if previous_course_id:
+            CourseDetails.objects.filter(course__id=previous_course_id).change_enrollment_count(-1)
+        if instance.course_id:
+            CourseDetails.objects.filter(course__id=instance.course_id).change_enrollment_count(1)
+    instance._loaded_course_id = instance.course_id
+
+
+@receiver(post_delete, sender=Enrollment)
+def decrease_enrollment_count(sender, instance, **kwargs):
+    if instance.course_id:
+        CourseDetails.objects.filter(course__id=instance.course_id).change_enrollment_count(-1)
+
+
+def get_counting_enrollment(completion):
+    # like recompute_progress, only completions of published lessons count,
+    # checked inside the same UPDATE
+    published = Lesson.objects.filter(pk=completion.lesson_id, is_published=True, module__is_published=True)
+    return Enrollment.objects.filter(Exists(published), pk=completion.enrollment_id)
+
+
+@receiver(post_save, sender=LessonCompletion)
+def complete_lesson(sender, instance, created, **kwargs):
+    if created:
+        get_counting_enrollment(instance).change_completed_lessons(1)
+
+
+@receiver(post_delete, sender=LessonCompletion)
+def uncomplete_lesson(sender, instance, **kwargs):
+    get_counting_enrollment(instance).change_completed_lessons(-1)
+
+
+@receiver(post_init, sender=Lesson)
+def remember_lesson_module(sender, instance, **kwargs):
+    instance._loaded_module_id = instance.__dict__.get('module_id')
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def update_lesson_count_for_lesson(sender, instance, **kwargs):
+    module_ids = {instance.module_id, instance._loaded_module_id} - {None}
+    CourseDetails.objects.filter(course__modules__id__in=module_ids).refresh_lesson_count()
+    instance._loaded_module_id = instance.module_id
+
+
+@receiver(post_init, sender=Module)
+def remember_module_course(sender, instance, **kwargs):
+    instance._loaded_course_id = instance.__dict__.get('course_id')
+
+
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+def update_lesson_count_for_module(sender, instance, **kwargs):
+    course_ids = {instance.course_id, instance._loaded_course_id} - {None}
+    CourseDetails.objects.filter(course__id__in=course_ids).refresh_lesson_count()
+    instance._loaded_course_id = instance.course_id
+
+
+@receiver(post_init, sender=Question)
+def remember_question_quiz(sender, instance, **kwargs):
+    instance._loaded_quiz_id = instance.__dict__.get('quiz_id')
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def update_total_marks(sender, instance, **kwargs):
+    quiz_ids = {instance.quiz_id, instance._loaded_quiz_id} - {None}
+    Quiz.objects.filter(pk__in=quiz_ids).refresh_total_marks()
+    instance._loaded_quiz_id = instance.quiz_id
+
+
+@receiver(post_init, sender=Program)
+@receiver(post_init, sender=CourseDetails)
+def remember_course_image(sender, instance, **kwargs):
+    remember_image(instance, 'image')
+
+
+@receiver(post_save, sender=Program)
+@receiver(post_save, sender=CourseDetails)
+def update_image_renditions(sender, instance, created, **kwargs):
+    schedule_renditions(instance, 'image', created)
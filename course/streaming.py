@@ -0,0 +1,99 @@
+import mimetypes
+import re
+
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Returns the (start, end) byte positions, inclusive, asked for by a
+    single-range Range header, or None to serve the whole file. Multiple
+    ranges are ignored, which RFC 9110 allows.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # suffix range: the last N bytes
+        length = int(end)
+        # an empty file has no last bytes to serve
+        if not length or not size:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+class RangeFile:
+    """
+    Reads ``length`` bytes of a file from ``start``, so a 206 response only
+    touches the requested part of the file.
+    """
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def stream_field_file(request, field_file):
+    """
+    Serves a FileField's file with Range support. Local files are sent with
+    FileResponse, which uses the server's zero-copy wsgi.file_wrapper when the
+    whole file is asked for; remote storages get a redirect to the file, and
+    handle ranges themselves.
+    """
+    try:
+        path = field_file.path
+    except NotImplementedError:
+        return HttpResponseRedirect(field_file.url)
+
+    size = field_file.size
+    content_type = mimetypes.guess_type(field_file.name)[0] or 'application/octet-stream'
+
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(open(path, 'rb'), start, end - start + 1), status=206, content_type=content_type
+        )
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response.block_size = STREAM_BLOCK_SIZE
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -1,12 +1,32 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
 from accounts.models import User
+from blobs.storage import get_blob_name, get_blob_prefix
+from course.grading import grade_attempts, load_answer_keys
 from course.models import (Answer, Course, CourseContent, CourseDetails,
-                           CourseMetadata, Enrollment, File, Lesson, Module,
-                           Program, Question, Quiz, Video)
-from django.db import IntegrityError
+                           CourseMetadata, Enrollment, File, Lesson,
+                           LessonCompletion, Module, Program, Question, Quiz,
+                           QuizAttempt, Video)
+from course.serializers import CourseDetailsSerializer, CourseSerializer
+from course.utils import unique_slugs
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from membership.models import Instructor, Student
+from PIL import Image
 from project.models import Project, ProjectAttachment, Tag, Task, TechSkill
+from psmain.storage_backends import MediaStorage
 from rest_framework.test import APITestCase
+from storages.backends.s3boto3 import S3Boto3Storage
 
 
 class APITestCaseSetUp(APITestCase):
@@ -157,4 +177,462 @@ class EnrollmentModelTestCase(APITestCaseSetUp):
 
         self.assertEqual(enrollment.program, self.program)
         self.assertEqual(enrollment.student, self.student)
-        
\ No newline at end of file
+        
+
+class SearchModelTestCase(APITestCaseSetUp):
+    def create_course(self, title, description):
+        details = CourseDetails.objects.create(instructor=self.instructor, program=self.program, projects=self.project)
+        return Course.objects.create(
+            title=title,
+            description=description,
+            metadata=CourseMetadata.objects.create(level='beginner'),
+            content=CourseContent.objects.create(),
+            details=details,
+        )
+
+    def test_course_search_is_ranked(self):
+        self.set_up()
+        mentioned = self.create_course('Web Basics', 'Touches on Python once.')
+        titled = self.create_course('Python for Data', 'Python, Python and more Python.')
+
+        results = list(Course.objects.search('pyth'))
+
+        self.assertEqual(results, [titled, mentioned])
+
+    def test_course_search_index_follows_updates_and_deletes(self):
+        self.set_up()
+        course = self.create_course('Rust Fundamentals', 'Systems programming.')
+
+        course.description = 'Concurrency in practice.'
+        course.save()
+        self.assertFalse(Course.objects.search('systems').exists())
+        self.assertEqual(list(Course.objects.search('concurrency')), [course])
+
+        course.delete()
+        self.assertFalse(Course.objects.search('concurrency').exists())
+
+    def test_search_index_is_rebuilt_after_queryset_updates(self):
+        self.set_up()
+        course = self.create_course('Rust Fundamentals', 'Systems programming.')
+
+        Course.objects.filter(pk=course.pk).update(description='Concurrency in practice.')
+        self.assertFalse(Course.objects.search('concurrency').exists())
+
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(list(Course.objects.search('concurrency')), [course])
+
+    def test_search_backend_follows_setting_changes(self):
+        self.set_up()
+        course = self.create_course('Rust Fundamentals', 'Systems programming.')
+        Course.objects.filter(pk=course.pk).update(description='Concurrency in practice.')
+
+        with override_settings(SEARCH_BACKEND='course.search.IcontainsSearchBackend'):
+            self.assertEqual(list(Course.objects.search('concurrency')), [course])
+        self.assertFalse(Course.objects.search('concurrency').exists())
+
+    def test_program_search(self):
+        self.set_up()
+
+        self.assertEqual(list(Program.objects.search('program description')), [self.program])
+        self.assertFalse(Program.objects.search('unrelated').exists())
+
+    def test_search_without_terms_falls_back_to_icontains(self):
+        self.set_up()
+
+        self.assertEqual(list(Program.objects.search('')), [self.program])
+
+
+class EnrollmentCountTestCase(APITestCaseSetUp):
+    def get_enrollment_count(self, course):
+        return CourseDetails.objects.get(pk=course.details_id).enrollment_count
+
+    def create_course(self, title):
+        details = CourseDetails.objects.create(instructor=self.instructor, program=self.program, projects=self.project)
+        return Course.objects.create(
+            title=title,
+            metadata=CourseMetadata.objects.create(level='beginner'),
+            content=CourseContent.objects.create(),
+            details=details,
+        )
+
+    def test_enrollment_count_follows_enrollments(self):
+        self.set_up()
+        other_course = self.create_course('Other Course')
+
+        enrollment = Enrollment.objects.create(course=self.course, student=self.student)
+        self.assertEqual(self.get_enrollment_count(self.course), 1)
+
+        enrollment.course = other_course
+        enrollment.save()
+        self.assertEqual(self.get_enrollment_count(self.course), 0)
+        self.assertEqual(self.get_enrollment_count(other_course), 1)
+
+        enrollment.delete()
+        self.assertEqual(self.get_enrollment_count(other_course), 0)
+
+    def test_enrollment_count_follows_bulk_writes(self):
+        self.set_up()
+        students = [
+            Student.objects.create(
+                student=User.objects.create(username=f'bulk-{i}', email=f'bulk{i}@test.com'),
+                learning_style='visual',
+            )
+            for i in range(3)
+        ]
+
+        Enrollment.objects.bulk_create([Enrollment(course=self.course, student=student) for student in students])
+        self.assertEqual(self.get_enrollment_count(self.course), 3)
+
+        Enrollment.objects.bulk_create([Enrollment(course=self.course, student=self.student)], ignore_conflicts=True)
+        self.assertEqual(self.get_enrollment_count(self.course), 4)
+
+        Enrollment.objects.filter(student__in=students).delete()
+        self.assertEqual(self.get_enrollment_count(self.course), 1)
+
+    def test_reconcile_enrollment_counts(self):
+        self.set_up()
+        Enrollment.objects.create(course=self.course, student=self.student)
+        CourseDetails.objects.filter(pk=self.details.pk).update(enrollment_count=42)
+
+        call_command('reconcile_enrollment_counts', batch_size=1, stdout=StringIO())
+
+        self.assertEqual(self.get_enrollment_count(self.course), 1)
+
+
+class LessonCompletionTestCase(APITestCaseSetUp):
+    def set_up_lessons(self):
+        self.set_up()
+        self.module.is_published = True
+        self.module.save()
+        self.lesson.is_published = True
+        self.lesson.save()
+        self.lessons = [self.lesson] + [
+            Lesson.objects.create(module=self.module, title=f'Lesson {i}', order=i, is_published=True)
+            for i in range(2, 5)
+        ]
+        self.enrollment = Enrollment.objects.create(course=self.course, student=self.student)
+
+    def test_lesson_count_follows_publishing(self):
+        self.set_up_lessons()
+        self.details.refresh_from_db()
+        self.assertEqual(self.details.lesson_count, 4)
+
+        self.lessons[-1].is_published = False
+        self.lessons[-1].save()
+        self.details.refresh_from_db()
+        self.assertEqual(self.details.lesson_count, 3)
+
+        self.module.is_published = False
+        self.module.save()
+        self.details.refresh_from_db()
+        self.assertEqual(self.details.lesson_count, 0)
+
+    def test_completion_updates_progress(self):
+        self.set_up_lessons()
+
+        with self.assertNumQueries(2):
+            completion = LessonCompletion.objects.create(enrollment=self.enrollment, lesson=self.lessons[0])
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_lessons, 1)
+        self.assertEqual(self.enrollment.progress, Decimal('25.00'))
+
+        LessonCompletion.objects.create(enrollment=self.enrollment, lesson=self.lessons[1])
+        LessonCompletion.objects.create(enrollment=self.enrollment, lesson=self.lessons[2])
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.progress, Decimal('75.00'))
+
+        completion.delete()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_lessons, 2)
+        self.assertEqual(self.enrollment.progress, Decimal('50.00'))
+
+    def test_recompute_course_progress(self):
+        self.set_up_lessons()
+        LessonCompletion.objects.create(enrollment=self.enrollment, lesson=self.lessons[0])
+        LessonCompletion.objects.create(enrollment=self.enrollment, lesson=self.lessons[3])
+        Lesson.objects.filter(pk=self.lessons[3].pk).update(is_published=False)
+
+        call_command('recompute_course_progress', batch_size=1, stdout=StringIO())
+
+        self.details.refresh_from_db()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.details.lesson_count, 3)
+        self.assertEqual(self.enrollment.completed_lessons, 1)
+        self.assertEqual(self.enrollment.progress, Decimal('33.33'))
+
+    def test_completions_of_unpublished_lessons_are_not_counted(self):
+        self.set_up_lessons()
+        completion = LessonCompletion.objects.create(enrollment=self.enrollment, lesson=self.lessons[0])
+        LessonCompletion.objects.create(enrollment=self.enrollment, lesson=self.lessons[1])
+        self.lessons[0].is_published = False
+        self.lessons[0].save()
+        call_command('recompute_course_progress', stdout=StringIO())
+
+        completion.delete()
+        LessonCompletion.objects.create(enrollment=self.enrollment, lesson=self.lessons[0])
+
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_lessons, 1)
+        self.assertEqual(self.enrollment.progress, Decimal('33.33'))
+
+
+class QuizGradingTestCase(APITestCaseSetUp):
+    def set_up_quiz(self):
+        self.set_up()
+        self.wrong_answer = Answer.objects.create(question=self.question, text='Wrong Answer')
+        self.text_question = Question.objects.create(quiz=self.quiz, text='Name the framework', correct_answer='Django', marks=3)
+        self.enrollment = Enrollment.objects.create(course=self.course, student=self.student)
+
+    def test_total_marks_follow_questions(self):
+        self.set_up_quiz()
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.total_marks, 5)
+
+        self.text_question.delete()
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.total_marks, 2)
+
+    def test_load_answer_keys(self):
+        self.set_up_quiz()
+
+        with self.assertNumQueries(2):
+            key = load_answer_keys([self.quiz.id])[self.quiz.id]
+
+        self.assertEqual(key.score({str(self.question.id): self.answer.id, str(self.text_question.id): ' django '}), 5)
+        self.assertEqual(key.score({str(self.question.id): [self.answer.id, self.wrong_answer.id]}), 0)
+        self.assertEqual(key.score({str(self.text_question.id): 'Flask', 'not-a-question': 'x'}), 0)
+
+    def test_grade_attempts(self):
+        self.set_up_quiz()
+        attempts = [
+            QuizAttempt.objects.create(enrollment=self.enrollment, quiz=self.quiz, answers={str(self.question.id): self.answer.id}),
+            QuizAttempt.objects.create(enrollment=self.enrollment, quiz=self.quiz, answers={str(self.text_question.id): 'Django'}),
+        ]
+
+        grade_attempts(attempts)
+
+        self.assertEqual([attempt.score for attempt in attempts], [2, 3])
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.grade, Decimal('60.00'))
+
+    def test_grade_quiz_attempts_command(self):
+        self.set_up_quiz()
+        attempt = QuizAttempt.objects.create(enrollment=self.enrollment, quiz=self.quiz, answers={str(self.question.id): self.wrong_answer.id})
+
+        call_command('grade_quiz_attempts', stdout=StringIO())
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.score, 0)
+
+        # correcting the answer key and regrading
+        Answer.objects.filter(pk=self.wrong_answer.pk).update(is_correct=True)
+        Answer.objects.filter(pk=self.answer.pk).update(is_correct=False)
+        call_command('grade_quiz_attempts', regrade=True, batch_size=1, stdout=StringIO())
+
+        attempt.refresh_from_db()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(attempt.score, 2)
+        self.assertEqual(self.enrollment.grade, Decimal('40.00'))
+
+
+class CourseImportTestCase(APITestCaseSetUp):
+    def course_data(self, title):
+        return {
+            'title': title,
+            'description': f'{title} Description',
+            'metadata': {'level': 'beginner', 'price': 9.99},
+            'content': {'syllabus': 'Course Syllabus'},
+            'details': {
+                'instructor': self.instructor.id,
+                'program': self.program.id,
+                'projects': self.project.id,
+                'skills': [self.skill.id, self.skill_2.id],
+            },
+        }
+
+    def count_create_queries(self, count):
+        serializer = CourseSerializer(data=[self.course_data('Imported Course') for _ in range(count)], many=True)
+        self.assertTrue(serializer.is_valid())
+        with CaptureQueriesContext(connection) as queries:
+            serializer.save()
+        return len(queries)
+
+    def test_create_queries_do_not_grow(self):
+        self.set_up()
+
+        self.assertEqual(self.count_create_queries(2), self.count_create_queries(20))
+        self.assertEqual(Course.objects.filter(title='Imported Course').count(), 22)
+        self.assertEqual(CourseDetails.skills.through.objects.filter(coursedetails__course__title='Imported Course').count(), 44)
+
+    def test_unique_slugs(self):
+        self.set_up()
+        Course.objects.filter(pk=self.course.pk).update(slug='python')
+
+        self.assertEqual(unique_slugs(Course, ['Python', 'Python', 'Django', None]), ['python-2', 'python-3', 'django', 'course'])
+        self.assertEqual(unique_slugs(Course, ['x' * 60]), ['x' * 50])
+
+    def create_with_taken_slugs(self, taken_attempts):
+        Course.objects.filter(pk=self.course.pk).update(slug='python')
+        slugs = [['python']] * taken_attempts
+        serializer = CourseSerializer(data=[self.course_data('Python')], many=True)
+        self.assertTrue(serializer.is_valid())
+        # as if a concurrent import took the slug after it was picked
+        with mock.patch('course.serializers.unique_slugs', side_effect=lambda model, values: slugs.pop() if slugs else unique_slugs(model, values)):
+            return serializer.save()
+
+    def test_create_picks_slugs_again_after_a_conflict(self):
+        self.set_up()
+
+        [course] = self.create_with_taken_slugs(1)
+
+        self.assertEqual(Course.objects.get(pk=course.pk).slug, 'python-2')
+
+    def test_create_falls_back_to_slugs_per_row(self):
+        self.set_up()
+
+        [course] = self.create_with_taken_slugs(3)
+
+        self.assertEqual(Course.objects.get(pk=course.pk).slug, 'python-2')
+        self.assertEqual(Course.objects.filter(title='Python').count(), 1)
+
+    def test_import_courses_command(self):
+        self.set_up()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'courses.json')
+        with open(path, 'w') as f:
+            json.dump([self.course_data(f'Imported {i}') for i in range(5)], f)
+
+        call_command('import_courses', path, batch_size=2, stdout=StringIO())
+
+        self.assertEqual(Course.objects.filter(title__startswith='Imported').count(), 5)
+
+        with open(path, 'w') as f:
+            json.dump([self.course_data('Valid'), {**self.course_data('Invalid'), 'metadata': {}}], f)
+        with self.assertRaises(CommandError):
+            call_command('import_courses', path, stdout=StringIO())
+        self.assertFalse(Course.objects.filter(title='Valid').exists())
+
+
+class MediaStorageURLCacheTestCase(APITestCase):
+    def setUp(self):
+        self.storage = MediaStorage(access_key='test', secret_key='test', custom_domain=None, region_name='us-east-1')
+        self.storage.get_url_cache().clear()
+
+    def test_signed_urls_are_reused(self):
+        url = self.storage.url('course_images/python.png')
+
+        self.assertIn('Signature=', url)
+        with mock.patch.object(S3Boto3Storage, 'url') as sign:
+            self.assertEqual(self.storage.url('course_images/python.png'), url)
+        sign.assert_not_called()
+        self.assertNotEqual(self.storage.url('course_images/django.png'), url)
+
+    def test_urls_expiring_within_the_margin_are_not_cached(self):
+        with self.settings(MEDIA_URL_CACHE_MARGIN=60):
+            self.storage.url('course_images/python.png', expire=30)
+
+        self.assertIsNone(self.storage.get_url_cache().get(self.storage.get_url_cache_key('course_images/python.png', 30)))
+
+    def test_excluded_prefixes_are_signed_every_time(self):
+        with self.settings(MEDIA_URL_CACHE_EXCLUDE=['videos/']):
+            self.storage.url('videos/lecture.mp4')
+            self.storage.url('files/notes.pdf')
+
+        cache = self.storage.get_url_cache()
+        expire = self.storage.querystring_expire
+        self.assertIsNone(cache.get(self.storage.get_url_cache_key('videos/lecture.mp4', expire)))
+        self.assertIsNotNone(cache.get(self.storage.get_url_cache_key('files/notes.pdf', expire)))
+
+    def test_excluded_prefixes_cover_blob_fields(self):
+        field = Video._meta.get_field('video_file')
+        name = get_blob_name(get_blob_prefix(field, Video()), 'ab' * 32, 'lecture.mp4')
+
+        with self.settings(MEDIA_URL_CACHE_EXCLUDE=['videos/']):
+            self.storage.url(name)
+
+        self.assertIsNone(self.storage.get_url_cache().get(self.storage.get_url_cache_key(name, self.storage.querystring_expire)))
+
+
+class ImageRenditionsTestCase(APITestCaseSetUp):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        storage_settings = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=directory.name,
+            BACKGROUND_TASKS_EAGER=True,
+        )
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+    def image_file(self, name='cover.png', size=(1200, 900)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, format='PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def test_renditions_follow_image_changes(self):
+        self.set_up()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.program.image = self.image_file()
+            self.program.save()
+
+        self.program.refresh_from_db()
+        renditions = self.program.image_renditions
+        self.assertEqual(set(renditions), {'thumbnail', 'medium', 'webp'})
+        storage = self.program.image.storage
+        with storage.open(renditions['thumbnail']) as f:
+            self.assertEqual(Image.open(f).size, (300, 225))
+        with storage.open(renditions['webp']) as f:
+            self.assertEqual(Image.open(f).format, 'WEBP')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.program.image = self.image_file('other.png')
+            self.program.save()
+
+        self.program.refresh_from_db()
+        self.assertNotEqual(self.program.image_renditions['thumbnail'], renditions['thumbnail'])
+        self.assertFalse(storage.exists(renditions['thumbnail']))
+
+    def test_saves_without_image_changes_schedule_nothing(self):
+        self.set_up()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.program.title = 'Renamed Program'
+            self.program.save()
+            self.admin_user.first_name = 'Renamed'
+            self.admin_user.save()
+            User.objects.create_user(username='new-user', email='new-user@test.com', password='testing')
+
+        self.assertEqual(callbacks, [])
+
+    def test_user_picture_is_kept_and_rendered(self):
+        self.set_up()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_user.picture = self.image_file('me.png')
+            self.admin_user.save()
+
+        self.admin_user.refresh_from_db()
+        with self.admin_user.picture.open('rb') as f:
+            self.assertEqual(Image.open(f).size, (1200, 900))
+        self.assertEqual(set(self.admin_user.picture_renditions), {'thumbnail', 'medium', 'webp'})
+
+    def test_serializer_uses_stored_renditions(self):
+        self.set_up()
+        CourseDetails.objects.filter(pk=self.details.pk).update(
+            image='course_images/cover.png', image_renditions={'thumbnail': 'course_images/renditions/cover-thumbnail.png'}
+        )
+        self.details.refresh_from_db()
+
+        with mock.patch.object(Image, 'open') as open_image:
+            data = CourseDetailsSerializer(self.details).data
+        open_image.assert_not_called()
+        self.assertTrue(data['image_renditions']['thumbnail'].endswith('course_images/renditions/cover-thumbnail.png'))
+
+    def test_generate_image_renditions_command(self):
+        self.set_up()
+        self.program.image.save('cover.png', self.image_file(), save=False)
+        Program.objects.filter(pk=self.program.pk).update(image=self.program.image.name)
+
+        call_command('generate_image_renditions', stdout=StringIO())
+
+        self.program.refresh_from_db()
+        self.assertEqual(set(self.program.image_renditions), {'thumbnail', 'medium', 'webp'})
@@ -1,8 +1,19 @@
+import hashlib
+import os
+import tempfile
+
 from accounts.models import User
-from course.models import (Answer, Course, CourseContent, CourseDetails,
-                           CourseMetadata, Enrollment, File, Lesson, Module,
-                           Program, Question, Quiz, Video)
+from blobs.models import MediaBlob
+from course.models import (Answer, ChunkedUpload, Course, CourseContent,
+                           CourseDetails, CourseMetadata, Enrollment, File,
+                           Lesson, LessonCompletion, Module, Program, Question,
+                           Quiz, Video)
+from course.serializers import CourseSerializer
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
 from django.urls import reverse
 from django.utils import timezone
 from membership.models import Instructor, Student
@@ -278,6 +289,201 @@ class CourseAPITestCase(ModelAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Course.objects.count(), num_courses - 1) 
 
+    def test_bulk_import_courses_without_auth(self):
+        url = reverse('course-bulk')
+        response = self.client.post(url, [self.data], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bulk_import_courses_with_auth(self):
+        self.authenticate()
+        num_courses = Course.objects.count()
+
+        url = reverse('course-bulk')
+        response = self.client.post(url, [self.data, self.data, {**self.data, 'title': 'Imported Course'}], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([course['slug'] for course in response.data], ['test-course-4', 'test-course-5', 'imported-course'])
+        self.assertEqual(Course.objects.count(), num_courses + 3)
+        course = Course.objects.get(slug='imported-course')
+        self.assertEqual(sorted(course.details.skills.values_list('id', flat=True)), sorted([self.skill.id, self.skill_2.id]))
+        self.assertEqual(list(Course.objects.search('imported')), [course])
+
+    def test_bulk_import_courses_is_atomic(self):
+        self.authenticate()
+        num_courses = Course.objects.count()
+        invalid = {**self.data, 'details': {**self.data['details'], 'instructor': 999999}}
+
+        url = reverse('course-bulk')
+        response = self.client.post(url, [self.data, invalid], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Course.objects.count(), num_courses)
+
+
+class CourseCatalogQueryCountTestCase(APITestCase):
+    def setUp(self):
+        self.instructor_user = User.objects.create_user(username="ins-test", email="instructortest@test.com", password="instructor", first_name='Instructor', last_name='Instructor', is_instructor=True)
+        self.instructor = Instructor.objects.create(instructor=self.instructor_user, bio="Great Teacher!")
+        self.program = Program.objects.create(title='Test Program', description='Test Program Description', price=19.99, duration=10)
+        self.project = Project.objects.create(title='Project 1', description='Project 1 Description', owner=self.instructor_user)
+        self.skill = TechSkill.objects.create(name='Python')
+        self.skill_2 = TechSkill.objects.create(name='Django')
+
+    def create_courses(self, count):
+        metadata = CourseMetadata.objects.bulk_create([CourseMetadata(level='beginner') for _ in range(count)])
+        content = CourseContent.objects.bulk_create([CourseContent(syllabus='Syllabus') for _ in range(count)])
+        details = CourseDetails.objects.bulk_create([
+            CourseDetails(instructor=self.instructor, program=self.program, projects=self.project) for _ in range(count)
+        ])
+        CourseDetails.skills.through.objects.bulk_create([
+            CourseDetails.skills.through(coursedetails_id=item.id, techskill_id=skill.id)
+            for item in details for skill in (self.skill, self.skill_2)
+        ])
+        Course.objects.bulk_create([
+            Course(title=f'Course {i}', slug=f'course-{i}', metadata=metadata[i], content=content[i], details=details[i])
+            for i in range(count)
+        ])
+
+    def assert_catalog_queries(self, count):
+        self.create_courses(count)
+
+        # one query for the courses and their joined parts, one for the skills
+        with self.assertNumQueries(2):
+            data = CourseSerializer(Course.objects.catalog(), many=True).data
+
+        self.assertEqual(len(data), count)
+        self.assertEqual(sorted(data[0]['details']['skills']), sorted([self.skill.id, self.skill_2.id]))
+
+    def test_catalog_queries_for_10_courses(self):
+        self.assert_catalog_queries(10)
+
+    def test_catalog_queries_for_100_courses(self):
+        self.assert_catalog_queries(100)
+
+    def test_catalog_queries_for_1000_courses(self):
+        self.assert_catalog_queries(1000)
+
+    def test_list_courses_query_count_does_not_grow(self):
+        self.create_courses(12)
+        url = reverse('course-list')
+
+        # pagination count, courses and skills
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 12)
+
+
+@override_settings(DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage')
+class CourseOutlineAPITestCase(ModelAPITestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.module_2 = Module.objects.create(title='Second Module', course=self.course, order=0)
+        self.lesson_2 = Lesson.objects.create(module=self.module, title="Second Lesson", order=0)
+        self.lesson_3 = Lesson.objects.create(module=self.module_2, title="Third Lesson", order=0)
+
+    def test_retrieve_outline_without_auth(self):
+        url = reverse('course-outline', args=[self.course.slug])
+
+        # course, modules, lessons, videos and files
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['title'], self.course.title)
+
+        modules = response.data['modules']
+        self.assertEqual([module['id'] for module in modules], [self.module_2.id, self.module.id])
+        self.assertEqual([lesson['id'] for lesson in modules[0]['lessons']], [self.lesson_3.id])
+        self.assertEqual([lesson['id'] for lesson in modules[1]['lessons']], [self.lesson_2.id, self.lesson.id])
+
+        lesson = modules[1]['lessons'][1]
+        self.assertEqual(lesson['videos'][0]['title'], self.video.title)
+        self.assertEqual(lesson['files'][0]['title'], self.file.title)
+
+    def test_retrieve_outline_for_unknown_course(self):
+        url = reverse('course-outline', args=['unknown-course'])
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_outline_without_auth(self):
+        url = reverse('course-outline', args=[self.course.slug])
+        response = self.client.put(url, {'modules': []}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(Module.objects.filter(course=self.course).count(), 2)
+
+    def test_replace_outline(self):
+        self.authenticate()
+        data = {'modules': [
+            {'id': self.module.id, 'lessons': [{'id': self.lesson_3.id}, {'id': self.lesson.id, 'is_published': True}]},
+            {'title': 'New Module', 'is_published': True, 'lessons': [{'title': 'New Lesson', 'is_published': True}]},
+        ]}
+
+        url = reverse('course-outline', args=[self.course.slug])
+        response = self.client.put(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        modules = response.data['modules']
+        self.assertEqual([module['title'] for module in modules], ['Test Module', 'New Module'])
+        self.assertEqual([module['order'] for module in modules], [1, 2])
+        self.assertEqual(modules[1]['slug'], 'new-module')
+        self.assertEqual([lesson['id'] for lesson in modules[0]['lessons']], [self.lesson_3.id, self.lesson.id])
+        self.assertEqual([lesson['title'] for lesson in modules[1]['lessons']], ['New Lesson'])
+        self.assertFalse(Module.objects.filter(pk=self.module_2.pk).exists())
+        self.assertFalse(Lesson.objects.filter(pk=self.lesson_2.pk).exists())
+        self.details.refresh_from_db()
+        self.assertEqual(self.details.lesson_count, 1)
+
+    def test_replace_outline_keeps_lessons_of_modules_sent_without_a_list(self):
+        self.authenticate()
+        data = {'modules': [{'id': self.module_2.id}, {'id': self.module.id, 'lessons': [{'id': self.lesson.id}]}]}
+
+        url = reverse('course-outline', args=[self.course.slug])
+        response = self.client.put(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        modules = response.data['modules']
+        self.assertEqual([lesson['id'] for lesson in modules[0]['lessons']], [self.lesson_3.id])
+        self.assertEqual([lesson['id'] for lesson in modules[1]['lessons']], [self.lesson.id])
+        self.assertFalse(Lesson.objects.filter(pk=self.lesson_2.pk).exists())
+
+    def test_patch_outline_reorders_in_a_handful_of_queries(self):
+        self.authenticate()
+        modules = [Module(title=f'Module {i}', slug=f'module-{i}', course=self.course, order=i) for i in range(40)]
+        Module.objects.bulk_create(modules)
+        Lesson.objects.bulk_create([Lesson(module=module, title='Lesson', order=0) for module in modules])
+        data = {'modules': [
+            {'id': module.id, 'lessons': [{'id': lesson.id} for lesson in module.lesson_set.all()]}
+            for module in reversed(Module.objects.filter(course=self.course).prefetch_related('lesson_set'))
+        ]}
+
+        url = reverse('course-outline', args=[self.course.slug])
+        # user, course, current modules and lessons, two bulk updates, two counter
+        # refreshes, savepoints and the five outline queries of the response
+        with self.assertNumQueries(15):
+            response = self.client.patch(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([module['id'] for module in response.data['modules']], [item['id'] for item in data['modules']])
+        self.assertEqual(Module.objects.filter(course=self.course).count(), 42)
+
+    def test_update_outline_with_foreign_lesson(self):
+        self.authenticate()
+        other_module = Module.objects.create(title='Other Module', course=self.course_2)
+        other_lesson = Lesson.objects.create(module=other_module, title='Other Lesson')
+
+        url = reverse('course-outline', args=[self.course.slug])
+        response = self.client.patch(url, {'modules': [{'id': self.module.id, 'lessons': [{'id': other_lesson.id}]}]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        other_lesson.refresh_from_db()
+        self.assertEqual(other_lesson.module, other_module)
+
 
 
 class QuizAPITestCase(ModelAPITestCase):
@@ -929,6 +1135,57 @@ class EnrollmentTestCase(ModelAPITestCase):
         self.assertEqual(Enrollment.objects.first().course, self.course)
         self.assertEqual(Enrollment.objects.first().program, self.program)
 
+    def test_bulk_enroll_without_auth(self):
+        url = reverse('enrollment-bulk')
+        response = self.client.post(url, {'students': [self.student.id], 'course': self.course_2.id}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_bulk_enroll_with_auth(self):
+        self.authenticate()
+        students = [
+            Student.objects.create(student=User.objects.create(username=f'cohort-{i}', email=f'cohort{i}@test.com'), learning_style='visual')
+            for i in range(3)
+        ]
+        student_ids = [self.student.id] + [student.id for student in students] + [students[0].id, 999999]
+
+        url = reverse('enrollment-bulk')
+        data = {'students': student_ids, 'course': self.course.id, 'program': self.program.id}
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], [student.id for student in students])
+        self.assertEqual(response.data['duplicates'], [self.student.id, students[0].id])
+        self.assertEqual(response.data['invalid'], [999999])
+        self.assertEqual(Enrollment.objects.filter(course=self.course, program=self.program).count(), 4)
+        self.details.refresh_from_db()
+        self.assertEqual(self.details.enrollment_count, 4)
+
+    def test_bulk_enroll_requires_course_or_program(self):
+        self.authenticate()
+
+        url = reverse('enrollment-bulk')
+        response = self.client.post(url, {'students': [self.student.id]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_enrollments_with_cursor(self):
+        self.authenticate()
+        Enrollment.objects.create(student=self.student, course=self.course_2)
+        Enrollment.objects.create(student=self.student, course=self.course_3)
+
+        response = self.client.get(reverse('enrollment-list'), {'count': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertNotIn('count', response.data)
+
+        response = self.client.get(response.data['next'])
+        ids = [enrollment['id'] for enrollment in response.data['results']]
+
+        self.assertEqual(ids, [self.enrollment.id])
+        self.assertIsNone(response.data['next'])
+
     def test_retrieve_enrollment_without_auth(self):
         url = reverse('enrollment-detail', kwargs={'pk': self.enrollment.id})
 
@@ -979,4 +1236,297 @@ class EnrollmentTestCase(ModelAPITestCase):
         response = self.client.delete(url)
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertEqual(Enrollment.objects.count(), 0)
\ No newline at end of file
+        self.assertEqual(Enrollment.objects.count(), 0)
+
+
+class LessonCompletionAPITestCase(ModelAPITestCase):
+    def setUp(self):
+        super().setUp()
+        Module.objects.filter(pk=self.module.pk).update(is_published=True)
+        self.lesson.is_published = True
+        self.lesson.save()
+        self.draft_lesson = Lesson.objects.create(module=self.module, title="Draft Lesson", order=2)
+
+    def test_complete_lesson_without_auth(self):
+        url = reverse('lessoncompletion-list')
+        response = self.client.post(url, {'enrollment': self.enrollment.id, 'lesson': self.lesson.id}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_complete_lesson_with_auth(self):
+        self.authenticate()
+
+        url = reverse('lessoncompletion-list')
+        response = self.client.post(url, {'enrollment': self.enrollment.id, 'lesson': self.lesson.id}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_lessons, 1)
+        self.assertEqual(self.enrollment.progress, 100)
+
+    def test_complete_unpublished_lesson(self):
+        self.authenticate()
+
+        url = reverse('lessoncompletion-list')
+        response = self.client.post(url, {'enrollment': self.enrollment.id, 'lesson': self.draft_lesson.id}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(LessonCompletion.objects.exists())
+
+
+class QuizAttemptAPITestCase(ModelAPITestCase):
+    def setUp(self):
+        super().setUp()
+
+        self.data = {
+            'enrollment': self.enrollment.id,
+            'quiz': self.quiz.id,
+            'answers': {str(self.question.id): self.answer.id},
+        }
+
+    def test_submit_attempt_without_auth(self):
+        url = reverse('quizattempt-list')
+        response = self.client.post(url, self.data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_submit_attempt_with_auth(self):
+        self.authenticate()
+
+        url = reverse('quizattempt-list')
+        response = self.client.post(url, self.data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['score'], 2)
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.grade, 100)
+
+    def test_submit_attempt_for_other_course(self):
+        self.authenticate()
+        enrollment = Enrollment.objects.create(student=self.student, course=self.course_2)
+
+        url = reverse('quizattempt-list')
+        response = self.client.post(url, {**self.data, 'enrollment': enrollment.id}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_submit_attempts(self):
+        self.authenticate()
+        students = [
+            Student.objects.create(student=User.objects.create(username=f'exam-{i}', email=f'exam{i}@test.com'), learning_style='visual')
+            for i in range(3)
+        ]
+        enrollments = [Enrollment.objects.create(student=student, course=self.course) for student in students]
+        other = Enrollment.objects.create(student=self.student, course=self.course_2)
+
+        url = reverse('quizattempt-bulk')
+        data = {
+            'quiz': self.quiz.id,
+            'attempts': [
+                {'enrollment': enrollments[0].id, 'answers': {str(self.question.id): self.answer.id}},
+                {'enrollment': enrollments[1].id, 'answers': {}},
+                {'enrollment': enrollments[2].id, 'answers': {str(self.question.id): [self.answer.id]}},
+                {'enrollment': other.id, 'answers': {}},
+            ],
+        }
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([attempt['score'] for attempt in response.data['attempts']], [2, 0, 2])
+        self.assertEqual(response.data['total_marks'], 2)
+        self.assertEqual(response.data['invalid'], [other.id])
+        self.assertEqual(
+            list(Enrollment.objects.filter(pk__in=[e.id for e in enrollments]).order_by('pk').values_list('grade', flat=True)),
+            [100, 0, 100],
+        )
+
+
+class ChunkedUploadAPITestCase(ModelAPITestCase):
+    def setUp(self):
+        super().setUp()
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        upload_settings = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=os.path.join(directory.name, 'media'),
+            CHUNKED_UPLOAD_DIR=os.path.join(directory.name, 'chunks'),
+            CHUNKED_UPLOAD_CHUNK_SIZE=4,
+        )
+        upload_settings.enable()
+        self.addCleanup(upload_settings.disable)
+
+        self.content = b'0123456789'
+        self.video.video_file = None
+        self.video.save()
+
+    def put_chunk(self, upload_id, index, data, **headers):
+        url = reverse('video-upload-chunk', args=[self.video.id, upload_id, index])
+        return self.client.put(url, data, content_type='application/octet-stream', **headers)
+
+    def test_start_upload_without_auth(self):
+        url = reverse('video-upload-start', args=[self.video.id])
+        response = self.client.post(url, {'filename': 'lecture.mp4', 'size': 10}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_start_upload_with_invalid_extension(self):
+        self.authenticate()
+
+        url = reverse('video-upload-start', args=[self.video.id])
+        response = self.client.post(url, {'filename': 'lecture.exe', 'size': 10}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_resumable_upload(self):
+        self.authenticate()
+
+        url = reverse('video-upload-start', args=[self.video.id])
+        response = self.client.post(url, {'filename': 'lecture.mp4', 'size': len(self.content)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['chunk_count'], 3)
+        upload_id = response.data['id']
+
+        # chunks may arrive in any order, and a corrupted one is rejected
+        self.assertEqual(self.put_chunk(upload_id, 2, self.content[8:]).status_code, status.HTTP_200_OK)
+        response = self.put_chunk(upload_id, 0, b'xxxx', HTTP_X_CHUNK_SHA256=hashlib.sha256(self.content[:4]).hexdigest())
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.put_chunk(upload_id, 0, self.content[:4]).status_code, status.HTTP_200_OK)
+
+        complete_url = reverse('video-upload-complete', args=[self.video.id, upload_id])
+        response = self.client.post(complete_url, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # resuming: the status lists what already arrived
+        response = self.client.get(reverse('video-upload-detail', args=[self.video.id, upload_id]))
+        self.assertEqual(response.data['received_chunks'], [0, 2])
+        self.assertEqual(self.put_chunk(upload_id, 1, self.content[4:8]).status_code, status.HTTP_200_OK)
+
+        response = self.client.post(complete_url, {'sha256': hashlib.sha256(self.content).hexdigest()}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.video.refresh_from_db()
+        # stored by content, see blobs.storage
+        sha256 = hashlib.sha256(self.content).hexdigest()
+        self.assertEqual(self.video.video_file.name, f'videos/blobs/{sha256[:2]}/{sha256}.mp4')
+        with self.video.video_file.open('rb') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertFalse(os.path.exists(os.path.join(settings.CHUNKED_UPLOAD_DIR, str(upload_id))))
+
+    def upload_elsewhere(self, user):
+        self.video.video_file = SimpleUploadedFile('lecture.mp4', self.content)
+        self.video.save()
+        ChunkedUpload.objects.create(
+            user=user, content_type=ContentType.objects.get_for_model(Video), object_id=self.video.id,
+            field_name='video_file', filename='lecture.mp4', size=len(self.content), chunk_size=4,
+            sha256=hashlib.sha256(self.content).hexdigest(), completed_at=timezone.now(),
+        )
+
+    def test_upload_of_stored_content_skips_the_chunks(self):
+        self.authenticate()
+        sha256 = hashlib.sha256(self.content).hexdigest()
+        self.upload_elsewhere(User.objects.get(email='test@test.com'))
+        video = Video.objects.create(title='Test Video 2', lesson=self.lesson)
+
+        url = reverse('video-upload-start', args=[video.id])
+        response = self.client.post(url, {'filename': 'copy.mp4', 'size': len(self.content), 'sha256': sha256}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNotNone(response.data['completed_at'])
+        video.refresh_from_db()
+        self.assertEqual(video.video_file.name, self.video.video_file.name)
+        self.assertEqual(MediaBlob.objects.get(sha256=sha256).ref_count, 2)
+
+    def test_upload_of_content_stored_by_someone_else_needs_the_chunks(self):
+        self.authenticate()
+        self.upload_elsewhere(self.student_user)
+        video = Video.objects.create(title='Test Video 2', lesson=self.lesson)
+
+        url = reverse('video-upload-start', args=[video.id])
+        data = {'filename': 'copy.mp4', 'size': len(self.content), 'sha256': hashlib.sha256(self.content).hexdigest()}
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(response.data['completed_at'])
+        video.refresh_from_db()
+        self.assertFalse(video.video_file)
+
+    def test_chunk_with_wrong_size(self):
+        self.authenticate()
+        upload = ChunkedUpload.objects.create(
+            user=User.objects.get(email='test@test.com'), content_type=ContentType.objects.get_for_model(Video),
+            object_id=self.video.id, field_name='video_file', filename='lecture.mp4', size=10, chunk_size=4,
+        )
+
+        self.assertEqual(self.put_chunk(upload.id, 0, b'012').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.put_chunk(upload.id, 3, b'0').status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class VideoStreamAPITestCase(ModelAPITestCase):
+    def setUp(self):
+        super().setUp()
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        storage_settings = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=directory.name,
+        )
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+        self.content = bytes(range(256)) * 4
+        self.video.video_file.save('lecture.mp4', ContentFile(self.content))
+        self.url = reverse('video-stream', args=[self.video.id])
+
+    def get_content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_stream_without_auth(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_stream_whole_video(self):
+        self.authenticate()
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Type'], 'video/mp4')
+        self.assertEqual(int(response['Content-Length']), len(self.content))
+        self.assertEqual(self.get_content(response), self.content)
+
+    def test_stream_ranges(self):
+        self.authenticate()
+
+        for header, start, end in (('bytes=10-19', 10, 19), ('bytes=1000-', 1000, 1023), ('bytes=-4', 1020, 1023), ('bytes=1020-5000', 1020, 1023)):
+            response = self.client.get(self.url, HTTP_RANGE=header)
+
+            self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+            self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{len(self.content)}')
+            self.assertEqual(int(response['Content-Length']), end - start + 1)
+            self.assertEqual(self.get_content(response), self.content[start:end + 1])
+
+    def test_stream_unsatisfiable_range(self):
+        self.authenticate()
+        response = self.client.get(self.url, HTTP_RANGE='bytes=5000-')
+
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_stream_suffix_range_of_empty_video(self):
+        self.authenticate()
+        self.video.video_file.save('empty.mp4', ContentFile(b''))
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-4')
+
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], 'bytes */0')
+
+    def test_stream_video_without_file(self):
+        self.authenticate()
+        Video.objects.filter(pk=self.video.pk).update(video_file='')
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
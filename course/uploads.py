@@ -0,0 +1,207 @@
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+
+from blobs.storage import (find_blob, get_blob_fields, get_blob_name,
+                           get_blob_prefix, register_blob)
+from course.models import ChunkedUpload
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+# S3 multipart uploads need every part but the last to be at least 5 MiB.
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+class ChunkError(Exception):
+    pass
+
+
+def get_chunk_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def get_upload_dir(upload):
+    root = getattr(settings, 'CHUNKED_UPLOAD_DIR', None) or os.path.join(tempfile.gettempdir(), 'chunked_uploads')
+    return os.path.join(root, str(upload.pk))
+
+
+def get_chunk_path(upload, index, extension='part'):
+    return os.path.join(get_upload_dir(upload), f'{index}.{extension}')
+
+
+def received_chunks(upload):
+    """
+    Returns {index: sha256} for the chunks stored so far, so a client can
+    resume by sending only the missing ones.
+    """
+    chunks = {}
+    upload_dir = get_upload_dir(upload)
+    if not os.path.isdir(upload_dir):
+        return chunks
+    for name in os.listdir(upload_dir):
+        if name.endswith('.sha256'):
+            with open(os.path.join(upload_dir, name)) as f:
+                chunks[int(name.split('.')[0])] = f.read()
+    return chunks
+
+
+def write_chunk(upload, index, stream, sha256=None):
+    """
+    Streams one chunk to the upload's temporary directory, hashing it on the
+    way. The chunk only becomes visible once it is complete and its hash
+    matches, so a dropped connection leaves nothing behind.
+    """
+    if not 0 <= index < upload.chunk_count:
+        raise ChunkError(f'Chunk index must be between 0 and {upload.chunk_count - 1}.')
+    expected_size = min(upload.chunk_size, upload.size - index * upload.chunk_size)
+
+    os.makedirs(get_upload_dir(upload), exist_ok=True)
+    path = get_chunk_path(upload, index)
+    digest = hashlib.sha256()
+    written = 0
+    with tempfile.NamedTemporaryFile(dir=get_upload_dir(upload), suffix='.tmp', delete=False) as f:
+        try:
+            while written <= expected_size:
+                data = stream.read(STREAM_BUFFER_SIZE) if stream else b''
+                if not data:
+                    break
+                digest.update(data)
+                f.write(data)
+                written += len(data)
+
+            if written != expected_size:
+                raise ChunkError(f'Chunk {index} must be {expected_size} bytes.')
+            if sha256 and sha256.lower() != digest.hexdigest():
+                raise ChunkError(f'Chunk {index} does not match its SHA-256 hash.')
+        except BaseException:
+            os.unlink(f.name)
+            raise
+
+    os.replace(f.name, path)
+    with open(get_chunk_path(upload, index, 'sha256'), 'w') as f:
+        f.write(digest.hexdigest())
+    return digest.hexdigest()
+
+
+def complete_upload(upload, instance, sha256=None):
+    """
+    Checks that every chunk arrived, saves them to the field's storage as
+    one file and points the field at it.
+    """
+    missing = set(range(upload.chunk_count)) - set(received_chunks(upload))
+    if missing:
+        raise ChunkError(f'Missing chunks: {sorted(missing)}.')
+
+    paths = [get_chunk_path(upload, index) for index in range(upload.chunk_count)]
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for data in iter(lambda: f.read(STREAM_BUFFER_SIZE), b''):
+                digest.update(data)
+    if sha256 and sha256.lower() != digest.hexdigest():
+        raise ChunkError('The upload does not match its SHA-256 hash.')
+
+    field = instance._meta.get_field(upload.field_name)
+    name = store_chunks(field, instance, upload, paths, digest.hexdigest())
+
+    setattr(instance, upload.field_name, name)
+    instance.save(update_fields=[upload.field_name, 'updated_at'])
+
+    upload.sha256 = digest.hexdigest()
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=['sha256', 'completed_at', 'updated_at'])
+    discard_chunks(upload)
+    return name
+
+
+def store_chunks(field, instance, upload, paths, sha256):
+    """
+    Saves the chunks as a content-addressed blob, see blobs.storage. Fields
+    that don't use blobs keep the uploaded filename.
+    """
+    if (type(instance), field.name) not in get_blob_fields():
+        return save_chunks(field.storage, field.generate_filename(instance, upload.filename), paths)
+
+    prefix = get_blob_prefix(field, instance)
+    blob = find_blob(sha256, prefix, upload.size)
+    if blob is None:
+        name = save_chunks(field.storage, get_blob_name(prefix, sha256, upload.filename), paths)
+        blob = register_blob(field, prefix, sha256, name, upload.size)
+    return blob.name
+
+
+def link_existing_blob(upload, instance):
+    """
+    Completes an upload straight away when a blob with the hash and size
+    the client announced is already stored, so no chunk has to be sent.
+    Returns whether it did.
+
+    Knowing a hash doesn't prove having the file, so this is only done for
+    content the same user has sent in full before.
+    """
+    if not upload.sha256 or (type(instance), upload.field_name) not in get_blob_fields():
+        return False
+    field = instance._meta.get_field(upload.field_name)
+    blob = find_blob(upload.sha256, get_blob_prefix(field, instance), upload.size)
+    if blob is None or not has_uploaded(upload.user_id, blob.sha256):
+        return False
+
+    setattr(instance, upload.field_name, blob.name)
+    instance.save(update_fields=[upload.field_name, 'updated_at'])
+    upload.sha256 = blob.sha256
+    upload.completed_at = timezone.now()
+    upload.save(update_fields=['sha256', 'completed_at', 'updated_at'])
+    return True
+
+
+def has_uploaded(user_id, sha256):
+    return ChunkedUpload.objects.filter(user=user_id, sha256=sha256, completed_at__isnull=False).exists()
+
+
+def save_chunks(storage, name, paths):
+    if isinstance(storage, S3Boto3Storage):
+        return save_chunks_to_s3(storage, name, paths)
+
+    # Other backends get a single file assembled next to the chunks.
+    with tempfile.TemporaryFile(dir=os.path.dirname(paths[0])) as assembled:
+        for path in paths:
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, assembled, STREAM_BUFFER_SIZE)
+        assembled.seek(0)
+        return storage.save(name, File(assembled, name=os.path.basename(name)))
+
+
+def save_chunks_to_s3(storage, name, paths):
+    """
+    Sends every chunk as one part of an S3 multipart upload, so the file is
+    never assembled or held in memory on this side.
+    """
+    name = storage.get_available_name(name)
+    key = storage._normalize_name(clean_name(name))
+    params = storage.get_object_parameters(name)
+    if storage.default_acl:
+        params.setdefault('ACL', storage.default_acl)
+    params.setdefault('ContentType', mimetypes.guess_type(name)[0] or 'application/octet-stream')
+
+    multipart_upload = storage.bucket.Object(key).initiate_multipart_upload(**params)
+    try:
+        parts = []
+        for number, path in enumerate(paths, start=1):
+            with open(path, 'rb') as f:
+                part = multipart_upload.Part(number).upload(Body=f)
+            parts.append({'ETag': part['ETag'], 'PartNumber': number})
+        multipart_upload.complete(MultipartUpload={'Parts': parts})
+    except Exception:
+        multipart_upload.abort()
+        raise
+    return name
+
+
+def discard_chunks(upload):
+    shutil.rmtree(get_upload_dir(upload), ignore_errors=True)
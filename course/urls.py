@@ -14,7 +14,10 @@ router.register(r'lessons', views.LessonViewSet, basename='lesson')
 router.register(r'videos', views.VideoViewSet, basename='video')
 router.register(r'files', views.FileViewSet, basename='file')
 router.register(r'enrollments', views.EnrollmentViewSet, basename='enrollment')
+router.register(r'lesson-completions', views.LessonCompletionViewSet, basename='lessoncompletion')
+router.register(r'quiz-attempts', views.QuizAttemptViewSet, basename='quizattempt')
 
 urlpatterns = [
+    path('courses/<slug:slug>/outline/', views.CourseOutlineAPIView.as_view(), name='course-outline'),
     path('', include(router.urls)),
 ]
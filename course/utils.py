@@ -1,3 +1,6 @@
+from django.db.models import Q
+from django.utils.text import slugify
+
 # import datetime
 # import os
 # import random
@@ -29,3 +32,34 @@
 #                 )
 #         return unique_slug_generator(instance, new_slug=new_slug)
 #     return slug
+
+
+def unique_slugs(model, values, field_name='slug', batch_size=100):
+    """
+    Returns a unique slug for each value the way AutoSlugField would
+    (``title``, ``title-2``, ...), looking up the taken slugs for the whole
+    batch at once instead of querying once or more per object.
+    """
+    max_length = model._meta.get_field(field_name).max_length
+    bases = [slugify(value or '')[:max_length].strip('-') or model._meta.model_name for value in values]
+
+    # leave room for a numeric suffix so truncated variants are fetched too
+    prefixes = sorted({base[:max_length - 4] for base in bases})
+    taken = set()
+    for start in range(0, len(prefixes), batch_size):
+        lookups = Q()
+        for prefix in prefixes[start:start + batch_size]:
+            lookups |= Q(**{f'{field_name}__startswith': prefix})
+        taken.update(model._default_manager.filter(lookups).values_list(field_name, flat=True))
+
+    slugs = []
+    for base in bases:
+        slug = base
+        number = 2
+        while slug in taken:
+            end = f'-{number}'
+            slug = base[:max_length - len(end)].strip('-') + end
+            number += 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
@@ -1,16 +1,32 @@
-from accounts.pagination import CustomPageNumberPagination
-from course.models import (Answer, Course, Enrollment, File, Lesson, Module,
-                           Program, Question, Quiz, Video)
-from course.serializers import (AnswerSerializer, CourseSerializer,
-                                EnrollmentSerializer, FileSerializer,
+from accounts.pagination import (CustomCursorPagination,
+                                 CustomPageNumberPagination)
+from course.models import (Answer, ChunkedUpload, Course, Enrollment, File,
+                           Lesson, LessonCompletion, Module, Program, Question,
+                           Quiz, QuizAttempt, Video)
+from course.search import get_search_backend
+from course.serializers import (AnswerSerializer, BulkEnrollmentSerializer,
+                                BulkQuizAttemptSerializer,
+                                ChunkedUploadSerializer,
+                                CourseOutlineSerializer,
+                                CourseOutlineUpdateSerializer,
+                                CourseSerializer, EnrollmentSerializer,
+                                FileSerializer, LessonCompletionSerializer,
                                 LessonSerializer, ModuleSerializer,
                                 ProgramSerializer, QuestionSerializer,
-                                QuizSerializer, VideoSerializer)
-from django.db.models import Q
+                                QuizAttemptSerializer, QuizSerializer,
+                                VideoSerializer)
+from course.streaming import stream_field_file
+from course.uploads import (ChunkError, complete_upload, get_chunk_size,
+                            link_existing_blob, write_chunk)
+from django.contrib.contenttypes.models import ContentType
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, viewsets
+from rest_framework import filters, generics, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import (IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
+from rest_framework.response import Response
 
 
 class ProgramViewSet(viewsets.ModelViewSet):
@@ -31,9 +47,7 @@ class ProgramViewSet(viewsets.ModelViewSet):
         qs = super().get_queryset()
         query = self.request.query_params.get('query', None)
         if query:
-            or_lookup = (Q(title__icontains=query) |
-                         Q(description__icontains=query))
-            qs = qs.filter(or_lookup).distinct()  # distinct() is often necessary with Q lookups
+            qs = get_search_backend().search(qs, query)
         return qs
     
 
@@ -51,6 +65,46 @@ class CourseViewSet(viewsets.ModelViewSet):
     search_fields = ['id']
     ordering_fields = ['id']
 
+    def get_queryset(self):
+        if self.action in ('list', 'retrieve'):
+            return Course.objects.catalog()
+        return super().get_queryset()
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Imports a list of courses with their metadata, content and details in
+        one transaction. Nothing is created if any course is invalid.
+        """
+        serializer = CourseSerializer(data=request.data, many=True, max_length=1000)
+        serializer.is_valid(raise_exception=True)
+        courses = serializer.save()
+        return Response(
+            [{'id': course.id, 'slug': course.slug, 'title': course.title} for course in courses],
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class CourseOutlineAPIView(generics.RetrieveUpdateAPIView):
+    """
+    API endpoint that returns a course's ordered module, lesson, video and file tree.
+    PUT replaces the module and lesson tree in one go, PATCH leaves out items untouched.
+    """
+    queryset = Course.objects.outline()
+    serializer_class = CourseOutlineSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    lookup_field = 'slug'
+
+    def get_queryset(self):
+        if self.request.method in ('PUT', 'PATCH'):
+            return Course.objects.all()
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.request.method in ('PUT', 'PATCH'):
+            return CourseOutlineUpdateSerializer
+        return super().get_serializer_class()
+
 
 class QuizViewSet(viewsets.ModelViewSet):
     """
@@ -124,11 +178,76 @@ class LessonViewSet(viewsets.ModelViewSet):
     ordering_fields = ['id']
 
 
-class VideoViewSet(viewsets.ModelViewSet):
+class ChunkedUploadMixin:
+    """
+    Resumable uploads into ``upload_field``: start an upload, PUT its chunks in
+    any order (retrying failed ones), then complete it to store the file.
+    """
+    upload_field = None
+
+    def get_upload(self, upload_id):
+        instance = self.get_object()
+        upload = get_object_or_404(
+            ChunkedUpload,
+            pk=upload_id,
+            user=self.request.user,
+            content_type=ContentType.objects.get_for_model(instance),
+            object_id=instance.pk,
+            field_name=self.upload_field,
+            completed_at__isnull=True,
+        )
+        return instance, upload
+
+    @action(detail=True, methods=['post'], url_path='uploads', url_name='upload-start')
+    def start_upload(self, request, pk=None):
+        instance = self.get_object()
+        field = instance._meta.get_field(self.upload_field)
+        serializer = ChunkedUploadSerializer(data=request.data, context={'field': field})
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.save(
+            user=request.user,
+            content_type=ContentType.objects.get_for_model(instance),
+            object_id=instance.pk,
+            field_name=self.upload_field,
+            chunk_size=get_chunk_size(),
+        )
+        link_existing_blob(upload, instance)
+        return Response(ChunkedUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'], url_path=r'uploads/(?P<upload_id>\d+)', url_name='upload-detail')
+    def upload_status(self, request, pk=None, upload_id=None):
+        _, upload = self.get_upload(upload_id)
+        return Response(ChunkedUploadSerializer(upload).data)
+
+    @action(detail=True, methods=['put'], url_path=r'uploads/(?P<upload_id>\d+)/chunks/(?P<index>\d+)', url_name='upload-chunk')
+    def upload_chunk(self, request, pk=None, upload_id=None, index=None):
+        """
+        Takes the raw chunk as the request body, with an optional
+        X-Chunk-SHA256 header to verify it.
+        """
+        _, upload = self.get_upload(upload_id)
+        try:
+            sha256 = write_chunk(upload, int(index), request.stream, request.headers.get('X-Chunk-SHA256'))
+        except ChunkError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'index': int(index), 'sha256': sha256})
+
+    @action(detail=True, methods=['post'], url_path=r'uploads/(?P<upload_id>\d+)/complete', url_name='upload-complete')
+    def complete_chunked_upload(self, request, pk=None, upload_id=None):
+        instance, upload = self.get_upload(upload_id)
+        try:
+            complete_upload(upload, instance, request.data.get('sha256') or upload.sha256)
+        except ChunkError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(instance).data)
+
+
+class VideoViewSet(ChunkedUploadMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows videos to be uploaded, viewed or edited.
     """
     queryset = Video.objects.all()
+    upload_field = 'video_file'
     serializer_class = VideoSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = CustomPageNumberPagination
@@ -138,12 +257,24 @@ class VideoViewSet(viewsets.ModelViewSet):
     search_fields = ['id']
     ordering_fields = ['id']
 
+    @action(detail=True, methods=['get'])
+    def stream(self, request, pk=None):
+        """
+        Streams the video to the course player, honouring Range requests so
+        seeking only reads the requested bytes.
+        """
+        video = self.get_object()
+        if not video.video_file:
+            raise Http404
+        return stream_field_file(request, video.video_file)
 
-class FileViewSet(viewsets.ModelViewSet):
+
+class FileViewSet(ChunkedUploadMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows videos to be uploaded, viewed or edited.
     """
     queryset = File.objects.all()
+    upload_field = 'file'
     serializer_class = FileSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = CustomPageNumberPagination
@@ -161,9 +292,61 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
     queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = CustomPageNumberPagination
+    pagination_class = CustomCursorPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     
     filterset_fields = ['id']
     search_fields = ['id']
-    ordering_fields = ['id']
\ No newline at end of file
+    ordering_fields = ['id']
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Enrolls a list of students into a course or program in batches and
+        reports which students were created, already enrolled or unknown.
+        """
+        serializer = BulkEnrollmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save(), status=status.HTTP_201_CREATED)
+
+
+class LessonCompletionViewSet(viewsets.ModelViewSet):
+    """
+    API endpoint that allows lesson completions to be recorded, viewed or removed.
+    """
+    queryset = LessonCompletion.objects.all()
+    serializer_class = LessonCompletionSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CustomCursorPagination
+    http_method_names = ['get', 'post', 'delete', 'head', 'options']
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+
+    filterset_fields = ['id', 'enrollment', 'lesson']
+    search_fields = ['id']
+    ordering_fields = ['id']
+
+
+class QuizAttemptViewSet(viewsets.ModelViewSet):
+    """
+    API endpoint that allows quiz attempts to be submitted and viewed. Attempts are graded on submission.
+    """
+    queryset = QuizAttempt.objects.all()
+    serializer_class = QuizAttemptSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CustomCursorPagination
+    http_method_names = ['get', 'post', 'head', 'options']
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+
+    filterset_fields = ['id', 'enrollment', 'quiz']
+    search_fields = ['id']
+    ordering_fields = ['id']
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Submits and grades the attempts of a whole exam window for one quiz in
+        batches, and reports enrollments that can't take the quiz.
+        """
+        serializer = BulkQuizAttemptSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save(), status=status.HTTP_201_CREATED)
@@ -0,0 +1,102 @@
+import io
+import os
+
+from django.apps import apps
+from django.core.files.base import ContentFile
+from helpers.tasks import enqueue
+from PIL import Image
+
+# name, bounding box, format (None keeps the source format)
+RENDITIONS = (
+    ('thumbnail', (300, 300), None),
+    ('medium', (800, 800), None),
+    ('webp', (1600, 1600), 'WEBP'),
+)
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+
+def get_renditions_field(field_name):
+    return f'{field_name}_renditions'
+
+
+def get_image_name(instance, field_name):
+    # read from __dict__ so a deferred field doesn't cost a query
+    value = instance.__dict__.get(field_name)
+    return getattr(value, 'name', value)
+
+
+def remember_image(instance, field_name):
+    setattr(instance, f'_loaded_{field_name}', get_image_name(instance, field_name))
+
+
+def schedule_renditions(instance, field_name, created=False):
+    """
+    Queues rendition generation when the image changed since the instance
+    was loaded; saves that leave the image alone cost nothing.
+    """
+    if field_name not in instance.__dict__:
+        return
+    name = get_image_name(instance, field_name)
+    previous = getattr(instance, f'_loaded_{field_name}', None)
+    setattr(instance, f'_loaded_{field_name}', name)
+
+    if created and name in ('', None, instance._meta.get_field(field_name).get_default()):
+        return
+    if not created and name == previous:
+        return
+    enqueue(update_renditions, instance._meta.label, instance.pk, field_name, name)
+
+
+def update_renditions(model_label, pk, field_name, name):
+    model = apps.get_model(model_label)
+    instance = model._default_manager.filter(pk=pk).first()
+    # skip if the image was replaced again before this ran
+    if instance is None or getattr(instance, field_name).name != name:
+        return
+
+    renditions_field = get_renditions_field(field_name)
+    field_file = getattr(instance, field_name)
+    previous = getattr(instance, renditions_field) or {}
+    renditions = {}
+    if name and name != model._meta.get_field(field_name).get_default():
+        renditions = generate_renditions(field_file)
+
+    updated = model._default_manager.filter(pk=pk, **{field_name: name}).update(**{renditions_field: renditions})
+    if updated:
+        stale = set(previous.values()) - set(renditions.values())
+    else:
+        # the image changed meanwhile, so drop what was just generated
+        stale = set(renditions.values())
+    for path in stale:
+        field_file.storage.delete(path)
+
+
+def generate_renditions(field_file):
+    """
+    Saves resized copies of an image next to it and returns their storage
+    names by rendition. Reads through the storage, so it works on S3.
+    """
+    with field_file.open('rb') as f:
+        image = Image.open(f)
+        image.load()
+    source_format = image.format if image.format in EXTENSIONS else 'PNG'
+
+    directory, filename = os.path.split(os.path.splitext(field_file.name)[0])
+    renditions = {}
+    for rendition_name, size, image_format in RENDITIONS:
+        image_format = image_format or source_format
+        rendition = image.copy()
+        rendition.thumbnail(size)
+        if image_format == 'JPEG' and rendition.mode not in ('RGB', 'L'):
+            rendition = rendition.convert('RGB')
+
+        buffer = io.BytesIO()
+        rendition.save(buffer, format=image_format)
+        path = os.path.join(directory, 'renditions', f'{filename}-{rendition_name}.{EXTENSIONS[image_format]}')
+        renditions[rendition_name] = field_file.storage.save(path, ContentFile(buffer.getvalue()))
+    return renditions
+
+
+def get_rendition_urls(field_file, renditions):
+    return {name: field_file.storage.url(path) for name, path in (renditions or {}).items()}
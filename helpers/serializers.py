@@ -0,0 +1,17 @@
+from helpers.images import get_rendition_urls, get_renditions_field
+from rest_framework import serializers
+
+
+class RenditionsField(serializers.ReadOnlyField):
+    """
+    URLs of an image field's renditions, built from the stored names so that
+    serializing never opens the image.
+    """
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        renditions = getattr(instance, get_renditions_field(self.image_field))
+        return get_rendition_urls(getattr(instance, self.image_field), renditions)
@@ -0,0 +1,44 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_TASK_WORKERS', 2),
+                thread_name_prefix='background-task',
+            )
+        return _executor
+
+
+def run_task(func, *args, **kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', func.__name__)
+    finally:
+        # worker threads get their own connections, which nothing else closes
+        connections.close_all()
+
+
+def enqueue(func, *args, **kwargs):
+    """
+    Runs ``func`` in the worker pool once the current transaction commits,
+    so the task sees the rows that scheduled it. With BACKGROUND_TASKS_EAGER
+    the task runs in the calling thread instead, which tests rely on.
+    """
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        transaction.on_commit(lambda: func(*args, **kwargs))
+    else:
+        transaction.on_commit(lambda: get_executor().submit(run_task, func, *args, **kwargs))
@@ -0,0 +1,272 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from project.models import Activity
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_queue = None
+_queue_lock = threading.Lock()
+
+COLLAPSIBLE_TYPES = ('updated_project', 'updated_task')
+
+
+class ActivityBuffer:
+    def __init__(self):
+        self.activities = []
+
+    def add(self, activity):
+        self.activities.append(activity)
+
+    def flush(self):
+        activities, self.activities = self.activities, []
+        write_activities(activities)
+
+
+class TransactionBuffer:
+    """
+    The activities recorded at one savepoint level of a transaction. Each
+    is confirmed by its own on_commit callback, which a rollback drops with
+    the others of its savepoint, and the last one confirmed writes them.
+    """
+    def __init__(self):
+        self.activities = []
+        self.committed = []
+
+    def add(self, activity):
+        self.activities.append(activity)
+        transaction.on_commit(partial(self.commit, activity))
+
+    def commit(self, activity):
+        self.committed.append(activity)
+        # callbacks run in order, so the last activity comes last; those
+        # whose callback was dropped are forgotten here
+        if self.activities and activity is self.activities[-1]:
+            activities, self.activities, self.committed = self.committed, [], []
+            buffers = get_buffers()
+            if buffers:
+                # a request still writes once
+                buffers[-1].activities.extend(activities)
+            else:
+                save_activities(activities)
+
+
+def get_buffers():
+    if not hasattr(_local, 'buffers'):
+        _local.buffers = []
+    return _local.buffers
+
+
+@contextmanager
+def buffer_activities():
+    """
+    Collects the activities recorded inside the block, and those of the
+    transactions committed inside it, and writes them with one bulk_create
+    when it exits, or when the surrounding transaction commits.
+    """
+    buffer = ActivityBuffer()
+    get_buffers().append(buffer)
+    try:
+        yield buffer
+    finally:
+        get_buffers().remove(buffer)
+        buffer.flush()
+
+
+def record_activity(**fields):
+    """
+    Records an Activity without writing it yet. Inside a transaction the row
+    waits for the commit, so rolled back changes leave no activity; inside
+    buffer_activities() it is written with the others of its batch;
+    otherwise it is written straight away.
+    """
+    activity = Activity(**fields)
+    if not getattr(settings, 'ACTIVITY_BUFFERING', True):
+        insert_activities([activity])
+        return activity
+
+    buffers = get_buffers()
+    if connection.in_atomic_block:
+        get_transaction_buffer().add(activity)
+    elif buffers:
+        buffers[-1].add(activity)
+    else:
+        write_activities([activity])
+    return activity
+
+
+def get_transaction_buffer():
+    """
+    The buffer of the innermost savepoint, or of the transaction when there
+    is none, so the activities of a savepoint go when it rolls back.
+    """
+    if not hasattr(_local, 'transaction_buffers'):
+        _local.transaction_buffers = {}
+    buffers = _local.transaction_buffers
+    key = tuple(connection.savepoint_ids)
+    # savepoints that ended take no more activities; the on_commit callbacks
+    # keep hold of the buffers that still have some to write
+    for other in [other for other in buffers if key[:len(other)] != other]:
+        del buffers[other]
+    if key not in buffers:
+        buffers[key] = TransactionBuffer()
+    return buffers[key]
+
+
+def write_activities(activities):
+    if not activities:
+        return
+    if connection.in_atomic_block:
+        # wait for the commit, so rolled back changes leave no activity
+        for activity in activities:
+            get_transaction_buffer().add(activity)
+    else:
+        save_activities(activities)
+
+
+def save_activities(activities):
+    if not activities:
+        return
+    if getattr(settings, 'ACTIVITY_ASYNC', False):
+        enqueue_activities(activities)
+    else:
+        insert_activities(activities)
+
+
+def insert_activities(activities):
+    Activity.objects.bulk_create(collapse_activities(activities), batch_size=getattr(settings, 'ACTIVITY_BATCH_SIZE', 500))
+
+
+def get_collapse_window():
+    return timezone.timedelta(seconds=getattr(settings, 'ACTIVITY_COLLAPSE_WINDOW', 300))
+
+
+def get_collapse_key(activity):
+    return activity.user_id, activity.project_id, activity.task_id, activity.activity_type
+
+
+def collapse_activities(activities):
+    """
+    Folds repeated updates by the same user on the same object into one
+    activity with a count, when each comes within the collapse window of
+    the previous one. Repeats inside the batch are merged first, then the
+    rest into recent rows, with one query to find those. Returns the
+    activities that still need inserting.
+    """
+    window = get_collapse_window()
+    if not window:
+        return activities
+
+    pending = []
+    latest = {}
+    for activity in sorted(activities, key=lambda activity: activity.date_created):
+        key = get_collapse_key(activity)
+        previous = latest.get(key)
+        if (
+            activity.activity_type in COLLAPSIBLE_TYPES
+            and previous
+            and activity.date_created - previous.date_created <= window
+        ):
+            previous.count += activity.count
+            previous.date_created = activity.date_created
+        else:
+            latest[key] = activity
+            pending.append(activity)
+
+    # only the first activity of a key can be close enough to a stored row
+    first = {}
+    for activity in pending:
+        if activity.activity_type in COLLAPSIBLE_TYPES:
+            first.setdefault(get_collapse_key(activity), activity)
+    if not first:
+        return pending
+
+    rows = {}
+    for row in Activity.objects.filter(
+        user__in={key[0] for key in first},
+        activity_type__in=COLLAPSIBLE_TYPES,
+        date_created__gte=min(activity.date_created for activity in first.values()) - window,
+    ).order_by('date_created').values('id', 'user_id', 'project_id', 'task_id', 'activity_type', 'date_created'):
+        rows[row['user_id'], row['project_id'], row['task_id'], row['activity_type']] = row
+
+    collapsed = set()
+    for key, activity in first.items():
+        row = rows.get(key)
+        if row and timezone.timedelta() <= activity.date_created - row['date_created'] <= window:
+            Activity.objects.filter(pk=row['id']).update(
+                count=F('count') + activity.count, date_created=activity.date_created, updated_at=timezone.now()
+            )
+            collapsed.add(id(activity))
+    return [activity for activity in pending if id(activity) not in collapsed]
+
+
+def get_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = queue.Queue(maxsize=getattr(settings, 'ACTIVITY_QUEUE_SIZE', 10000))
+            threading.Thread(target=drain_queue, args=(_queue,), name='activity-writer', daemon=True).start()
+        return _queue
+
+
+def enqueue_activities(activities):
+    """
+    Hands activities to the writer thread. When the queue is full the
+    caller writes the rest itself, which bounds memory without dropping
+    anything.
+    """
+    activity_queue = get_queue()
+    for index, activity in enumerate(activities):
+        try:
+            activity_queue.put_nowait(activity)
+        except queue.Full:
+            insert_activities(activities[index:])
+            return
+
+
+def drain_queue(activity_queue):
+    batch_size = getattr(settings, 'ACTIVITY_BATCH_SIZE', 500)
+    while True:
+        activities = [activity_queue.get()]
+        while len(activities) < batch_size:
+            try:
+                activities.append(activity_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            insert_activities(activities)
+        except Exception:
+            logger.exception('Could not write %s activities', len(activities))
+        finally:
+            connections.close_all()
+            for _ in activities:
+                activity_queue.task_done()
+
+
+def wait_for_activities():
+    """
+    Blocks until the writer thread has written everything queued so far.
+    """
+    if _queue is not None:
+        _queue.join()
+
+
+class ActivityBufferMiddleware:
+    """
+    Buffers the activities of a request, so a request that saves many
+    projects or tasks writes its activities with one query.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffer_activities():
+            return self.get_response(request)
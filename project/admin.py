@@ -4,3 +4,6 @@ from project import models
 # Register your models here.
 admin.site.register(models.TechSkill)
 admin.site.register(models.Project)
+admin.site.register(models.TaskDependency)
+admin.site.register(models.WorkloadWeek)
+admin.site.register(models.ActivityArchive)
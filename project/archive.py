@@ -0,0 +1,117 @@
+import datetime
+import gzip
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from project.models import Activity, ActivityArchive
+
+ARCHIVE_FIELDS = (
+    'id', 'user_id', 'project_id', 'task_id', 'activity_type', 'date_created', 'count', 'created_at', 'updated_at',
+)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def get_month_bounds(month):
+    start = datetime.datetime.combine(month, datetime.time.min)
+    end = datetime.datetime.combine(add_months(month, 1), datetime.time.min)
+    if not settings.USE_TZ:
+        return start, end
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def get_months_to_archive(keep_months):
+    """
+    Returns the months with activity that are older than the last
+    ``keep_months`` whole months.
+    """
+    current = timezone.localdate().replace(day=1)
+    cutoff, _ = get_month_bounds(add_months(current, -keep_months))
+    return list(Activity.objects.filter(date_created__lt=cutoff).dates('date_created', 'month'))
+
+
+def archive_month(month, batch_size=5000):
+    """
+    Copies a month of activity to a gzipped JSON lines file in the default
+    storage, then deletes it from the Activity table. Rows are read and
+    deleted in id order, a batch at a time, so memory stays flat however
+    big the month is. A month archived before gets a new file with its old
+    rows and the new ones, e.g. activity buffered with an old date that
+    landed late. Returns the ActivityArchive, or None if the month had no
+    activity left to archive.
+    """
+    start, end = get_month_bounds(month)
+    activities = Activity.objects.filter(date_created__gte=start, date_created__lt=end)
+    archive = ActivityArchive.objects.filter(month=month).first() or ActivityArchive(month=month)
+    previous_name = archive.file.name
+
+    rows = 0
+    first_id = last_id = None
+    with tempfile.TemporaryFile() as f:
+        with gzip.GzipFile(fileobj=f, mode='wb') as archive_file:
+            if archive.pk:
+                for row in iter_archive_rows(archive):
+                    archive_file.write(json.dumps(row).encode() + b'\n')
+            while True:
+                batch = list(
+                    activities.filter(pk__gt=last_id or 0).order_by('pk').values(*ARCHIVE_FIELDS)[:batch_size]
+                )
+                if not batch:
+                    break
+                for row in batch:
+                    archive_file.write(json.dumps(row, cls=DjangoJSONEncoder).encode() + b'\n')
+                rows += len(batch)
+                first_id = first_id or batch[0]['id']
+                last_id = batch[-1]['id']
+        if not rows:
+            return None
+
+        archive.rows += rows
+        archive.size = f.seek(0, os.SEEK_END)
+        archive.first_id = min(archive.first_id or first_id, first_id)
+        archive.last_id = max(archive.last_id or last_id, last_id)
+        f.seek(0)
+        archive.file.save(f'{month:%Y-%m}.jsonl.gz', File(f), save=False)
+
+    try:
+        with transaction.atomic():
+            archive.save()
+            # only what was written to the file, in case rows arrived meanwhile
+            archived = activities.filter(pk__gte=first_id, pk__lte=last_id)
+            while True:
+                ids = list(archived.values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                Activity.objects.filter(pk__in=ids).delete()
+    except Exception:
+        # the rows are still in the table and no archive points at the file
+        archive.file.delete(save=False)
+        raise
+    if previous_name:
+        transaction.on_commit(lambda: archive.file.storage.delete(previous_name))
+    return archive
+
+
+def iter_archive_rows(archive, user=None, project=None):
+    """
+    Yields the rows of an archive as dicts, optionally only those of a user
+    or a project, decompressing as it goes.
+    """
+    with archive.file.open('rb') as f:
+        with gzip.GzipFile(fileobj=f, mode='rb') as archive_file:
+            for line in archive_file:
+                row = json.loads(line)
+                if user is not None and row['user_id'] != user:
+                    continue
+                if project is not None and row['project_id'] != project:
+                    continue
+                yield row
@@ -0,0 +1,163 @@
+import codecs
+import csv
+import json
+import os
+from itertools import islice
+
+from accounts.models import User
+from django.db import transaction
+from project.activity import record_activity
+from project.models import Tag, Task
+from project.progress import recompute_project_progress
+from project.ranking import get_last_rank, get_ranks_between
+from project.scheduling import schedule_project
+from project.serializers import TaskImportSerializer
+from project.summaries import invalidate_project_summaries
+from project.workload import rebuild_workloads
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+MAX_REPORTED_ERRORS = 100
+
+
+class TaskImportError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def get_import_format(filename, import_format=None):
+    import_format = (import_format or os.path.splitext(filename or '')[1].lstrip('.')).lower()
+    if import_format == 'json':
+        import_format = 'jsonl'
+    if import_format not in IMPORT_FORMATS:
+        raise TaskImportError({'format': f'Use one of: {", ".join(IMPORT_FORMATS)}.'})
+    return import_format
+
+
+def iter_task_rows(file, import_format):
+    """
+    Yields the rows of a binary CSV or JSON lines file one at a time, so
+    only the current line is held in memory. In CSV files empty cells are
+    left out and tags are separated by commas.
+    """
+    if import_format == 'csv':
+        for row in csv.DictReader(codecs.iterdecode(file, 'utf-8-sig')):
+            row = {key: value for key, value in row.items() if key and value not in ('', None)}
+            if 'tags' in row:
+                row['tags'] = [name.strip() for name in row['tags'].split(',') if name.strip()]
+            yield row
+        return
+
+    for line in codecs.iterdecode(file, 'utf-8-sig'):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            # the serializer reports it as an invalid row
+            yield None
+
+
+def iter_chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_tasks(project, file, import_format, user=None, batch_size=500):
+    """
+    Imports tasks into a project from a CSV or JSON lines file, reading and
+    validating it a batch at a time and inserting each batch with one
+    bulk_create for the tasks and one for their tags. Each batch is logged
+    as a single imported_tasks activity. The whole file is imported in one
+    transaction: if any row is invalid, nothing is imported and
+    TaskImportError lists the errors by row number.
+    """
+    errors = {}
+    created = 0
+    batches = 0
+    assignees = set()
+    with transaction.atomic():
+        row_number = 0
+        for chunk in iter_chunks(iter_task_rows(file, import_format), batch_size):
+            first_row = row_number + 1
+            row_number += len(chunk)
+            serializer = TaskImportSerializer(data=chunk, many=True)
+            chunk_errors = {} if serializer.is_valid() else dict(enumerate(serializer.errors))
+            for index, error in check_assignees(chunk).items():
+                if not chunk_errors.get(index):
+                    chunk_errors[index] = error
+            for index, error in chunk_errors.items():
+                if error and len(errors) < MAX_REPORTED_ERRORS:
+                    errors[first_row + index] = error
+            # keep reading after an error, to report every invalid row
+            if errors:
+                continue
+
+            tasks = create_tasks(project, serializer.validated_data, user)
+            assignees.update(task.assigned_to_id for task in tasks)
+            created += len(chunk)
+            batches += 1
+
+        if errors:
+            raise TaskImportError(errors)
+
+        # bulk_create skips the Task signals behind these
+        invalidate_project_summaries([project.pk])
+        recompute_project_progress([project])
+        schedule_project(project.pk)
+        rebuild_workloads(assignees)
+
+    return {'created': created, 'batches': batches}
+
+
+def check_assignees(rows):
+    """
+    Returns errors for the rows assigned to users that don't exist, checked
+    with one query for the whole batch.
+    """
+    user_ids = {}
+    for index, row in enumerate(rows):
+        try:
+            user_ids[index] = int(row['assigned_to'])
+        except (KeyError, TypeError, ValueError):
+            continue
+    existing = set(User.objects.filter(pk__in=set(user_ids.values())).values_list('pk', flat=True))
+    return {
+        index: {'assigned_to': [f'Invalid pk "{user_id}" - object does not exist.']}
+        for index, user_id in user_ids.items()
+        if user_id not in existing
+    }
+
+
+def create_tasks(project, validated_data, user=None):
+    tags_data = [data.pop('tags', []) for data in validated_data]
+    tasks = [Task(project=project, assigned_to_id=data.pop('assigned_to', None), **data) for data in validated_data]
+    # bulk_create skips rank_new_task, so each board column gets its ranks here
+    for status in {task.status for task in tasks}:
+        column = [task for task in tasks if task.status == status]
+        for task, rank in zip(column, get_ranks_between(get_last_rank(project.pk, status), '', len(column))):
+            task.rank = rank
+    tasks = Task.objects.bulk_create(tasks)
+
+    names = {name for tags in tags_data for name in tags}
+    if names:
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+        tags = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+        TaskTag = Task.tags.through
+        TaskTag.objects.bulk_create([
+            TaskTag(task_id=task.pk, tag_id=tags[name])
+            for task, task_tags in zip(tasks, tags_data)
+            for name in set(task_tags)
+        ])
+
+    record_activity(
+        user_id=user.pk if user else project.owner_id,
+        project=project,
+        activity_type='imported_tasks',
+        count=len(tasks),
+    )
+    return tasks
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from project.archive import archive_month, get_months_to_archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves activity older than the retention period out of the Activity '
+        'table, one month at a time, into gzipped JSON lines files that the '
+        'activity archive API reads back. Run it monthly to keep the table and '
+        'its indexes at a bounded size.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int, help='Whole months to keep; defaults to ACTIVITY_RETENTION_MONTHS.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        months = options['months'] if options['months'] is not None else getattr(settings, 'ACTIVITY_RETENTION_MONTHS', 12)
+        for month in get_months_to_archive(months):
+            if options['dry_run']:
+                self.stdout.write(f'Would archive {month:%Y-%m}.')
+                continue
+            archive = archive_month(month, batch_size=options['batch_size'])
+            if archive:
+                self.stdout.write(f'Archived {archive.rows} activities from {month:%Y-%m} to {archive.file.name}.')
@@ -0,0 +1,53 @@
+import time
+from contextlib import nullcontext
+
+from accounts.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from project.activity import buffer_activities, wait_for_activities
+from project.models import Activity, Project, Task
+
+
+class Command(BaseCommand):
+    help = (
+        'Saves the same tasks with each activity writing mode and reports how '
+        'many queries it took. The generated rows are deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username='benchmark', email='benchmark@example.com')
+        try:
+            project = Project.objects.create(title='Benchmark Project', description='', owner=user)
+            Task.objects.bulk_create([
+                Task(project=project, title=f'Task {i}', description='', due_date=timezone.now(), assigned_to=user)
+                for i in range(options['tasks'])
+            ])
+            tasks = list(Task.objects.filter(project=project))
+
+            for label, context, activity_settings in (
+                ('one insert per save', nullcontext, {'ACTIVITY_BUFFERING': False}),
+                ('buffered per request', buffer_activities, {}),
+                ('buffered per transaction', transaction.atomic, {}),
+                ('asynchronous', buffer_activities, {'ACTIVITY_ASYNC': True}),
+            ):
+                Activity.objects.filter(project=project).delete()
+                with override_settings(**activity_settings), CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    with context():
+                        for task in tasks:
+                            task.save()
+                    elapsed = time.perf_counter() - started
+                    wait_for_activities()
+
+                inserts = sum('INSERT INTO "project_activity"' in query['sql'] for query in queries)
+                self.stdout.write(
+                    f'{label}: {len(queries)} queries, {inserts} activity inserts, '
+                    f'{Activity.objects.filter(project=project).count()} activities, {elapsed * 1000:.0f} ms'
+                )
+        finally:
+            user.delete()
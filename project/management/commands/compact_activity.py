@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from project.activity import COLLAPSIBLE_TYPES, get_collapse_window
+from project.models import Activity
+
+
+class Command(BaseCommand):
+    help = (
+        'Collapses runs of updates by the same user on the same project or task, '
+        'each within the collapse window of the previous one, into the latest '
+        'activity of the run with the summed count. Catches what the writer '
+        'could not collapse, e.g. rows written before collapsing existed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, help='Seconds; defaults to ACTIVITY_COLLAPSE_WINDOW.')
+        parser.add_argument('--days', type=int, help='Only compact activity from the last N days.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        window = timezone.timedelta(seconds=options['window']) if options['window'] is not None else get_collapse_window()
+        activities = Activity.objects.filter(activity_type__in=COLLAPSIBLE_TYPES)
+        if options['days']:
+            activities = activities.filter(date_created__gte=timezone.now() - timezone.timedelta(days=options['days']))
+
+        self.updates = {}
+        self.deletes = []
+        self.deleted = 0
+        self.batch_size = options['batch_size']
+        # one user at a time, so rows are never read from a table that is
+        # being written to
+        for user_id in activities.order_by('user').values_list('user', flat=True).distinct():
+            rows = activities.filter(user=user_id).order_by('project', 'task', 'activity_type', 'date_created', 'id')
+            run = None
+            for pk, *key, date_created, count in rows.values_list(
+                'id', 'project_id', 'task_id', 'activity_type', 'date_created', 'count'
+            ):
+                if run and run['key'] == key and date_created - run['date_created'] <= window:
+                    # the latest row of a run survives and carries its count
+                    self.deletes.append(run['pk'])
+                    run.update(pk=pk, date_created=date_created, count=run['count'] + count, collapsed=True)
+                else:
+                    self.close_run(run)
+                    run = {'pk': pk, 'key': key, 'date_created': date_created, 'count': count, 'collapsed': False}
+            self.close_run(run)
+        self.write_batch()
+
+        self.stdout.write(f'Collapsed {self.deleted} activities.')
+
+    def close_run(self, run):
+        if run and run['collapsed']:
+            self.updates[run['pk']] = run['count']
+        if len(self.deletes) >= self.batch_size:
+            self.write_batch()
+
+    def write_batch(self):
+        with transaction.atomic():
+            Activity.objects.bulk_update(
+                [Activity(pk=pk, count=count) for pk, count in self.updates.items()], ['count'], batch_size=self.batch_size
+            )
+            self.deleted += Activity.objects.filter(pk__in=self.deletes).delete()[0]
+        self.updates = {}
+        self.deletes = []
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from project.importer import TaskImportError, get_import_format, import_tasks
+from project.models import Project
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports tasks into a project from a CSV or JSON lines file, in the '
+        'format accepted by the tasks API. The file is streamed and inserted in '
+        'batches, in one transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('project', type=int)
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'])
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        project = Project.objects.filter(pk=options['project']).first()
+        if project is None:
+            raise CommandError(f'Project {options["project"]} does not exist.')
+
+        try:
+            import_format = get_import_format(options['path'], options['format'])
+            with open(options['path'], 'rb') as f:
+                result = import_tasks(project, f, import_format, batch_size=options['batch_size'])
+        except TaskImportError as e:
+            raise CommandError(f'Invalid tasks, nothing was imported: {e.errors}')
+
+        self.stdout.write(f'Imported {result["created"]} tasks in {result["batches"]} batches.')
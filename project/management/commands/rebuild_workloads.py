@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from project.workload import rebuild_workloads
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the weekly workload of every user, or of the given ones, from '
+        'their open tasks. Run it after deploying the workload table, or after '
+        'bulk task updates that skip signals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users', help='Limit to these user ids.')
+
+    def handle(self, *args, **options):
+        rows = rebuild_workloads(options['users'])
+        self.stdout.write(f'Rebuilt {rows} workload weeks.')
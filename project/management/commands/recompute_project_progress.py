@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from project.models import Project
+from project.progress import recompute_project_progress
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes Project.progress from the weighted progress of its tasks, '
+        'in batches. Run it after deploying the rollup, after changing '
+        'PROJECT_PROGRESS_WEIGHT, or after bulk task updates that skip signals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='projects', help='Limit to these project ids.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        projects = Project.objects.all()
+        if options['projects']:
+            projects = projects.filter(pk__in=options['projects'])
+
+        batch_size = options['batch_size']
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(projects.filter(pk__gt=last_pk).order_by('pk').only('pk')[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            updated += recompute_project_progress(batch)
+
+        self.stdout.write(f'Recomputed progress for {updated} projects.')
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from project.models import Project
+from project.scheduling import DependencyCycleError, schedule_project
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the dependency schedule of the tasks of every project, or '
+        'of the given ones. Run it after deploying the scheduler, after '
+        'changing TASK_HOURS_PER_DAY, or after bulk task updates that skip signals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='projects', help='Limit to these project ids.')
+
+    def handle(self, *args, **options):
+        projects = Project.objects.order_by('pk')
+        if options['projects']:
+            projects = projects.filter(pk__in=options['projects'])
+
+        updated = 0
+        for project_id in projects.values_list('pk', flat=True).iterator():
+            try:
+                updated += schedule_project(project_id)
+            except DependencyCycleError as e:
+                raise CommandError(str(e))
+
+        self.stdout.write(f'Updated the schedule of {updated} tasks.')
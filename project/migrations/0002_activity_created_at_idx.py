@@ -0,0 +1,18 @@
+# Generated by Django 4.1.7 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("project", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="activity",
+            index=models.Index(
+                fields=["-created_at", "-id"], name="activity_created_at_idx"
+            ),
+        ),
+    ]
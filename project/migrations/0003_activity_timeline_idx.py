@@ -0,0 +1,26 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("project", "0002_activity_created_at_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="activity",
+            index=models.Index(
+                fields=["user", "-date_created", "-id"],
+                name="activity_user_timeline_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="activity",
+            index=models.Index(
+                fields=["project", "-date_created", "-id"],
+                name="activity_project_timeline_idx",
+            ),
+        ),
+    ]
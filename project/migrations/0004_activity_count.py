@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("project", "0003_activity_timeline_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="activity",
+            name="count",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
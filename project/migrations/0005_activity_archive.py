@@ -0,0 +1,37 @@
+# Generated by Django 4.1.7 on 2026-10-18 09:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("project", "0004_activity_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ActivityArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("month", models.DateField()),
+                ("file", models.FileField(upload_to="activity_archives/")),
+                ("rows", models.PositiveIntegerField(default=0)),
+                ("size", models.PositiveBigIntegerField(default=0)),
+                ("first_id", models.BigIntegerField(blank=True, null=True)),
+                ("last_id", models.BigIntegerField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ("-month", "-id"),
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.1.7 on 2026-10-18 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("project", "0005_activity_archive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="progress_points",
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="progress_weight",
+            field=models.FloatField(default=0, editable=False),
+        ),
+    ]
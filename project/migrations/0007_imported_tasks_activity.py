@@ -0,0 +1,28 @@
+# Generated by Django 4.1.7 on 2026-10-18 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("project", "0006_project_progress_rollup"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="activity",
+            name="activity_type",
+            field=models.CharField(
+                choices=[
+                    ("created_project", "Created a new project"),
+                    ("updated_project", "Updated a project"),
+                    ("deleted_project", "Deleted a project"),
+                    ("created_task", "Created a new task"),
+                    ("updated_task", "Updated a task"),
+                    ("deleted_task", "Deleted a task"),
+                    ("imported_tasks", "Imported tasks"),
+                ],
+                max_length=50,
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.1.7 on 2026-10-18 10:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("project", "0007_imported_tasks_activity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="earliest_finish",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="earliest_start",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="latest_finish",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="latest_start",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="slack",
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name="TaskDependency",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("lag", models.IntegerField(default=0)),
+                (
+                    "predecessor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="successor_links",
+                        to="project.task",
+                    ),
+                ),
+                (
+                    "successor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="predecessor_links",
+                        to="project.task",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="taskdependency",
+            constraint=models.UniqueConstraint(
+                fields=("predecessor", "successor"), name="unique_task_dependency"
+            ),
+        ),
+    ]
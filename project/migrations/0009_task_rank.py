@@ -0,0 +1,60 @@
+# Generated by Django 4.1.7 on 2026-10-18 10:18
+
+from itertools import groupby
+
+from django.db import migrations, models
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def spread_ranks(count):
+    # evenly spaced base 36 ranks of a fixed width, without trailing zeros
+    width = 1
+    while len(DIGITS) ** width <= count:
+        width += 1
+    ranks = []
+    for index in range(1, count + 1):
+        value = index * len(DIGITS) ** width // (count + 1)
+        digits = ""
+        for _ in range(width):
+            value, digit = divmod(value, len(DIGITS))
+            digits = DIGITS[digit] + digits
+        ranks.append(digits.rstrip("0"))
+    return ranks
+
+
+def populate_task_ranks(apps, schema_editor):
+    Task = apps.get_model("project", "Task")
+    tasks = Task.objects.order_by("project", "status", "id").only(
+        "id", "project", "status"
+    )
+    for _, column in groupby(
+        tasks.iterator(), lambda task: (task.project_id, task.status)
+    ):
+        column = list(column)
+        for task, rank in zip(column, spread_ranks(len(column))):
+            task.rank = rank
+        Task.objects.bulk_update(column, ["rank"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("project", "0008_task_dependencies"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="rank",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=64
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["project", "status", "rank"], name="task_board_idx"
+            ),
+        ),
+        migrations.RunPython(populate_task_ranks, migrations.RunPython.noop),
+    ]
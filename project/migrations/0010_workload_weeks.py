@@ -0,0 +1,46 @@
+# Generated by Django 4.1.7 on 2026-10-18 10:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("project", "0009_task_rank"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkloadWeek",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("week", models.DateField()),
+                ("hours", models.FloatField(default=0)),
+                ("task_count", models.IntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="workload_weeks",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="workloadweek",
+            constraint=models.UniqueConstraint(
+                fields=("week", "user"), name="unique_workload_week"
+            ),
+        ),
+    ]
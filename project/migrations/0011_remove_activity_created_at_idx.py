@@ -0,0 +1,16 @@
+# Generated by Django 4.1.7 on 2026-10-18 11:04
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("project", "0010_workload_weeks"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="activity",
+            name="activity_created_at_idx",
+        ),
+    ]
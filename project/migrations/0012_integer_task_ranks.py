@@ -0,0 +1,48 @@
+# Generated by Django 4.1.7 on 2026-10-18 12:02
+
+from itertools import groupby
+
+from django.db import migrations
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def spread_ranks(count):
+    # evenly spaced integer ranks, see project.ranking.get_ranks_between
+    width = 3
+    while len(DIGITS) ** width <= count:
+        width += 1
+    ranks = []
+    for index in range(1, count + 1):
+        value = index * len(DIGITS) ** width // (count + 1)
+        digits = ""
+        for _ in range(width):
+            value, digit = divmod(value, len(DIGITS))
+            digits = DIGITS[digit] + digits
+        ranks.append(DIGITS[width] + digits)
+    return ranks
+
+
+def rerank_tasks(apps, schema_editor):
+    # ranks without an integer part don't sort with the new ones
+    Task = apps.get_model("project", "Task")
+    tasks = Task.objects.order_by("project", "status", "rank", "id").only(
+        "id", "project", "status", "rank"
+    )
+    for _, column in groupby(
+        tasks.iterator(), lambda task: (task.project_id, task.status)
+    ):
+        column = list(column)
+        for task, rank in zip(column, spread_ranks(len(column))):
+            task.rank = rank
+        Task.objects.bulk_update(column, ["rank"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("project", "0011_remove_activity_created_at_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(rerank_tasks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.1.7 on 2026-10-18 11:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("project", "0012_integer_task_ranks"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="activityarchive",
+            name="month",
+            field=models.DateField(unique=True),
+        ),
+    ]
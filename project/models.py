@@ -24,7 +24,10 @@ class Project(models.Model):
     title = models.CharField(max_length=100)
     description = models.TextField()
     priority = models.IntegerField(default=1)
-    progress = models.IntegerField(default=0)
+    progress = models.IntegerField(default=0)  # weighted rollup of the tasks, see project.progress
+    # running sums of task weights and weight * progress behind progress
+    progress_weight = models.FloatField(default=0, editable=False)
+    progress_points = models.FloatField(default=0, editable=False)
     status = models.CharField(max_length=10, default='new', choices=STATUS_CHOICES)
     start_date = models.DateField(default=date.today)  # default=timezone.now().date)
     duration = models.PositiveIntegerField(default=12)  # duration in weeks
@@ -62,6 +65,56 @@ class Task(models.Model):
     assigned_to = models.ForeignKey(User, on_delete=models.CASCADE, related_name='assigned_tasks', null=True, blank=True)
     comments = models.TextField(null=True, blank=True)
     tags = models.ManyToManyField('Tag', blank=True)
+    # critical path schedule derived from the dependencies, see project.scheduling
+    earliest_start = models.DateField(null=True, blank=True, editable=False)
+    earliest_finish = models.DateField(null=True, blank=True, editable=False)
+    latest_start = models.DateField(null=True, blank=True, editable=False)
+    latest_finish = models.DateField(null=True, blank=True, editable=False)
+    slack = models.IntegerField(null=True, blank=True, editable=False)  # in days
+    # position in its board column, see project.ranking
+    rank = models.CharField(max_length=64, blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'status', 'rank'], name='task_board_idx'),
+        ]
+
+
+class TaskDependency(TrackingModel):
+    """
+    The successor can't start until the predecessor is finished, plus
+    ``lag`` days. Both tasks belong to the same project.
+    """
+    predecessor = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='successor_links')
+    successor = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='predecessor_links')
+    lag = models.IntegerField(default=0)  # in days
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['predecessor', 'successor'], name='unique_task_dependency'),
+        ]
+
+    def __str__(self):
+        return f"{self.predecessor_id} -> {self.successor_id}"
+
+
+class WorkloadWeek(models.Model):
+    """
+    The open tasks assigned to a user that are due in a week, kept up to
+    date from Task writes, see project.workload.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='workload_weeks')
+    week = models.DateField()  # the Monday
+    hours = models.FloatField(default=0)
+    task_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['week', 'user'], name='unique_workload_week'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.week}: {self.hours}h"
 
 
 class ProjectAttachment(models.Model):
@@ -89,6 +142,7 @@ class Activity(TrackingModel):
         ('created_task', 'Created a new task'),
         ('updated_task', 'Updated a task'),
         ('deleted_task', 'Deleted a task'),
+        ('imported_tasks', 'Imported tasks'),
     ]
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -96,9 +150,16 @@ class Activity(TrackingModel):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, null=True, blank=True)
     activity_type = models.CharField(max_length=50, choices=ACTIVITY_CHOICES)
     date_created = models.DateTimeField(default=timezone.now)
+    # repeats within ACTIVITY_COLLAPSE_WINDOW are folded into one row
+    count = models.PositiveIntegerField(default=1)
 
     class Meta:
         ordering = ('-date_created',)
+        indexes = [
+            # timelines, see ActivityViewSet.timeline
+            models.Index(fields=['user', '-date_created', '-id'], name='activity_user_timeline_idx'),
+            models.Index(fields=['project', '-date_created', '-id'], name='activity_project_timeline_idx'),
+        ]
 
     def __str__(self):
         if self.project:
@@ -106,4 +167,23 @@ class Activity(TrackingModel):
         elif self.task:
             return f"{self.user.first_name} {self.activity_type} '{self.task.title}'"
         else:
-            return f"{self.user.first_name} {self.activity_type}"
\ No newline at end of file
+            return f"{self.user.first_name} {self.activity_type}"
+
+
+class ActivityArchive(TrackingModel):
+    """
+    One month of activity moved out of the Activity table by the
+    archive_activity command, stored as gzipped JSON lines.
+    """
+    month = models.DateField(unique=True)
+    file = models.FileField(upload_to='activity_archives/')
+    rows = models.PositiveIntegerField(default=0)
+    size = models.PositiveBigIntegerField(default=0)
+    first_id = models.BigIntegerField(null=True, blank=True)
+    last_id = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ('-month', '-id')
+
+    def __str__(self):
+        return f"Activity archive {self.month:%Y-%m} ({self.rows} rows)"
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.db.models import (Case, F, FloatField, IntegerField, Sum, Value,
+                              When)
+from django.db.models.functions import Cast, Coalesce, Round
+from django.db.models.lookups import GreaterThan
+from project.models import Project, Task
+
+
+def get_weight_field():
+    # 'estimated_hours' or 'priority'
+    return getattr(settings, 'PROJECT_PROGRESS_WEIGHT', 'estimated_hours')
+
+
+def get_task_weight(task):
+    """
+    How much a task counts towards its project's progress. Tasks without a
+    positive weight count as 1, so they still move the needle.
+    """
+    weight = getattr(task, get_weight_field())
+    return float(weight) if weight and weight > 0 else 1.0
+
+
+def task_weight_expression():
+    field = get_weight_field()
+    return Case(
+        When(**{f'{field}__gt': 0}, then=Cast(field, FloatField())),
+        default=Value(1.0),
+        output_field=FloatField(),
+    )
+
+
+def get_progress_state(task):
+    """
+    The task's (project_id, weight, points) contribution, or None when a
+    deferred field leaves it unknown.
+    """
+    fields = ('project_id', 'progress', get_weight_field())
+    if any(field not in task.__dict__ for field in fields):
+        return None
+    weight = get_task_weight(task)
+    return task.project_id, weight, weight * (task.progress or 0)
+
+
+def apply_progress_delta(project_id, weight, points):
+    """
+    Adds a task's change to the project's running sums and derives the new
+    progress in the same UPDATE, without reading the other tasks.
+    """
+    if not project_id or (not weight and not points):
+        return
+    total_weight = F('progress_weight') + weight
+    Project.objects.filter(pk=project_id).update(
+        progress_weight=total_weight,
+        progress_points=F('progress_points') + points,
+        progress=Case(
+            When(
+                GreaterThan(total_weight, 0.000001),
+                then=Cast(Round((F('progress_points') + points) / total_weight), IntegerField()),
+            ),
+            default=Value(0),
+        ),
+    )
+
+
+def update_project_progress(previous, current):
+    """
+    Moves a task's contribution from its previous state to its current one;
+    either may be None for a created or deleted task.
+    """
+    if previous and current and previous[0] == current[0]:
+        apply_progress_delta(current[0], current[1] - previous[1], current[2] - previous[2])
+        return
+    if previous:
+        apply_progress_delta(previous[0], -previous[1], -previous[2])
+    if current:
+        apply_progress_delta(current[0], current[1], current[2])
+
+
+def recompute_project_progress(projects):
+    """
+    Recomputes the running sums and progress of the given projects from
+    their tasks with one GROUP BY query. Returns the number of projects.
+    """
+    projects = list(projects)
+    weight = task_weight_expression()
+    totals = {
+        row['project']: row
+        for row in Task.objects.filter(project__in=projects).order_by().values('project').annotate(
+            weight=Sum(weight), points=Sum(weight * Coalesce('progress', 0))
+        )
+    }
+    for project in projects:
+        row = totals.get(project.pk)
+        project.progress_weight = row['weight'] if row else 0
+        project.progress_points = row['points'] if row else 0
+        project.progress = round(project.progress_points / project.progress_weight) if project.progress_weight else 0
+    Project.objects.bulk_update(projects, ['progress_weight', 'progress_points', 'progress'])
+    return len(projects)
@@ -0,0 +1,190 @@
+from django.conf import settings
+from django.db import transaction
+from helpers.tasks import enqueue
+from project.models import Task
+
+# ranks are base 36 keys compared as strings, so ordering a column is an
+# ORDER BY rank and moving a card only rewrites that card's rank. A rank is
+# an integer part, whose first digit is the number of digits after it, then
+# a fraction; the integer part '0' has no digits and always a fraction.
+RANK_DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(RANK_DIGITS)
+# columns start out this wide, leaving both ends room for thousands of cards
+RANK_WIDTH = 3
+
+
+def encode_integer(value, width):
+    digits = ''
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits = RANK_DIGITS[digit] + digits
+    return RANK_DIGITS[width] + digits
+
+
+def split_rank(rank):
+    width = RANK_DIGITS.index(rank[0])
+    return rank[:width + 1], rank[width + 1:]
+
+
+def get_next_integer(integer):
+    # a wider integer sorts after every narrower one
+    width = RANK_DIGITS.index(integer[0])
+    value = int(integer[1:] or '0', BASE) + 1
+    if value < BASE ** width:
+        return encode_integer(value, width)
+    return encode_integer(0, width + 1)
+
+
+def get_previous_integer(integer):
+    width = RANK_DIGITS.index(integer[0])
+    value = int(integer[1:] or '0', BASE) - 1
+    if value >= 0:
+        return encode_integer(value, width)
+    if width > 1:
+        return encode_integer(BASE ** (width - 1) - 1, width - 1)
+    return None
+
+
+def get_fraction_between(before, after):
+    """
+    Returns a fraction that sorts after ``before`` and before ``after``,
+    either of which can be empty. Fractions never end with a zero, so there
+    is always room for another one in between.
+    """
+    if after:
+        # keep the shared prefix and look for room after it
+        prefix = 0
+        while (before[prefix] if prefix < len(before) else '0') == after[prefix]:
+            prefix += 1
+        if prefix:
+            return after[:prefix] + get_fraction_between(before[prefix:], after[prefix:])
+
+    low = RANK_DIGITS.index(before[0]) if before else 0
+    high = RANK_DIGITS.index(after[0]) if after else BASE
+    if high - low > 1:
+        return RANK_DIGITS[(low + high + 1) // 2]
+    # adjacent digits: a shorter fraction fits below after, or go one digit deeper
+    if after and len(after) > 1:
+        return after[0]
+    return RANK_DIGITS[low] + get_fraction_between(before[1:], '')
+
+
+def get_rank_between(before, after):
+    """
+    Returns a rank that sorts after ``before`` and before ``after``. Either
+    can be empty for the start or the end of the column. Adding to either
+    end steps the integer part, which only gains a digit every power of 36;
+    the fraction takes the cards put between two neighbouring integers.
+    """
+    if not before and not after:
+        return encode_integer(BASE ** RANK_WIDTH // 2, RANK_WIDTH)
+    if not after:
+        return get_next_integer(split_rank(before)[0])
+
+    after_integer, after_fraction = split_rank(after)
+    if not before:
+        if after_integer == '0':
+            return '0' + get_fraction_between('', after_fraction)
+        if after_fraction:
+            return after_integer
+        return get_previous_integer(after_integer) or '0' + get_fraction_between('', '')
+
+    before_integer, before_fraction = split_rank(before)
+    if before_integer == after_integer:
+        return before_integer + get_fraction_between(before_fraction, after_fraction)
+    next_integer = get_next_integer(before_integer)
+    if next_integer < after:
+        return next_integer
+    return before_integer + get_fraction_between(before_fraction, '')
+
+
+def get_ranks_between(before, after, count):
+    """
+    Returns ``count`` increasing ranks between ``before`` and ``after``:
+    evenly spread over a whole column, stepped at its end, and spread out
+    by bisection between two cards so they stay short.
+    """
+    if count <= 0:
+        return []
+    if not before and not after:
+        width = RANK_WIDTH
+        while BASE ** width <= count:
+            width += 1
+        return [encode_integer(index * BASE ** width // (count + 1), width) for index in range(1, count + 1)]
+    if not after:
+        ranks = []
+        for _ in range(count):
+            before = get_rank_between(before, '')
+            ranks.append(before)
+        return ranks
+    middle = get_rank_between(before, after)
+    half = count // 2
+    return get_ranks_between(before, middle, half) + [middle] + get_ranks_between(middle, after, count - half - 1)
+
+
+def get_last_rank(project_id, status):
+    return Task.objects.filter(project=project_id, status=status).order_by('-rank').values_list('rank', flat=True).first() or ''
+
+
+def needs_rebalance(rank):
+    return len(rank) > getattr(settings, 'TASK_RANK_REBALANCE_LENGTH', 12)
+
+
+def rebalance_column(project_id, status):
+    """
+    Spreads the ranks of a board column out evenly again, keeping the order.
+    """
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.select_for_update().filter(project=project_id, status=status).order_by('rank', 'id').only('id', 'rank')
+        )
+        for task, rank in zip(tasks, get_ranks_between('', '', len(tasks))):
+            task.rank = rank
+        Task.objects.bulk_update(tasks, ['rank'], batch_size=500)
+    return len(tasks)
+
+
+def schedule_rebalance(project_id, status):
+    enqueue(rebalance_column, project_id, status)
+
+
+def get_neighbour_ranks(task, status, after=None, before=None):
+    """
+    The ranks the task has to go between: those of ``after`` and
+    ``before``, with the missing one read from the column, or the bottom of
+    the column when neither is given.
+    """
+    column = Task.objects.filter(project=task.project_id, status=status).exclude(pk=task.pk).order_by('rank')
+    if after is None and before is None:
+        return get_last_rank(task.project_id, status), ''
+    if before is None:
+        return after.rank, column.filter(rank__gt=after.rank).values_list('rank', flat=True).first() or ''
+    if after is None:
+        return column.filter(rank__lt=before.rank).reverse().values_list('rank', flat=True).first() or '', before.rank
+    return after.rank, before.rank
+
+
+def move_task(task, status, after=None, before=None):
+    """
+    Moves a task to a board column, between the ``after`` and ``before``
+    tasks or at the bottom, by saving a new rank on that one row. Columns
+    whose ranks grew too long are rebalanced in the background.
+    """
+    low, high = get_neighbour_ranks(task, status, after, before)
+    rank = get_rank_between(low, high) if not high or low < high else None
+    if rank is None or len(rank) > Task._meta.get_field('rank').max_length:
+        # only after concurrent moves, duplicate ranks or many moves into one
+        # gap before its rebalance ran: spread them out first
+        rebalance_column(task.project_id, status)
+        for neighbour in (after, before):
+            if neighbour is not None:
+                neighbour.refresh_from_db(fields=['rank'])
+        low, high = get_neighbour_ranks(task, status, after, before)
+        rank = get_rank_between(low, high)
+
+    task.status = status
+    task.rank = rank
+    task.save(update_fields=['status', 'rank'])
+    if needs_rebalance(task.rank):
+        schedule_rebalance(task.project_id, status)
+    return task
@@ -0,0 +1,232 @@
+import datetime
+import math
+import threading
+from collections import defaultdict, deque
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from project.models import Project, Task, TaskDependency
+
+SCHEDULE_FIELDS = ('earliest_start', 'earliest_finish', 'latest_start', 'latest_finish', 'slack')
+
+_local = threading.local()
+
+
+class DependencyCycleError(Exception):
+    pass
+
+
+def get_task_duration(estimated_hours):
+    """
+    A task's length in whole working days. Tasks without an estimate take
+    no time, like milestones.
+    """
+    if not estimated_hours or estimated_hours <= 0:
+        return 0
+    return math.ceil(float(estimated_hours) / getattr(settings, 'TASK_HOURS_PER_DAY', 8))
+
+
+class ProjectGraph:
+    """
+    The tasks of a project and their dependencies, loaded with two queries.
+    Dates are kept as day offsets from the project's start date.
+    """
+
+    def __init__(self, project_id):
+        self.project_id = project_id
+        self.start_date = Project.objects.filter(pk=project_id).values_list('start_date', flat=True).first()
+        self.tasks = {}
+        self.successors = defaultdict(list)
+        self.predecessors = defaultdict(list)
+        if self.start_date is None:
+            return
+
+        for row in Task.objects.filter(project=project_id).values('id', 'estimated_hours', *SCHEDULE_FIELDS):
+            row['duration'] = get_task_duration(row['estimated_hours'])
+            row['saved'] = {field: row[field] for field in SCHEDULE_FIELDS}
+            for field in SCHEDULE_FIELDS[:4]:
+                row[field] = self.to_offset(row[field])
+            self.tasks[row['id']] = row
+
+        edges = TaskDependency.objects.filter(
+            predecessor__project=project_id, successor__project=project_id
+        ).values_list('predecessor_id', 'successor_id', 'lag')
+        for predecessor, successor, lag in edges:
+            self.successors[predecessor].append((successor, lag))
+            self.predecessors[successor].append((predecessor, lag))
+
+    def to_offset(self, value):
+        return None if value is None else (value - self.start_date).days
+
+    def to_date(self, offset):
+        return self.start_date + datetime.timedelta(days=offset)
+
+    def reachable(self, task_ids, links):
+        # tasks reachable from task_ids, following successors or predecessors
+        seen = {task_id for task_id in task_ids if task_id in self.tasks}
+        queue = deque(seen)
+        while queue:
+            for other, _ in links[queue.popleft()]:
+                if other not in seen:
+                    seen.add(other)
+                    queue.append(other)
+        return seen
+
+    def topological_order(self, task_ids=None):
+        """
+        Kahn's algorithm over the given tasks, or all of them, counting only
+        the dependencies between them. Raises DependencyCycleError if they
+        can't be ordered.
+        """
+        task_ids = set(self.tasks) if task_ids is None else task_ids
+        indegree = {task_id: 0 for task_id in task_ids}
+        for task_id in task_ids:
+            for successor, _ in self.successors[task_id]:
+                if successor in indegree:
+                    indegree[successor] += 1
+
+        queue = deque(sorted(task_id for task_id, degree in indegree.items() if not degree))
+        order = []
+        while queue:
+            task_id = queue.popleft()
+            order.append(task_id)
+            for successor, _ in self.successors[task_id]:
+                if successor in indegree:
+                    indegree[successor] -= 1
+                    if not indegree[successor]:
+                        queue.append(successor)
+        if len(order) != len(task_ids):
+            raise DependencyCycleError(f'The dependencies of project {self.project_id} form a cycle.')
+        return order
+
+    def forward_pass(self, order):
+        for task_id in order:
+            task = self.tasks[task_id]
+            task['earliest_start'] = max(
+                (self.tasks[predecessor]['earliest_finish'] + lag for predecessor, lag in self.predecessors[task_id]),
+                default=0,
+            )
+            task['earliest_finish'] = task['earliest_start'] + task['duration']
+
+    def backward_pass(self, order, finish):
+        for task_id in reversed(order):
+            task = self.tasks[task_id]
+            task['latest_finish'] = min(
+                (self.tasks[successor]['latest_start'] - lag for successor, lag in self.successors[task_id]),
+                default=finish,
+            )
+            task['latest_start'] = task['latest_finish'] - task['duration']
+
+    def get_finish(self):
+        return max((task['earliest_finish'] for task in self.tasks.values()), default=0)
+
+    def is_scheduled(self, task_ids, fields):
+        return all(self.tasks[task_id][field] is not None for task_id in task_ids for field in fields)
+
+    def save(self, task_ids):
+        """
+        Writes back the schedule of the given tasks with one bulk_update,
+        skipping the ones whose dates didn't change.
+        """
+        changed = []
+        for task_id in task_ids:
+            task = self.tasks[task_id]
+            values = {field: self.to_date(task[field]) for field in SCHEDULE_FIELDS[:4]}
+            values['slack'] = task['latest_start'] - task['earliest_start']
+            if values != task['saved']:
+                changed.append(Task(pk=task_id, **values))
+        Task.objects.bulk_update(changed, SCHEDULE_FIELDS, batch_size=500)
+        return len(changed)
+
+
+def schedule_project(project_id):
+    """
+    Computes the earliest and latest start and finish and the slack of every
+    task of a project with one forward and one backward pass over the
+    dependencies in topological order, O(tasks + dependencies). Returns the
+    number of tasks whose schedule changed.
+    """
+    graph = ProjectGraph(project_id)
+    if not graph.tasks:
+        return 0
+    order = graph.topological_order()
+    graph.forward_pass(order)
+    graph.backward_pass(order, graph.get_finish())
+    return graph.save(order)
+
+
+def reschedule_tasks(project_id, task_ids):
+    """
+    Updates the schedule after the duration or dependencies of some tasks
+    changed. Earliest dates are recomputed only downstream of those tasks
+    and latest dates only upstream of them, unless the project's finish
+    moved, which shifts every latest date. Falls back to schedule_project
+    while parts of the project were never scheduled.
+    """
+    graph = ProjectGraph(project_id)
+    task_ids = {task_id for task_id in task_ids if task_id in graph.tasks}
+    if not task_ids:
+        return 0
+
+    downstream = graph.reachable(task_ids, graph.successors)
+    upstream = graph.reachable(task_ids, graph.predecessors)
+    others = set(graph.tasks)
+    if not (
+        graph.is_scheduled(others - downstream, ('earliest_start', 'earliest_finish'))
+        and graph.is_scheduled(others - upstream, ('latest_start', 'latest_finish'))
+    ):
+        return schedule_project(project_id)
+
+    # every latest date was derived from the finish stored with them
+    previous_finish = max(
+        (task['latest_finish'] for task_id, task in graph.tasks.items() if task_id not in upstream), default=None
+    )
+    graph.forward_pass(graph.topological_order(downstream))
+    finish = graph.get_finish()
+    if previous_finish is not None and previous_finish != finish:
+        order = graph.topological_order()
+        graph.backward_pass(order, finish)
+        return graph.save(order)
+
+    graph.backward_pass(graph.topological_order(upstream), finish)
+    return graph.save(downstream | upstream)
+
+
+def schedule_project_on_commit(project_id):
+    """
+    Schedules a project once the transaction commits, only once however
+    many of its tasks were deleted in it.
+    """
+    if not hasattr(_local, 'pending_projects'):
+        _local.pending_projects = set()
+    _local.pending_projects.add(project_id)
+    # one callback per call, so a savepoint rollback can't drop them all
+    transaction.on_commit(partial(schedule_pending_project, project_id))
+
+
+def schedule_pending_project(project_id):
+    if project_id in _local.pending_projects:
+        _local.pending_projects.discard(project_id)
+        schedule_project(project_id)
+
+
+def creates_cycle(predecessor, successor, replacing=None):
+    """
+    Whether making ``successor`` depend on ``predecessor`` would close a
+    cycle, i.e. whether ``predecessor`` already depends on ``successor``.
+    ``replacing`` is a dependency being changed, left out of the check.
+    """
+    graph = ProjectGraph(predecessor.project_id)
+    if replacing is not None:
+        graph.successors[replacing.predecessor_id] = [
+            link for link in graph.successors[replacing.predecessor_id] if link[0] != replacing.successor_id
+        ]
+    return predecessor.pk == successor.pk or predecessor.pk in graph.reachable([successor.pk], graph.successors)
+
+
+def get_critical_path(project_id):
+    """
+    The tasks without slack, in the order they have to be done.
+    """
+    return Task.objects.filter(project=project_id, slack__lte=0).order_by('earliest_start', 'earliest_finish', 'id')
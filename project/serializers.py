@@ -1,5 +1,6 @@
 from accounts.models import User
 from project import models
+from project.scheduling import creates_cycle
 from rest_framework import serializers
 
 
@@ -17,12 +18,111 @@ class ProjectSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class ProjectSummaryQuerySerializer(serializers.Serializer):
+    ids = serializers.CharField()
+
+    def validate_ids(self, value):
+        try:
+            ids = [int(project_id) for project_id in value.split(',') if project_id.strip()]
+        except ValueError:
+            raise serializers.ValidationError('Pass project ids separated by commas.')
+        if not ids:
+            raise serializers.ValidationError('Pass at least one project id.')
+        if len(ids) > 100:
+            raise serializers.ValidationError('Pass at most 100 project ids.')
+        return ids
+
+
 class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Task
         fields = '__all__'
 
 
+class TaskImportSerializer(serializers.ModelSerializer):
+    # checked once per batch by the importer instead of once per row
+    assigned_to = serializers.IntegerField(required=False, allow_null=True)
+    tags = serializers.ListField(child=serializers.CharField(max_length=50), required=False)
+
+    class Meta:
+        model = models.Task
+        exclude = ['project']
+
+
+class TaskDependencySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.TaskDependency
+        fields = '__all__'
+
+    def validate(self, attrs):
+        predecessor = attrs.get('predecessor', getattr(self.instance, 'predecessor', None))
+        successor = attrs.get('successor', getattr(self.instance, 'successor', None))
+        if predecessor.project_id != successor.project_id:
+            raise serializers.ValidationError('Both tasks must belong to the same project.')
+        if creates_cycle(predecessor, successor, replacing=self.instance):
+            raise serializers.ValidationError('This dependency would create a cycle.')
+        return attrs
+
+
+class TaskScheduleSerializer(serializers.ModelSerializer):
+    is_critical = serializers.SerializerMethodField()
+
+    class Meta:
+        model = models.Task
+        fields = [
+            'id', 'title', 'estimated_hours', 'earliest_start', 'earliest_finish',
+            'latest_start', 'latest_finish', 'slack', 'is_critical',
+        ]
+
+    def get_is_critical(self, obj):
+        return obj.slack is not None and obj.slack <= 0
+
+
+class TaskBoardSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.Task
+        fields = ['id', 'title', 'status', 'rank', 'priority', 'progress', 'due_date', 'assigned_to']
+
+
+class TaskMoveSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=models.STATUS_CHOICES, required=False)
+    # the cards the task ends up between; neither puts it at the bottom
+    after = serializers.PrimaryKeyRelatedField(queryset=models.Task.objects.only('id', 'project', 'status', 'rank'), required=False, allow_null=True)
+    before = serializers.PrimaryKeyRelatedField(queryset=models.Task.objects.only('id', 'project', 'status', 'rank'), required=False, allow_null=True)
+
+    def validate(self, attrs):
+        task = self.context['task']
+        attrs.setdefault('status', task.status)
+        for field in ('after', 'before'):
+            other = attrs.get(field)
+            if other is None:
+                continue
+            if other.pk == task.pk:
+                raise serializers.ValidationError({field: 'A task can\'t be moved next to itself.'})
+            if other.project_id != task.project_id or other.status != attrs['status']:
+                raise serializers.ValidationError({field: 'Pick a task in the same project and column.'})
+        return attrs
+
+
+class WorkloadWeekSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.WorkloadWeek
+        fields = '__all__'
+
+
+class AssigneeSuggestionQuerySerializer(serializers.Serializer):
+    skills = serializers.CharField(required=False)
+    hours = serializers.FloatField(required=False, default=0, min_value=0)
+    week = serializers.DateField(required=False)  # any day of the week, this week by default
+    limit = serializers.IntegerField(required=False, default=10, min_value=1, max_value=50)
+
+    def validate_skills(self, value):
+        try:
+            return [int(skill_id) for skill_id in value.split(',') if skill_id.strip()]
+        except ValueError:
+            raise serializers.ValidationError('Pass tech skill ids separated by commas.')
+
+
 class ProjectAttachmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.ProjectAttachment
@@ -38,4 +138,26 @@ class TagSerializer(serializers.ModelSerializer):
 class ActivitySerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Activity
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class ActivityTimelineSerializer(serializers.ModelSerializer):
+    user_name = serializers.SerializerMethodField()
+    project_title = serializers.CharField(source='project.title', default=None, read_only=True)
+    task_title = serializers.CharField(source='task.title', default=None, read_only=True)
+
+    class Meta:
+        model = models.Activity
+        fields = [
+            'id', 'activity_type', 'date_created', 'count', 'user', 'user_name',
+            'project', 'project_title', 'task', 'task_title',
+        ]
+
+    def get_user_name(self, obj):
+        return f'{obj.user.first_name} {obj.user.last_name}'.strip() or obj.user.username
+
+
+class ActivityArchiveSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.ActivityArchive
+        fields = ['id', 'month', 'rows', 'size', 'first_id', 'last_id', 'created_at']
@@ -1,38 +1,182 @@
-from django.db.models.signals import post_save
+from django.db.models import Q
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_save)
 from django.dispatch import receiver
-from project.models import Activity, Project, Task
+from project.activity import record_activity
+from project.models import Project, Task, TaskDependency
+from project.progress import (get_progress_state, recompute_project_progress,
+                              update_project_progress)
+from project.ranking import (get_last_rank, get_rank_between, needs_rebalance,
+                             schedule_rebalance)
+from project.scheduling import (get_task_duration, reschedule_tasks,
+                                schedule_project, schedule_project_on_commit)
+from project.summaries import invalidate_project_summaries
+from project.workload import (NO_WORKLOAD, get_workload_state,
+                              rebuild_workloads, update_workload)
 
 
 @receiver(post_save, sender=Project)
 @receiver(post_save, sender=Task)
 def create_activity(sender, instance, created, **kwargs):
+    # activities are buffered and written in batches, see project.activity
     if isinstance(instance, Project):
-        if created:
-            Activity.objects.create(
-                user=instance.owner,
-                project=instance, 
-                task=instance if isinstance(instance, Task) else None,
-                activity_type='created_task'
-            )
-        else:
-            Activity.objects.create(
-                user=instance.owner,
-                project=instance, 
-                task=instance if isinstance(instance, Task) else None,
-                activity_type='updated_task'
-            )
+        record_activity(
+            user_id=instance.owner_id,
+            project=instance,
+            activity_type='created_project' if created else 'updated_project'
+        )
     if isinstance(instance, Task):
-        if created:
-            Activity.objects.create(
-                user=instance.assigned_to,
-                project=instance.project, 
-                task=instance if isinstance(instance, Task) else None,
-                activity_type='created_task'
-            )
-        else:
-            Activity.objects.create(
-                user=instance.assigned_to,
-                project=instance.project, 
-                task=instance if isinstance(instance, Task) else None,
-                activity_type='updated_task'
-            )
+        record_activity(
+            # unassigned tasks are logged against the project owner
+            user_id=instance.assigned_to_id or instance.project.owner_id,
+            project_id=instance.project_id,
+            task=instance,
+            activity_type='created_task' if created else 'updated_task'
+        )
+
+
+def get_board_column(task):
+    if 'project_id' in task.__dict__ and 'status' in task.__dict__:
+        return task.project_id, task.status
+    return None
+
+
+@receiver(pre_save, sender=Task)
+def rank_task(sender, instance, update_fields=None, **kwargs):
+    if 'rank' not in instance.__dict__ or (update_fields is not None and 'rank' not in update_fields):
+        return
+    # new cards, and cards put in another column without a rank for it, go
+    # to the bottom of their board column
+    column = get_board_column(instance)
+    moved = instance._loaded_column not in (None, column) and instance.rank == instance._loaded_rank
+    if not instance.rank or moved:
+        instance.rank = get_rank_between(get_last_rank(instance.project_id, instance.status), '')
+        if needs_rebalance(instance.rank):
+            schedule_rebalance(instance.project_id, instance.status)
+
+
+@receiver(post_save, sender=Task)
+def remember_task_column(sender, instance, **kwargs):
+    instance._loaded_column = get_board_column(instance)
+    instance._loaded_rank = instance.__dict__.get('rank')
+
+
+@receiver(post_init, sender=Task)
+def remember_task_project(sender, instance, **kwargs):
+    instance._loaded_project_id = instance.__dict__.get('project_id')
+    # tasks being created don't count towards progress yet
+    instance._loaded_progress = get_progress_state(instance) if instance.pk else None
+    instance._loaded_workload = get_workload_state(instance) if instance.pk else NO_WORKLOAD
+    instance._loaded_assignee_id = instance.__dict__.get('assigned_to_id')
+    instance._loaded_column = get_board_column(instance)
+    instance._loaded_rank = instance.__dict__.get('rank')
+    # None while deferred, so the task is rescheduled on save
+    instance._loaded_duration = (
+        get_task_duration(instance.estimated_hours) if 'estimated_hours' in instance.__dict__ else None
+    )
+
+
+@receiver(post_save, sender=Task)
+def update_progress_on_save(sender, instance, created, **kwargs):
+    previous = None if created else instance._loaded_progress
+    current = get_progress_state(instance)
+    if current is None or (previous is None and not created):
+        # a deferred field hides the change, so count the projects again
+        recompute_project_progress(Project.objects.filter(pk__in={instance.project_id, instance._loaded_project_id}))
+    else:
+        update_project_progress(previous, current)
+    instance._loaded_progress = current
+
+
+@receiver(post_delete, sender=Task)
+def update_progress_on_delete(sender, instance, **kwargs):
+    if instance._loaded_progress is None:
+        recompute_project_progress(Project.objects.filter(pk=instance._loaded_project_id))
+    else:
+        update_project_progress(instance._loaded_progress, None)
+
+
+@receiver(post_save, sender=Task)
+def update_workload_on_save(sender, instance, created, **kwargs):
+    previous = NO_WORKLOAD if created else instance._loaded_workload
+    current = get_workload_state(instance)
+    if current is None or previous is None:
+        # a deferred field hides the change; deferred fields aren't saved, so
+        # a deferred assignee is still the same one
+        rebuild_workloads({instance._loaded_assignee_id, instance.assigned_to_id})
+    else:
+        update_workload(previous, current)
+    instance._loaded_workload = current
+    instance._loaded_assignee_id = instance.assigned_to_id
+
+
+@receiver(post_delete, sender=Task)
+def update_workload_on_delete(sender, instance, **kwargs):
+    if instance._loaded_workload is None:
+        rebuild_workloads({instance._loaded_assignee_id})
+    else:
+        update_workload(instance._loaded_workload, NO_WORKLOAD)
+
+
+@receiver(post_save, sender=Task)
+def reschedule_on_save(sender, instance, created, **kwargs):
+    if instance._loaded_project_id != instance.project_id and not created:
+        # dependencies only link tasks of the same project
+        TaskDependency.objects.filter(Q(predecessor=instance) | Q(successor=instance)).delete()
+        schedule_project(instance._loaded_project_id)
+        schedule_project(instance.project_id)
+    elif created or instance._loaded_duration != get_task_duration(instance.estimated_hours):
+        reschedule_tasks(instance.project_id, [instance.pk])
+    instance._loaded_duration = get_task_duration(instance.estimated_hours)
+
+
+def get_delete_origin(origin):
+    # the model whose delete() cascaded here, from an instance or a queryset
+    return getattr(origin, 'model', type(origin))
+
+
+@receiver(post_delete, sender=Task)
+def reschedule_on_delete(sender, instance, origin=None, **kwargs):
+    # the whole project is going away
+    if get_delete_origin(origin) is not Project:
+        # once for all the tasks a queryset delete removes
+        schedule_project_on_commit(instance._loaded_project_id)
+
+
+@receiver(post_init, sender=TaskDependency)
+def remember_dependency_tasks(sender, instance, **kwargs):
+    instance._loaded_tasks = [instance.__dict__.get('predecessor_id'), instance.__dict__.get('successor_id')]
+
+
+@receiver(post_save, sender=TaskDependency)
+@receiver(post_delete, sender=TaskDependency)
+def reschedule_dependency(sender, instance, origin=None, **kwargs):
+    # a deleted task reschedules its project once, see reschedule_on_delete
+    if get_delete_origin(origin) in (TaskDependency, type(None)):
+        # both the tasks it linked before and after an update
+        reschedule_tasks(
+            instance.successor.project_id,
+            {instance.predecessor_id, instance.successor_id, *instance._loaded_tasks},
+        )
+        instance._loaded_tasks = [instance.predecessor_id, instance.successor_id]
+
+
+@receiver(post_init, sender=Project)
+def remember_project_start(sender, instance, **kwargs):
+    instance._loaded_start_date = instance.__dict__.get('start_date')
+
+
+@receiver(post_save, sender=Project)
+def reschedule_on_start_change(sender, instance, created, **kwargs):
+    # the schedule is stored as dates counted from the start date
+    if not created and instance._loaded_start_date != instance.start_date:
+        schedule_project(instance.pk)
+    instance._loaded_start_date = instance.start_date
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_project_summary(sender, instance, **kwargs):
+    # a task moved to another project changes both summaries
+    invalidate_project_summaries([instance.project_id, instance._loaded_project_id])
+    instance._loaded_project_id = instance.project_id
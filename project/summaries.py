@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+from project.models import STATUS_CHOICES, Task
+
+
+def get_summary_cache():
+    return caches[getattr(settings, 'PROJECT_SUMMARY_CACHE', 'default')]
+
+
+def get_summary_cache_key(project_id, today=None):
+    # overdue counts depend on the day, so each day gets its own entry
+    today = today or timezone.localdate()
+    return f'project-summary:{project_id}:{today.isoformat()}'
+
+
+def get_project_summaries(project_ids):
+    """
+    Returns {project_id: summary} for the given projects. Cached summaries
+    are reused and the others are computed together in one GROUP BY query.
+    """
+    project_ids = list(dict.fromkeys(project_ids))
+    today = timezone.localdate()
+    cache = get_summary_cache()
+    keys = {get_summary_cache_key(project_id, today): project_id for project_id in project_ids}
+    summaries = {keys[key]: summary for key, summary in cache.get_many(keys).items()}
+
+    missing = [project_id for project_id in project_ids if project_id not in summaries]
+    if missing:
+        computed = compute_project_summaries(missing, today)
+        cache.set_many(
+            {get_summary_cache_key(project_id, today): computed[project_id] for project_id in missing},
+            getattr(settings, 'PROJECT_SUMMARY_CACHE_TIMEOUT', 300),
+        )
+        summaries.update(computed)
+    return {project_id: summaries[project_id] for project_id in project_ids}
+
+
+def compute_project_summaries(project_ids, today=None):
+    today = today or timezone.localdate()
+    status_counts = {
+        f'{status}_tasks': Count('id', filter=Q(status=status)) for status, _ in STATUS_CHOICES
+    }
+    rows = Task.objects.filter(project__in=project_ids).order_by().values('project').annotate(
+        task_count=Count('id'),
+        overdue_tasks=Count('id', filter=Q(due_date__lt=today) & ~Q(status='completed')),
+        estimated_hours=Sum('estimated_hours'),
+        actual_hours=Sum('actual_hours'),
+        average_progress=Avg('progress'),
+        **status_counts,
+    )
+
+    summaries = {project_id: empty_summary(project_id) for project_id in project_ids}
+    for row in rows:
+        summary = summaries[row['project']]
+        summary.update({
+            'task_count': row['task_count'],
+            'tasks_by_status': {status: row[f'{status}_tasks'] for status, _ in STATUS_CHOICES},
+            'overdue_tasks': row['overdue_tasks'],
+            'estimated_hours': row['estimated_hours'] or 0,
+            'actual_hours': row['actual_hours'] or 0,
+            'average_progress': round(row['average_progress'] or 0, 2),
+        })
+    return summaries
+
+
+def empty_summary(project_id):
+    return {
+        'project': project_id,
+        'task_count': 0,
+        'tasks_by_status': {status: 0 for status, _ in STATUS_CHOICES},
+        'overdue_tasks': 0,
+        'estimated_hours': 0,
+        'actual_hours': 0,
+        'average_progress': 0,
+    }
+
+
+def invalidate_project_summaries(project_ids):
+    """
+    Drops today's cached summaries of the projects, now and again once the
+    transaction commits, so a summary computed from uncommitted rows in the
+    meantime doesn't stick.
+    """
+    keys = [get_summary_cache_key(project_id) for project_id in set(project_ids) if project_id]
+    if not keys:
+        return
+    cache = get_summary_cache()
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
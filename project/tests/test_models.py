@@ -1,8 +1,22 @@
+import queue
+from io import StringIO
+from unittest import mock
+
 from accounts.models import User
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Q
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from membership.models import Client, Instructor, Student
-from project.models import Project, ProjectAttachment, Tag, Task, TechSkill
+from project import activity
+from project.models import (Activity, Project, ProjectAttachment, Tag, Task,
+                            TaskDependency, TechSkill, WorkloadWeek)
+from project.ranking import (get_rank_between, get_ranks_between, move_task,
+                             rebalance_column)
+from project.scheduling import reschedule_tasks, schedule_project
+from project.workload import get_week
 from rest_framework.test import APITestCase
 
 
@@ -120,3 +134,485 @@ class TagModelTestCase(APITestCaseSetUp):
     def test_tag_model(self):
         self.assertEqual(self.tag.name, "Web Development")
         self.assertTrue(isinstance(self.tag, Tag))
+
+
+class ActivityWriterTestCase(APITestCaseSetUp):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            super().setUp()
+
+    def count_activity_inserts(self, queries):
+        return sum('INSERT INTO "project_activity"' in query['sql'] for query in queries)
+
+    def test_activities_are_written_once_per_transaction(self):
+        Activity.objects.all().delete()
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(20):
+                    Task.objects.create(project=self.project, title=f'Task {i}', description='', due_date=timezone.now())
+                self.assertEqual(Activity.objects.count(), 0)
+
+        self.assertEqual(self.count_activity_inserts(queries), 1)
+        self.assertEqual(Activity.objects.filter(activity_type='created_task').count(), 20)
+        # unassigned tasks are logged against the project owner
+        self.assertEqual(set(Activity.objects.values_list('user', flat=True)), {self.admin_user.pk})
+
+    def test_rolled_back_changes_leave_no_activity(self):
+        Activity.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.task.save()
+                    raise ValueError
+            except ValueError:
+                pass
+            self.project.save()
+
+        self.assertEqual(list(Activity.objects.values_list('activity_type', flat=True)), ['updated_project'])
+
+    def test_buffer_activities_writes_one_batch(self):
+        Activity.objects.all().delete()
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                with activity.buffer_activities() as buffer:
+                    self.task.save()
+                    self.project.save()
+                    self.task.save()
+                    # they wait for the transaction
+                    self.assertEqual(buffer.activities, [])
+
+        self.assertEqual(self.count_activity_inserts(queries), 1)
+        self.assertEqual(
+            sorted(Activity.objects.values_list('activity_type', 'count')), [('updated_project', 1), ('updated_task', 2)]
+        )
+
+    def test_rolled_back_changes_leave_no_buffered_activity(self):
+        Activity.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            with activity.buffer_activities():
+                try:
+                    with transaction.atomic():
+                        Task.objects.create(project=self.project, title='Task 2', description='', due_date=timezone.now())
+                        self.task.save()
+                        raise ValueError
+                except ValueError:
+                    pass
+                self.project.save()
+                with transaction.atomic():
+                    self.task.save()
+
+        self.assertEqual(
+            sorted(Activity.objects.values_list('activity_type', flat=True)), ['updated_project', 'updated_task']
+        )
+
+    def test_full_queue_falls_back_to_writing_in_place(self):
+        Activity.objects.all().delete()
+        activity_queue = queue.Queue(maxsize=2)
+        activities = [
+            Activity(user=self.admin_user, project=self.project, activity_type='created_project') for _ in range(5)
+        ]
+        with mock.patch.object(activity, 'get_queue', return_value=activity_queue):
+            activity.enqueue_activities(activities)
+
+        self.assertEqual(activity_queue.qsize(), 2)
+        self.assertEqual(Activity.objects.count(), 3)
+
+    def test_repeated_updates_are_collapsed(self):
+        Activity.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                self.task.save()
+            self.project.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.save()
+
+        task_activity = Activity.objects.get(activity_type='updated_task')
+        self.assertEqual(task_activity.count, 4)
+        self.assertEqual(Activity.objects.get(activity_type='updated_project').count, 1)
+
+        Activity.objects.filter(pk=task_activity.pk).update(date_created=timezone.now() - timezone.timedelta(hours=1))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.save()
+        self.assertEqual(list(Activity.objects.filter(activity_type='updated_task').values_list('count', flat=True)), [1, 4])
+
+    def test_compact_activity_command(self):
+        Activity.objects.all().delete()
+        now = timezone.now()
+        Activity.objects.bulk_create([
+            Activity(
+                user=self.student_user,
+                project=self.project,
+                task=self.task,
+                activity_type='updated_task',
+                date_created=now - timezone.timedelta(minutes=minutes),
+            )
+            for minutes in (90, 4, 3, 2, 1, 0)
+        ] + [
+            Activity(user=self.admin_user, project=self.project, task=self.task, activity_type='updated_task', date_created=now),
+            Activity(user=self.student_user, project=self.project, task=self.task, activity_type='created_task', date_created=now),
+        ])
+
+        call_command('compact_activity', stdout=StringIO())
+
+        self.assertEqual(
+            sorted(Activity.objects.values_list('user', 'activity_type', 'count')),
+            sorted([
+                (self.student_user.pk, 'updated_task', 1),
+                (self.student_user.pk, 'updated_task', 5),
+                (self.admin_user.pk, 'updated_task', 1),
+                (self.student_user.pk, 'created_task', 1),
+            ]),
+        )
+        self.assertEqual(Activity.objects.get(user=self.student_user, count=5).date_created, now)
+
+
+class ProjectProgressTestCase(APITestCaseSetUp):
+    def get_progress(self, project=None):
+        project = project or self.project
+        project.refresh_from_db()
+        return project.progress
+
+    def test_progress_follows_task_changes(self):
+        self.assertEqual(self.get_progress(), 0)
+
+        task = Task.objects.create(project=self.project, title='Task 2', description='', due_date=timezone.now(), estimated_hours=30, progress=100)
+        # (1 * 0 + 30 * 100) / 31
+        self.assertEqual(self.get_progress(), 97)
+
+        self.task.progress = 50
+        self.task.save()
+        self.assertEqual(self.get_progress(), 98)
+
+        task.delete()
+        self.assertEqual(self.get_progress(), 50)
+
+        project_2 = Project.objects.create(title='Project 2', description='', owner=self.client_user)
+        self.task.project = project_2
+        self.task.save()
+        self.assertEqual(self.get_progress(), 0)
+        self.assertEqual(self.get_progress(project_2), 50)
+
+    def test_progress_is_updated_without_reading_other_tasks(self):
+        Task.objects.bulk_create([
+            Task(project=self.project, title=f'Task {i}', description='', due_date=timezone.now(), progress=100)
+            for i in range(10)
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            self.task.progress = 100
+            self.task.save()
+
+        self.assertEqual(sum(query['sql'].startswith('UPDATE "project_project"') for query in queries), 1)
+        self.assertFalse(any('SUM(' in query['sql'] for query in queries))
+
+    def test_deferred_fields_fall_back_to_recomputing(self):
+        Task.objects.create(project=self.project, title='Task 2', description='', due_date=timezone.now(), progress=100)
+        task = Task.objects.only('id', 'project', 'title').get(pk=self.task.pk)
+        task.title = 'Renamed'
+        task.save()
+
+        self.assertEqual(self.get_progress(), 50)
+
+    def test_priority_weights(self):
+        with self.settings(PROJECT_PROGRESS_WEIGHT='priority'):
+            Task.objects.create(project=self.project, title='Task 2', description='', due_date=timezone.now(), priority=3, progress=100)
+            self.assertEqual(self.get_progress(), 75)
+
+    def test_recompute_project_progress_command(self):
+        Task.objects.bulk_create([
+            Task(project=self.project, title='Task 2', description='', due_date=timezone.now(), estimated_hours=3, progress=100)
+        ])
+        self.assertEqual(self.get_progress(), 0)
+
+        call_command('recompute_project_progress', batch_size=1, stdout=StringIO())
+
+        self.assertEqual(self.get_progress(), 75)
+        self.assertEqual((self.project.progress_weight, self.project.progress_points), (4, 300))
+
+
+class ProjectScheduleTestCase(APITestCaseSetUp):
+    def setUp(self):
+        super().setUp()
+        # A -> B -> D and A -> C -> D, in days: A 2, B 1, C 4, D 3
+        self.a = self.create_task('A', 16)
+        self.b = self.create_task('B', 8)
+        self.c = self.create_task('C', 32)
+        self.d = self.create_task('D', 24)
+        for predecessor, successor in [(self.a, self.b), (self.a, self.c), (self.b, self.d), (self.c, self.d)]:
+            TaskDependency.objects.create(predecessor=predecessor, successor=successor)
+
+    def create_task(self, title, hours):
+        return Task.objects.create(project=self.project, title=title, description='', due_date=timezone.now(), estimated_hours=hours)
+
+    def get_schedule(self, task):
+        task.refresh_from_db()
+        start = self.project.start_date
+        return (
+            (task.earliest_start - start).days,
+            (task.earliest_finish - start).days,
+            (task.latest_start - start).days,
+            (task.latest_finish - start).days,
+            task.slack,
+        )
+
+    def assertScheduleIsComplete(self):
+        # nothing left for a full recompute to change
+        self.assertEqual(schedule_project(self.project.pk), 0)
+
+    def test_schedule_follows_dependencies(self):
+        self.assertEqual(self.get_schedule(self.a), (0, 2, 0, 2, 0))
+        self.assertEqual(self.get_schedule(self.b), (2, 3, 5, 6, 3))
+        self.assertEqual(self.get_schedule(self.c), (2, 6, 2, 6, 0))
+        self.assertEqual(self.get_schedule(self.d), (6, 9, 6, 9, 0))
+        # no estimate and no dependencies, so it can happen any time
+        self.assertEqual(self.get_schedule(self.task), (0, 0, 9, 9, 9))
+        self.assertScheduleIsComplete()
+
+    def test_longer_task_moves_the_critical_path(self):
+        self.b.estimated_hours = 48
+        self.b.save()
+
+        self.assertEqual(self.get_schedule(self.b), (2, 8, 2, 8, 0))
+        self.assertEqual(self.get_schedule(self.c), (2, 6, 4, 8, 2))
+        self.assertEqual(self.get_schedule(self.d), (8, 11, 8, 11, 0))
+        self.assertScheduleIsComplete()
+
+    def test_lag_and_removed_dependencies(self):
+        dependency = TaskDependency.objects.get(predecessor=self.c, successor=self.d)
+        dependency.lag = 2
+        dependency.save()
+        self.assertEqual(self.get_schedule(self.d), (8, 11, 8, 11, 0))
+        self.assertScheduleIsComplete()
+
+        dependency.delete()
+        self.assertEqual(self.get_schedule(self.d), (3, 6, 3, 6, 0))
+        self.assertEqual(self.get_schedule(self.c), (2, 6, 2, 6, 0))
+        self.assertScheduleIsComplete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.b.delete()
+        self.assertEqual(self.get_schedule(self.d), (0, 3, 3, 6, 3))
+        self.assertScheduleIsComplete()
+
+    def test_deleted_tasks_reschedule_their_project_once(self):
+        with mock.patch('project.scheduling.schedule_project', wraps=schedule_project) as full_schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                Task.objects.filter(pk__in=[self.b.pk, self.c.pk]).delete()
+
+        full_schedule.assert_called_once_with(self.project.pk)
+        self.assertEqual(self.get_schedule(self.d), (0, 3, 0, 3, 0))
+        self.assertScheduleIsComplete()
+
+    def test_moved_task_leaves_its_dependencies(self):
+        project = Project.objects.create(title='Project 2', description='', owner=self.admin_user)
+        self.c.project = project
+        self.c.save()
+
+        self.assertFalse(TaskDependency.objects.filter(Q(predecessor=self.c) | Q(successor=self.c)).exists())
+        self.assertEqual(self.get_schedule(self.d), (3, 6, 3, 6, 0))
+        self.assertScheduleIsComplete()
+
+    def test_changes_are_recomputed_only_around_the_task(self):
+        # a long unrelated task keeps the finish where it is
+        self.create_task('E', 80)
+        Task.objects.filter(pk=self.b.pk).update(estimated_hours=16)
+
+        with mock.patch.object(Task.objects, 'bulk_update', wraps=Task.objects.bulk_update) as bulk_update, \
+                mock.patch('project.scheduling.schedule_project') as full_schedule:
+            reschedule_tasks(self.project.pk, [self.b.pk])
+
+        full_schedule.assert_not_called()
+        # B and D downstream, A upstream: C and E are left alone
+        updated = {task.pk for task in bulk_update.call_args.args[0]}
+        self.assertTrue(updated <= {self.a.pk, self.b.pk, self.d.pk})
+        self.assertEqual(self.get_schedule(self.b), (2, 4, 5, 7, 3))
+        self.assertScheduleIsComplete()
+
+    def test_start_date_change_moves_the_dates(self):
+        self.project.start_date = self.project.start_date + timezone.timedelta(days=7)
+        self.project.save()
+        self.assertEqual(self.get_schedule(self.d), (6, 9, 6, 9, 0))
+
+    def test_schedule_projects_command(self):
+        Task.objects.update(earliest_start=None, slack=None)
+
+        call_command('schedule_projects', stdout=StringIO())
+
+        self.assertEqual(self.get_schedule(self.c), (2, 6, 2, 6, 0))
+        self.assertScheduleIsComplete()
+
+
+class TaskRankingTestCase(APITestCaseSetUp):
+    def create_task(self, title, **kwargs):
+        return Task.objects.create(project=self.project, title=title, description='', due_date=timezone.now(), **kwargs)
+
+    def get_column(self, status='new'):
+        return list(Task.objects.filter(project=self.project, status=status).order_by('rank', 'id').values_list('title', flat=True))
+
+    def test_rank_between(self):
+        self.assertEqual(get_rank_between('', ''), '3i00')
+        for before, after in [
+            ('', '3i00'), ('3i00', ''), ('3i00', '3i01'), ('3i00', '3i00i'), ('3i0z', '3i1'), ('3zzz', ''),
+            ('', '10'), ('', '0i'), ('0i', '10'), ('1z', '200'),
+        ]:
+            rank = get_rank_between(before, after)
+            self.assertTrue(before < rank and (not after or rank < after), (before, after, rank))
+            self.assertNotEqual(rank[-1], '0' if len(rank) > int(rank[0], 36) + 1 else None)
+
+    def test_repeated_moves_keep_order(self):
+        # always squeezing into the same gap
+        before, after = '3i00', '3i01'
+        for _ in range(50):
+            rank = get_rank_between(before, after)
+            self.assertTrue(before < rank < after)
+            after = rank
+
+        ranks = get_ranks_between('', '', 1000)
+        self.assertEqual(ranks, sorted(set(ranks)))
+        self.assertLessEqual(max(len(rank) for rank in ranks), 4)
+
+    def test_ranks_at_either_end_stay_short(self):
+        for add in (lambda rank: get_rank_between(rank, ''), lambda rank: get_rank_between('', rank)):
+            rank = get_rank_between('', '')
+            for _ in range(5000):
+                rank = add(rank)
+            self.assertLessEqual(len(rank), 4)
+
+        ranks = get_ranks_between('3i00', '', 5000)
+        self.assertEqual(ranks, sorted(set(ranks)))
+        self.assertTrue(ranks[0] > '3i00' and len(ranks[-1]) == 4)
+
+    def test_new_tasks_go_to_the_bottom(self):
+        self.create_task('Task 2')
+        self.create_task('Task 3')
+
+        self.assertEqual(self.get_column(), ['Task 1', 'Task 2', 'Task 3'])
+
+    def test_move_updates_one_row(self):
+        task_2 = self.create_task('Task 2')
+        task_3 = self.create_task('Task 3')
+
+        with CaptureQueriesContext(connection) as queries:
+            move_task(task_3, 'new', after=self.task, before=task_2)
+
+        self.assertEqual(sum(query['sql'].startswith('UPDATE "project_task"') for query in queries), 1)
+        self.assertEqual(self.get_column(), ['Task 1', 'Task 3', 'Task 2'])
+
+        move_task(self.task, 'completed')
+        move_task(task_2, 'completed', before=self.task)
+        self.assertEqual(self.get_column(), ['Task 3'])
+        self.assertEqual(self.get_column('completed'), ['Task 2', 'Task 1'])
+
+    def test_long_ranks_are_rebalanced_in_the_background(self):
+        task_2 = self.create_task('Task 2')
+        task_3 = self.create_task('Task 3')
+
+        with self.settings(BACKGROUND_TASKS_EAGER=True, TASK_RANK_REBALANCE_LENGTH=4):
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(10):
+                    move_task(task_3, 'new', after=self.task, before=task_2)
+                    move_task(task_2, 'new', after=self.task, before=task_3)
+
+        self.assertEqual(self.get_column(), ['Task 1', 'Task 2', 'Task 3'])
+        self.assertLessEqual(max(len(rank) for rank in Task.objects.values_list('rank', flat=True)), 4)
+
+    def test_status_change_goes_to_the_bottom_of_the_column(self):
+        task_2 = self.create_task('Task 2', status='completed')
+
+        self.task.status = 'completed'
+        self.task.save()
+
+        self.assertEqual(self.get_column('completed'), ['Task 2', 'Task 1'])
+        self.assertGreater(self.task.rank, task_2.rank)
+
+    def test_ranks_too_long_are_spread_out_before_a_move(self):
+        task_2 = self.create_task('Task 2')
+        task_3 = self.create_task('Task 3')
+        Task.objects.filter(pk=self.task.pk).update(rank='3i00' + 'z' * 60)
+        self.task.refresh_from_db()
+
+        move_task(task_3, 'new', after=self.task, before=task_2)
+
+        self.assertEqual(self.get_column(), ['Task 1', 'Task 3', 'Task 2'])
+        self.assertLessEqual(max(len(rank) for rank in Task.objects.values_list('rank', flat=True)), 4)
+
+    def test_duplicate_ranks_are_spread_out_before_a_move(self):
+        task_2 = self.create_task('Task 2')
+        task_3 = self.create_task('Task 3')
+        Task.objects.update(rank='3i00')
+        for task in (self.task, task_2):
+            task.refresh_from_db()
+
+        move_task(task_3, 'new', after=self.task, before=task_2)
+
+        self.assertEqual(self.get_column(), ['Task 1', 'Task 3', 'Task 2'])
+        self.assertEqual(rebalance_column(self.project.pk, 'new'), 3)
+        self.assertEqual(self.get_column(), ['Task 1', 'Task 3', 'Task 2'])
+
+
+class WorkloadTestCase(APITestCaseSetUp):
+    def get_workload(self, user=None, week=None):
+        return dict(
+            WorkloadWeek.objects.filter(user=user or self.student_user, week=week or get_week()).values_list('hours', 'task_count')
+        ) or None
+
+    def create_task(self, **kwargs):
+        kwargs.setdefault('assigned_to', self.student_user)
+        return Task.objects.create(project=self.project, title='Task 2', description='', due_date=timezone.now(), **kwargs)
+
+    def test_workload_follows_task_changes(self):
+        self.assertEqual(self.get_workload(), {0: 1})
+
+        task = self.create_task(estimated_hours=6)
+        self.assertEqual(self.get_workload(), {6: 2})
+
+        next_week = get_week() + timezone.timedelta(days=7)
+        task.due_date = next_week + timezone.timedelta(days=2)
+        task.save()
+        self.assertEqual(self.get_workload(), {0: 1})
+        self.assertEqual(self.get_workload(week=next_week), {6: 1})
+
+        task.assigned_to = self.instructor_user
+        task.estimated_hours = 10
+        task.save()
+        self.assertEqual(self.get_workload(week=next_week), {0: 0})
+        self.assertEqual(self.get_workload(self.instructor_user, next_week), {10: 1})
+
+        task.status = 'completed'
+        task.save()
+        self.assertEqual(self.get_workload(self.instructor_user, next_week), {0: 0})
+
+        self.task.estimated_hours = 3
+        self.task.save()
+        self.task.delete()
+        self.assertEqual(self.get_workload(), {0: 0})
+
+    def test_workload_is_updated_without_reading_other_tasks(self):
+        Task.objects.bulk_create([
+            Task(project=self.project, title=f'Task {i}', description='', due_date=timezone.now(), assigned_to=self.student_user)
+            for i in range(10)
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            self.task.estimated_hours = 5
+            self.task.save()
+
+        self.assertEqual(sum(query['sql'].startswith('UPDATE "project_workloadweek"') for query in queries), 1)
+        self.assertFalse(any('FROM "project_task"' in query['sql'] and 'COUNT(' in query['sql'] for query in queries))
+        self.assertEqual(self.get_workload(), {5: 1})
+
+    def test_deferred_fields_fall_back_to_rebuilding(self):
+        task = Task.objects.only('id', 'project', 'estimated_hours').get(pk=self.task.pk)
+        task.estimated_hours = 7
+        task.save()
+
+        self.assertEqual(self.get_workload(), {7: 1})
+
+    def test_rebuild_workloads_command(self):
+        Task.objects.bulk_create([
+            Task(project=self.project, title='Task 2', description='', due_date=timezone.now(), estimated_hours=4, assigned_to=self.student_user)
+        ])
+        WorkloadWeek.objects.create(user=self.instructor_user, week=get_week(), hours=9, task_count=1)
+
+        call_command('rebuild_workloads', stdout=StringIO())
+
+        self.assertEqual(self.get_workload(), {4: 2})
+        self.assertIsNone(self.get_workload(self.instructor_user))
@@ -1,12 +1,25 @@
+import json
+import os
+import tempfile
 from datetime import date
+from io import StringIO
+from unittest import mock
 
 from accounts.models import User
+from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from membership.models import Client, Instructor, Student
-from project.models import (Activity, Project, ProjectAttachment, Tag, Task,
+from project.archive import iter_archive_rows
+from project.models import (Activity, ActivityArchive, Project,
+                            ProjectAttachment, Tag, Task, TaskDependency,
                             TechSkill)
+from project.summaries import get_summary_cache
+from project.workload import get_week
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase
@@ -566,8 +579,25 @@ class ActivityAPITestCase(ModelAPITestCase):
         response_data_dict = response.data['results']
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response_data_dict), 1)
-        self.assertEqual(response_data_dict[0]['activity_type'], self.data['activity_type'])
+        self.assertEqual(len(response_data_dict), Activity.objects.count())
+        self.assertEqual(response_data_dict[0]['id'], self.activity.id)
+        self.assertNotIn('count', response.data)
+
+    def test_list_activities_with_cursor(self):
+        url = reverse('activity-list')
+        expected_ids = list(Activity.objects.order_by('-id').values_list('id', flat=True))
+
+        ids = []
+        response = self.client.get(url, {'count': 1})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data['results']), 1)
+            ids += [activity['id'] for activity in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(ids, expected_ids)
 
     def test_retrieve_activity(self):
         url = reverse('activity-detail', args=[self.activity.pk])
@@ -595,4 +625,490 @@ class ActivityAPITestCase(ModelAPITestCase):
         response = self.client.delete(url)
         
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
-        self.assertEqual(Activity.objects.count(), num_activity - 1)
\ No newline at end of file
+        self.assertEqual(Activity.objects.count(), num_activity - 1)
+
+
+class ActivityTimelineAPITestCase(ModelAPITestCase):
+    def setUp(self):
+        super().setUp()
+
+        project_2 = Project.objects.create(title='Project 2', description='Project 2 Description', owner=self.client_user)
+        now = timezone.now()
+        Activity.objects.bulk_create([
+            Activity(
+                user=self.student_user if i % 2 else self.instructor_user,
+                project=self.project if i % 3 else project_2,
+                task=self.task_1 if i % 2 else None,
+                activity_type='updated_task',
+                date_created=now - timezone.timedelta(minutes=i),
+            )
+            for i in range(30)
+        ])
+
+    def get_timeline(self, params):
+        ids = []
+        response = self.client.get(reverse('activity-timeline'), params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [activity['id'] for activity in response.data['results']]
+            if not response.data['next']:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_user_timeline(self):
+        expected_ids = list(
+            Activity.objects.filter(user=self.student_user).order_by('-date_created', '-id').values_list('id', flat=True)
+        )
+
+        self.assertEqual(self.get_timeline({'user': self.student_user.id, 'count': 4}), expected_ids)
+
+    def test_project_timeline(self):
+        expected_ids = list(
+            Activity.objects.filter(project=self.project).order_by('-date_created', '-id').values_list('id', flat=True)
+        )
+
+        self.assertEqual(self.get_timeline({'project': self.project.id, 'count': 4}), expected_ids)
+
+    def test_timeline_loads_titles_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('activity-timeline'), {'user': self.student_user.id})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        activity = response.data['results'][0]
+        self.assertEqual(activity['user_name'], 'Student Student')
+        self.assertEqual(activity['task_title'], 'Task 1')
+        self.assertIn(activity['project_title'], ('Project 1', 'Project 2'))
+
+    def test_timeline_requires_a_user_or_project(self):
+        response = self.client.get(reverse('activity-timeline'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('activity-timeline'), {'user': 'me'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ActivityArchiveAPITestCase(ModelAPITestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        storage_settings = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage', MEDIA_ROOT=directory.name
+        )
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+        self.old_month = (timezone.now() - timezone.timedelta(days=800)).date().replace(day=1)
+        old_date = timezone.make_aware(timezone.datetime.combine(self.old_month, timezone.datetime.min.time()))
+        Activity.objects.bulk_create([
+            Activity(
+                user=self.student_user if i % 2 else self.instructor_user,
+                project=self.project,
+                activity_type='created_task',
+                date_created=old_date + timezone.timedelta(days=i % 20, hours=i),
+            )
+            for i in range(25)
+        ])
+
+    def archive(self):
+        call_command('archive_activity', months=12, batch_size=10, stdout=StringIO())
+        return ActivityArchive.objects.get(month=self.old_month)
+
+    def test_archive_activity_command(self):
+        recent = Activity.objects.filter(date_created__gte=timezone.now() - timezone.timedelta(days=30))
+        recent_ids = list(recent.values_list('id', flat=True))
+
+        archive = self.archive()
+
+        self.assertEqual(archive.rows, 25)
+        self.assertTrue(archive.file.name.endswith('.jsonl.gz'))
+        self.assertFalse(Activity.objects.filter(date_created__lt=timezone.now() - timezone.timedelta(days=400)).exists())
+        self.assertEqual(sorted(Activity.objects.values_list('id', flat=True)), sorted(recent_ids))
+
+        call_command('archive_activity', months=12, stdout=StringIO())
+        self.assertEqual(ActivityArchive.objects.count(), 1)
+
+    def test_late_activity_is_added_to_the_month(self):
+        archive = self.archive()
+        previous_name = archive.file.name
+        late = Activity.objects.create(user=self.student_user, project=self.project, activity_type='created_task')
+        Activity.objects.filter(pk=late.pk).update(date_created=timezone.make_aware(
+            timezone.datetime.combine(self.old_month, timezone.datetime.min.time())
+        ))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            archive = self.archive()
+
+        self.assertEqual(ActivityArchive.objects.count(), 1)
+        self.assertEqual((archive.rows, archive.last_id), (26, late.pk))
+        self.assertEqual(len(list(iter_archive_rows(archive))), 26)
+        self.assertFalse(archive.file.storage.exists(previous_name))
+        self.assertFalse(Activity.objects.filter(pk=late.pk).exists())
+
+    def test_failed_archive_leaves_no_file(self):
+        with mock.patch.object(ActivityArchive, 'save', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                call_command('archive_activity', months=12, stdout=StringIO())
+
+        self.assertFalse(ActivityArchive.objects.exists())
+        self.assertEqual(Activity.objects.filter(date_created__lt=timezone.now() - timezone.timedelta(days=400)).count(), 25)
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, 'activity_archives')), [])
+
+    def test_list_archives(self):
+        archive = self.archive()
+        self.authenticate()
+
+        response = self.client.get(reverse('activityarchive-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data['results']], [archive.id])
+
+    def test_stream_archived_rows(self):
+        archive = self.archive()
+        self.authenticate()
+
+        response = self.client.get(reverse('activityarchive-rows', args=[archive.pk]), {'user': self.student_user.id})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(len(rows), 12)
+        self.assertEqual({row['user_id'] for row in rows}, {self.student_user.id})
+        self.assertEqual({row['activity_type'] for row in rows}, {'created_task'})
+
+    def test_archives_require_auth(self):
+        archive = self.archive()
+
+        response = self.client.get(reverse('activityarchive-rows', args=[archive.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ProjectSummaryAPITestCase(ModelAPITestCase):
+    def setUp(self):
+        super().setUp()
+        get_summary_cache().clear()
+
+        yesterday = timezone.now() - timezone.timedelta(days=1)
+        self.task_2 = Task.objects.create(project=self.project, title='Task 2', description='', due_date=yesterday, estimated_hours=10, actual_hours=12, progress=50)
+        Task.objects.create(project=self.project, title='Task 3', description='', due_date=yesterday, status='completed', actual_hours=3, progress=100)
+        self.project_2 = Project.objects.create(title='Project 2', description='Project 2 Description', owner=self.client_user)
+
+    def count_summary_queries(self, queries):
+        return sum('GROUP BY' in query['sql'] for query in queries)
+
+    def test_project_summary(self):
+        url = reverse('project-summary', args=[self.project.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.count_summary_queries(queries), 1)
+        self.assertEqual(response.data['task_count'], 3)
+        self.assertEqual(response.data['tasks_by_status'], {'new': 2, 'completed': 1})
+        self.assertEqual(response.data['overdue_tasks'], 1)
+        self.assertEqual(float(response.data['estimated_hours']), 50)
+        self.assertEqual(float(response.data['actual_hours']), 15)
+        self.assertEqual(response.data['average_progress'], 50)
+
+    def test_summary_is_cached_until_a_task_changes(self):
+        url = reverse('project-summary', args=[self.project.pk])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(self.count_summary_queries(queries), 0)
+        self.assertEqual(response.data['overdue_tasks'], 1)
+
+        self.task_2.status = 'completed'
+        self.task_2.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data['overdue_tasks'], 0)
+
+        self.task_2.project = self.project_2
+        self.task_2.save()
+        self.assertEqual(self.client.get(url).data['task_count'], 2)
+
+        self.task_2.delete()
+        url = reverse('project-summary', args=[self.project_2.pk])
+        self.assertEqual(self.client.get(url).data['task_count'], 0)
+
+    def test_project_summaries(self):
+        url = reverse('project-summaries')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'ids': f'{self.project.pk},{self.project_2.pk},0'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.count_summary_queries(queries), 1)
+        self.assertEqual([(summary['project'], summary['task_count']) for summary in response.data], [(self.project.pk, 3), (self.project_2.pk, 0)])
+
+    def test_project_summaries_require_ids(self):
+        response = self.client.get(reverse('project-summaries'), {'ids': 'a,b'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TaskImportAPITestCase(ModelAPITestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            super().setUp()
+        self.url = reverse('project-import-tasks', args=[self.project.pk])
+
+    def csv_file(self, rows):
+        lines = ['title,description,due_date,status,estimated_hours,progress,assigned_to,tags']
+        lines += [','.join(row) for row in rows]
+        return SimpleUploadedFile('tasks.csv', '\n'.join(lines).encode(), content_type='text/csv')
+
+    def test_import_csv(self):
+        self.authenticate()
+        rows = [
+            [f'Imported {i}', 'From the old tracker', '2030-01-01', 'new', '2', '50', str(self.student_user.id), '"Beginner,Backlog"']
+            for i in range(25)
+        ]
+        rows.append(['Imported last', 'Done', '2030-01-01', 'completed', '', '', '', ''])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'file': self.csv_file(rows)}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'created': 26, 'batches': 1})
+        imported = Task.objects.filter(project=self.project, title__startswith='Imported')
+        self.assertEqual(imported.count(), 26)
+        self.assertEqual(imported.filter(tags__name='Backlog').count(), 25)
+        self.assertEqual(Tag.objects.filter(name='Beginner').count(), 1)
+        self.assertEqual(imported.get(title='Imported last').status, 'completed')
+        activity = Activity.objects.get(activity_type='imported_tasks')
+        self.assertEqual(activity.count, 26)
+        self.assertEqual(activity.user.email, 'test@test.com')
+        self.assertFalse(Activity.objects.filter(activity_type='created_task', task__in=imported).exists())
+
+    def test_import_jsonl_in_batches(self):
+        self.authenticate()
+        lines = [
+            json.dumps({'title': f'Imported {i}', 'description': 'From the old tracker', 'due_date': '2030-01-01', 'progress': 100})
+            for i in range(1200)
+        ]
+        upload = SimpleUploadedFile('tasks.jsonl', '\n'.join(lines).encode())
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data, {'created': 1200, 'batches': 3})
+        self.assertEqual(Task.objects.filter(project=self.project, title__startswith='Imported').count(), 1200)
+        self.assertLess(len(queries), 50)
+        self.project.refresh_from_db()
+        # Task 1 is at 0% and weighs 40 hours
+        self.assertEqual(self.project.progress, 97)
+
+    def test_invalid_rows_import_nothing(self):
+        self.authenticate()
+        lines = [
+            json.dumps({'title': 'Valid', 'description': 'From the old tracker', 'due_date': '2030-01-01'}),
+            json.dumps({'title': 'No due date', 'description': 'From the old tracker'}),
+            'not json',
+            json.dumps({'title': 'Unknown user', 'description': 'From the old tracker', 'due_date': '2030-01-01', 'assigned_to': 0}),
+        ]
+        upload = SimpleUploadedFile('tasks.jsonl', '\n'.join(lines).encode())
+
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(sorted(response.data['errors']), [2, 3, 4])
+        self.assertFalse(Task.objects.filter(title='Valid').exists())
+
+    def test_import_requires_a_known_format(self):
+        self.authenticate()
+        upload = SimpleUploadedFile('tasks.xlsx', b'')
+
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('format', response.data['errors'])
+
+    def test_import_tasks_command(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = f'{directory.name}/tasks.jsonl'
+        with open(path, 'w') as f:
+            for i in range(5):
+                f.write(json.dumps({'title': f'Imported {i}', 'description': 'From the old tracker', 'due_date': '2030-01-01'}) + '\n')
+
+        call_command('import_tasks', self.project.pk, path, batch_size=2, stdout=StringIO())
+
+        self.assertEqual(Task.objects.filter(title__startswith='Imported').count(), 5)
+
+
+class TaskDependencyAPITestCase(ModelAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # Task 1 takes 5 days
+        self.task_2 = Task.objects.create(project=self.project, title='Task 2', description='Task 2 Description', due_date=timezone.now(), estimated_hours=16)
+        self.task_3 = Task.objects.create(project=self.project, title='Task 3', description='Task 3 Description', due_date=timezone.now(), estimated_hours=8)
+        TaskDependency.objects.create(predecessor=self.task_1, successor=self.task_2)
+
+    def test_create_dependency_with_auth(self):
+        self.authenticate()
+
+        response = self.client.post(reverse('taskdependency-list'), {'predecessor': self.task_2.pk, 'successor': self.task_3.pk}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.task_3.refresh_from_db()
+        self.assertEqual(self.task_3.earliest_start, self.project.start_date + timezone.timedelta(days=7))
+
+    def test_create_dependency_without_auth(self):
+        response = self.client.post(reverse('taskdependency-list'), {'predecessor': self.task_2.pk, 'successor': self.task_3.pk}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cycles_are_rejected(self):
+        self.authenticate()
+
+        response = self.client.post(reverse('taskdependency-list'), {'predecessor': self.task_2.pk, 'successor': self.task_1.pk}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(TaskDependency.objects.count(), 1)
+
+    def test_reverse_dependency(self):
+        self.authenticate()
+        dependency = TaskDependency.objects.get(predecessor=self.task_1, successor=self.task_2)
+
+        url = reverse('taskdependency-detail', args=[dependency.pk])
+        response = self.client.put(url, {'predecessor': self.task_2.pk, 'successor': self.task_1.pk}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.task_1.refresh_from_db()
+        self.assertEqual(self.task_1.earliest_start, self.project.start_date + timezone.timedelta(days=2))
+
+    def test_dependencies_across_projects_are_rejected(self):
+        self.authenticate()
+        project_2 = Project.objects.create(title='Project 2', description='Project 2 Description', owner=self.admin_user)
+        task = Task.objects.create(project=project_2, title='Task 4', description='Task 4 Description', due_date=timezone.now())
+
+        response = self.client.post(reverse('taskdependency-list'), {'predecessor': self.task_1.pk, 'successor': task.pk}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_project_schedule(self):
+        self.authenticate()
+
+        response = self.client.get(reverse('project-schedule', args=[self.project.pk]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['finish_date'], self.project.start_date + timezone.timedelta(days=7))
+        self.assertEqual(response.data['critical_path'], [self.task_1.pk, self.task_2.pk])
+        task_3 = next(task for task in response.data['tasks'] if task['id'] == self.task_3.pk)
+        self.assertEqual((task_3['slack'], task_3['is_critical']), (6, False))
+
+
+class TaskBoardAPITestCase(ModelAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.task_2 = Task.objects.create(project=self.project, title='Task 2', description='Task 2 Description', due_date=timezone.now())
+        self.task_3 = Task.objects.create(project=self.project, title='Task 3', description='Task 3 Description', due_date=timezone.now(), status='completed')
+
+    def get_board(self):
+        response = self.client.get(reverse('project-board', args=[self.project.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {column['status']: [task['id'] for task in column['tasks']] for column in response.data['columns']}
+
+    def test_board_with_auth(self):
+        self.authenticate()
+
+        with CaptureQueriesContext(connection) as queries:
+            board = self.get_board()
+
+        self.assertEqual(board, {'new': [self.task_1.pk, self.task_2.pk], 'completed': [self.task_3.pk]})
+        self.assertEqual(sum('FROM "project_task"' in query['sql'] for query in queries), 1)
+
+    def test_move_task_with_auth(self):
+        self.authenticate()
+
+        url = reverse('task-move', args=[self.task_2.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'before': self.task_1.pk}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sum(query['sql'].startswith('UPDATE "project_task"') for query in queries), 1)
+        self.assertEqual(self.get_board()['new'], [self.task_2.pk, self.task_1.pk])
+
+        response = self.client.post(url, {'status': 'completed', 'after': self.task_3.pk}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_board(), {'new': [self.task_1.pk], 'completed': [self.task_3.pk, self.task_2.pk]})
+
+    def test_status_update_goes_to_the_bottom_of_the_column(self):
+        self.authenticate()
+
+        response = self.client.patch(reverse('task-detail', args=[self.task_1.pk]), {'status': 'completed'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_board(), {'new': [self.task_2.pk], 'completed': [self.task_3.pk, self.task_1.pk]})
+
+    def test_move_next_to_a_task_in_another_column(self):
+        self.authenticate()
+
+        response = self.client.post(reverse('task-move', args=[self.task_2.pk]), {'after': self.task_3.pk}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_move_task_without_auth(self):
+        response = self.client.post(reverse('task-move', args=[self.task_2.pk]), {'before': self.task_1.pk}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class WorkloadAPITestCase(ModelAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.student_2 = Student.objects.create(student=self.student_user_2, learning_style='visual')
+        self.student_2.tech_skills.add(self.skill)
+        # Task 1 has 40 hours planned for the student this week
+        self.task_1.due_date = date.today()
+        self.task_1.save()
+
+    def suggest(self, **params):
+        response = self.client.get(reverse('workload-suggest'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(candidate['user'], candidate['remaining_hours']) for candidate in response.data]
+
+    def test_suggest_with_auth(self):
+        self.authenticate()
+
+        self.assertEqual(self.suggest(), [(self.student_user_2.pk, 40), (self.student_user.pk, 0)])
+        self.assertEqual(self.suggest(hours=8), [(self.student_user_2.pk, 40)])
+
+        self.student.tech_skills.add(self.skill, self.skill_2)
+        next_week = get_week() + timezone.timedelta(days=7)
+        self.assertEqual(
+            self.suggest(skills=f'{self.skill.pk},{self.skill_2.pk}', week=str(next_week)),
+            [(self.student_user.pk, 40), (self.student_user_2.pk, 40)],
+        )
+
+    def test_suggest_in_one_query(self):
+        self.authenticate()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.suggest(skills=str(self.skill.pk), limit=5)
+
+        self.assertEqual(sum('FROM "membership_student"' in query['sql'] for query in queries), 1)
+        self.assertFalse(any('FROM "project_task"' in query['sql'] for query in queries))
+
+    def test_suggest_with_invalid_skills(self):
+        self.authenticate()
+
+        response = self.client.get(reverse('workload-suggest'), {'skills': 'python'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_workloads_with_auth(self):
+        self.authenticate()
+
+        response = self.client.get(reverse('workload-list'), {'user': self.student_user.pk})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['hours'], 40)
+
+    def test_suggest_without_auth(self):
+        response = self.client.get(reverse('workload-suggest'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
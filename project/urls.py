@@ -1,7 +1,8 @@
 from django.urls import include, path
-from project.views import (ActivityViewSet, ProjectAttachmentViewSet,
-                           ProjectViewSet, TagViewSet, TaskViewSet,
-                           TechSkillViewSet)
+from project.views import (ActivityArchiveViewSet, ActivityViewSet,
+                           ProjectAttachmentViewSet, ProjectViewSet,
+                           TagViewSet, TaskDependencyViewSet, TaskViewSet,
+                           TechSkillViewSet, WorkloadViewSet)
 from rest_framework import routers
 
 router = routers.DefaultRouter()
@@ -10,8 +11,11 @@ router.register(r'projects', ProjectViewSet, basename='project')
 router.register(r'project-attachments', ProjectAttachmentViewSet, basename='projectattachment')
 router.register(r'tags', TagViewSet, basename='tag')
 router.register(r'tasks', TaskViewSet, basename='task')
+router.register(r'task-dependencies', TaskDependencyViewSet, basename='taskdependency')
 router.register(r'techskills', TechSkillViewSet, basename='tech_skill')
 router.register(r'activities', ActivityViewSet, basename='activity')
+router.register(r'activity-archives', ActivityArchiveViewSet, basename='activityarchive')
+router.register(r'workloads', WorkloadViewSet, basename='workload')
 
 urlpatterns = [
     path('', include(router.urls)),
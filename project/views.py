@@ -1,15 +1,34 @@
-from accounts.pagination import CustomPageNumberPagination
+import json
+
+from accounts.pagination import (CustomCursorPagination,
+                                 CustomPageNumberPagination)
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from project.models import (Activity, Project, ProjectAttachment, Tag, Task,
-                            TechSkill)
-from project.serializers import (ActivitySerializer,
+from project.archive import iter_archive_rows
+from project.importer import TaskImportError, get_import_format, import_tasks
+from project.models import (STATUS_CHOICES, Activity, ActivityArchive, Project,
+                            ProjectAttachment, Tag, Task, TaskDependency,
+                            TechSkill, WorkloadWeek)
+from project.ranking import move_task
+from project.serializers import (ActivityArchiveSerializer, ActivitySerializer,
+                                 ActivityTimelineSerializer,
+                                 AssigneeSuggestionQuerySerializer,
                                  ProjectAttachmentSerializer,
-                                 ProjectSerializer, TagSerializer,
-                                 TaskSerializer, TechSkillSerializer)
-from rest_framework import filters, viewsets
+                                 ProjectSerializer,
+                                 ProjectSummaryQuerySerializer, TagSerializer,
+                                 TaskBoardSerializer, TaskDependencySerializer,
+                                 TaskMoveSerializer, TaskScheduleSerializer,
+                                 TaskSerializer, TechSkillSerializer,
+                                 WorkloadWeekSerializer)
+from project.summaries import get_project_summaries
+from project.workload import suggest_assignees
+from rest_framework import filters, serializers, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import (IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
+from rest_framework.response import Response
 
 
 class ProjectViewSet(viewsets.ModelViewSet):
@@ -27,6 +46,81 @@ class ProjectViewSet(viewsets.ModelViewSet):
     search_fields = ['id']
     ordering_fields = ['id']
 
+    @action(detail=True, methods=['get'])
+    def summary(self, request, pk=None):
+        """
+        Task counts by status, overdue tasks, hours and average progress of
+        the project, computed in one query and cached until its tasks change.
+        """
+        project = self.get_object()
+        return Response(get_project_summaries([project.pk])[project.pk])
+
+    @action(detail=True, methods=['post'], url_path='import-tasks', parser_classes=[MultiPartParser])
+    def import_tasks(self, request, pk=None):
+        """
+        Imports the tasks of an uploaded CSV or JSON lines file (`file`, with
+        an optional `format`) into the project. The file is read and inserted
+        in batches; nothing is imported if a row is invalid.
+        """
+        project = self.get_object()
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise serializers.ValidationError({'file': 'This field is required.'})
+
+        try:
+            import_format = get_import_format(upload.name, request.data.get('format'))
+            result = import_tasks(project, upload, import_format, user=request.user)
+        except TaskImportError as e:
+            return Response({'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def schedule(self, request, pk=None):
+        """
+        The earliest and latest dates and slack of every task, worked out
+        from the task dependencies, with the critical path in order.
+        """
+        project = self.get_object()
+        fields = [field for field in TaskScheduleSerializer.Meta.fields if field != 'is_critical']
+        tasks = list(Task.objects.filter(project=project).only(*fields).order_by('earliest_start', 'earliest_finish', 'id'))
+        return Response({
+            'project': project.pk,
+            'start_date': project.start_date,
+            'finish_date': max((task.earliest_finish for task in tasks if task.earliest_finish), default=None),
+            'critical_path': [task.pk for task in tasks if task.slack is not None and task.slack <= 0],
+            'tasks': TaskScheduleSerializer(tasks, many=True).data,
+        })
+
+    @action(detail=True, methods=['get'])
+    def board(self, request, pk=None):
+        """
+        The project's tasks as a board, one column per status with the
+        cards in rank order, read with one query.
+        """
+        project = self.get_object()
+        tasks = Task.objects.filter(project=project).only(*TaskBoardSerializer.Meta.fields).order_by('status', 'rank', 'id')
+        cards = {status: [] for status, _ in STATUS_CHOICES}
+        for task in TaskBoardSerializer(tasks, many=True).data:
+            cards.setdefault(task['status'], []).append(task)
+        return Response({
+            'project': project.pk,
+            'columns': [
+                {'status': status, 'title': title, 'tasks': cards[status]} for status, title in STATUS_CHOICES
+            ],
+        })
+
+    @action(detail=False, methods=['get'])
+    def summaries(self, request):
+        """
+        The summaries of several projects (?ids=1,2,3), in one query for
+        those that aren't cached.
+        """
+        serializer = ProjectSummaryQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        existing = set(self.get_queryset().filter(pk__in=ids).values_list('pk', flat=True))
+        summaries = get_project_summaries([project_id for project_id in ids if project_id in existing])
+        return Response(list(summaries.values()))
 
 
 class TagViewSet(viewsets.ModelViewSet):
@@ -60,6 +154,78 @@ class TaskViewSet(viewsets.ModelViewSet):
     search_fields = ['id']
     ordering_fields = ['id']
 
+    @action(detail=True, methods=['post'])
+    def move(self, request, pk=None):
+        """
+        Moves the task on the board, to another column (`status`) and/or
+        between the `after` and `before` tasks. Only the task's own row is
+        updated.
+        """
+        task = self.get_object()
+        serializer = TaskMoveSerializer(data=request.data, context={'task': task})
+        serializer.is_valid(raise_exception=True)
+        move_task(task, **serializer.validated_data)
+        return Response(TaskBoardSerializer(task).data)
+
+
+class TaskDependencyViewSet(viewsets.ModelViewSet):
+    """
+    API endpoint that allows task dependencies to be viewed, edited and searched.
+    """
+    queryset = TaskDependency.objects.all()
+    serializer_class = TaskDependencySerializer
+    pagination_class = CustomPageNumberPagination
+    ordering = ['id']
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+
+    filterset_fields = ['id', 'predecessor', 'successor', 'successor__project']
+    search_fields = ['id']
+    ordering_fields = ['id']
+
+
+class WorkloadViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint that allows the weekly workload of users to be viewed.
+    """
+    queryset = WorkloadWeek.objects.all()
+    serializer_class = WorkloadWeekSerializer
+    pagination_class = CustomPageNumberPagination
+    ordering = ['week', 'user']
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+
+    filterset_fields = ['user', 'week']
+    search_fields = ['id']
+    ordering_fields = ['id', 'week', 'hours']
+
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """
+        Students to assign work to (?skills=1,2&hours=8&week=2024-01-01),
+        best matching skills first, then most hours left in the week.
+        """
+        serializer = AssigneeSuggestionQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        candidates = suggest_assignees(
+            skill_ids=serializer.validated_data.get('skills', []),
+            hours=serializer.validated_data['hours'],
+            week=serializer.validated_data.get('week'),
+            limit=serializer.validated_data['limit'],
+        )
+        return Response([
+            {
+                'user': candidate['student'],
+                'username': candidate['student__username'],
+                'first_name': candidate['student__first_name'],
+                'last_name': candidate['student__last_name'],
+                'skill_matches': candidate['skill_matches'],
+                'planned_hours': candidate['planned_hours'],
+                'remaining_hours': candidate['remaining_hours'],
+            }
+            for candidate in candidates
+        ])
+
 
 class TechSkillViewSet(viewsets.ModelViewSet):
     """
@@ -77,13 +243,38 @@ class TechSkillViewSet(viewsets.ModelViewSet):
     ordering_fields = ['id']
 
 
+def get_activity_lookups(query_params):
+    """
+    Reads the ?user= and ?project= filters of the activity feeds.
+    """
+    lookups = {}
+    for field in ('user', 'project'):
+        value = query_params.get(field)
+        if value is None:
+            continue
+        if not value.isdigit():
+            raise serializers.ValidationError({field: 'A valid integer is required.'})
+        lookups[field] = int(value)
+    return lookups
+
+
+class ActivityTimelinePagination(CustomCursorPagination):
+    # matches activity_user_timeline_idx and activity_project_timeline_idx;
+    # collapsing moves date_created, so it can't be id, and activities that
+    # share a date_created are paged by offset
+    ordering = ('-date_created', '-id')
+
+    def get_ordering(self, request, queryset, view):
+        return self.ordering
+
+
 class ActivityViewSet(viewsets.ModelViewSet):
     """
     API endpoint that allows activities to be viewed, edited and searched.
     """
     queryset = Activity.objects.all()
     serializer_class = ActivitySerializer
-    pagination_class = CustomPageNumberPagination
+    pagination_class = CustomCursorPagination
     ordering = ['id']
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -92,6 +283,59 @@ class ActivityViewSet(viewsets.ModelViewSet):
     search_fields = ['id']
     ordering_fields = ['id']
 
+    @action(
+        detail=False,
+        methods=['get'],
+        serializer_class=ActivityTimelineSerializer,
+        pagination_class=ActivityTimelinePagination,
+    )
+    def timeline(self, request):
+        """
+        Activity of one user (?user=) or on one project (?project=), newest
+        first. Reads walk the timeline indexes with a cursor, and the names
+        and titles shown come from the same query.
+        """
+        lookups = get_activity_lookups(request.query_params)
+        if not lookups:
+            raise serializers.ValidationError('Pass a user or a project.')
+
+        queryset = Activity.objects.filter(**lookups).select_related('user', 'project', 'task').only(
+            'id', 'activity_type', 'date_created', 'count', 'user_id', 'project_id', 'task_id',
+            'user__username', 'user__first_name', 'user__last_name', 'project__title', 'task__title',
+        )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+
+class ActivityArchiveViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint that allows archived months of activity to be listed and read back.
+    """
+    queryset = ActivityArchive.objects.all()
+    serializer_class = ActivityArchiveSerializer
+    pagination_class = CustomCursorPagination
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+
+    filterset_fields = ['id', 'month']
+    search_fields = ['id']
+    ordering_fields = ['id']
+
+    @action(detail=True, methods=['get'])
+    def rows(self, request, pk=None):
+        """
+        Streams the archived activities as JSON lines, optionally only those
+        of one user (?user=) or project (?project=). The archive is
+        decompressed as it is sent, never loaded whole.
+        """
+        archive = self.get_object()
+        lookups = get_activity_lookups(request.query_params)
+
+        lines = (json.dumps(row) + '\n' for row in iter_archive_rows(archive, **lookups))
+        response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'inline; filename="activity-{archive.month:%Y-%m}.jsonl"'
+        return response
+
 
 class ProjectAttachmentCustomPageNumberPagination(PageNumberPagination):
     page_size = 10  # Number of project attachments per page
@@ -0,0 +1,113 @@
+import datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import (Count, F, FloatField, OuterRef, Subquery, Sum,
+                              Value)
+from django.db.models.functions import Cast, Coalesce, TruncWeek
+from django.utils import timezone
+from membership.models import Student
+from project.models import Task, WorkloadWeek
+
+# a task that doesn't count towards anyone's workload
+NO_WORKLOAD = (None, None, 0.0)
+
+
+def get_weekly_capacity():
+    return float(getattr(settings, 'WORKLOAD_WEEKLY_CAPACITY', 40))
+
+
+def get_week(day=None):
+    day = day or timezone.localdate()
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def get_workload_state(task):
+    """
+    The task's (user_id, week, hours) contribution, NO_WORKLOAD for tasks
+    that are unassigned or completed, or None when a deferred field leaves
+    it unknown.
+    """
+    fields = ('assigned_to_id', 'due_date', 'estimated_hours', 'status')
+    if any(field not in task.__dict__ for field in fields):
+        return None
+    if not task.assigned_to_id or not task.due_date or task.status == 'completed':
+        return NO_WORKLOAD
+    # the field may still hold what was assigned, e.g. a datetime
+    due_date = Task._meta.get_field('due_date').to_python(task.due_date)
+    return task.assigned_to_id, get_week(due_date), float(task.estimated_hours or 0)
+
+
+def apply_workload_delta(user_id, week, hours, count):
+    if not user_id or (not hours and not count):
+        return
+    weeks = WorkloadWeek.objects.filter(user=user_id, week=week)
+    # nothing to take away from a row that is gone, e.g. with its user
+    if weeks.update(hours=F('hours') + hours, task_count=F('task_count') + count) or count <= 0:
+        return
+    try:
+        with transaction.atomic():
+            WorkloadWeek.objects.create(user_id=user_id, week=week, hours=hours, task_count=count)
+    except IntegrityError:
+        # created by a concurrent write in the meantime
+        weeks.update(hours=F('hours') + hours, task_count=F('task_count') + count)
+
+
+def update_workload(previous, current):
+    """
+    Moves a task's hours from its previous state to its current one, with
+    an UPDATE of at most two rows and no reads of the other tasks.
+    """
+    if previous[:2] == current[:2]:
+        apply_workload_delta(current[0], current[1], current[2] - previous[2], 0)
+        return
+    apply_workload_delta(previous[0], previous[1], -previous[2], -1)
+    apply_workload_delta(current[0], current[1], current[2], 1)
+
+
+def rebuild_workloads(user_ids=None):
+    """
+    Recomputes the workload rows of the given users, or of everyone, from
+    their open tasks with one GROUP BY query. Returns the number of rows.
+    """
+    tasks = Task.objects.filter(assigned_to__isnull=False).exclude(status='completed')
+    workloads = WorkloadWeek.objects.all()
+    if user_ids is not None:
+        user_ids = {user_id for user_id in user_ids if user_id}
+        tasks = tasks.filter(assigned_to__in=user_ids)
+        workloads = workloads.filter(user__in=user_ids)
+
+    rows = tasks.annotate(week=TruncWeek('due_date')).order_by().values('assigned_to', 'week').annotate(
+        hours=Coalesce(Sum(Cast('estimated_hours', FloatField())), 0.0), task_count=Count('id'),
+    )
+    with transaction.atomic():
+        workloads.delete()
+        created = WorkloadWeek.objects.bulk_create([
+            WorkloadWeek(user_id=row['assigned_to'], week=row['week'], hours=row['hours'], task_count=row['task_count'])
+            for row in rows.iterator()
+        ], batch_size=500)
+    return len(created)
+
+
+def suggest_assignees(skill_ids=(), hours=0, week=None, limit=10):
+    """
+    Students ranked by how many of the skills they have, then by the hours
+    they have left in the week, in one query: the week's load is read from
+    WorkloadWeek instead of adding up tasks.
+    """
+    week = get_week(week)
+    capacity = get_weekly_capacity()
+    planned = WorkloadWeek.objects.filter(user=OuterRef('student'), week=week).values('hours')[:1]
+    # correlated subqueries use the indexes and avoid grouping every student
+    matches = Student.tech_skills.through.objects.filter(
+        student=OuterRef('pk'), techskill__in=skill_ids
+    ).order_by().values('student').annotate(count=Count('id')).values('count')
+    students = Student.objects.filter(student__is_active=True).annotate(
+        skill_matches=Coalesce(Subquery(matches), 0) if skill_ids else Value(0),
+        planned_hours=Coalesce(Subquery(planned, output_field=FloatField()), 0.0),
+        remaining_hours=Value(capacity) - F('planned_hours'),
+    ).filter(remaining_hours__gte=hours)
+    return students.order_by('-skill_matches', '-remaining_hours', 'pk').values(
+        'student', 'student__username', 'student__first_name', 'student__last_name',
+        'skill_matches', 'planned_hours', 'remaining_hours',
+    )[:limit]
@@ -46,6 +46,7 @@ CUSTOM_APPS = [
     'course',
     'membership',
     'project',
+    'blobs',
 ]
 
 INSTALLED_APPS = DEFAULT_APPS + CUSTOM_APPS + THIRD_PARTY_APPS
@@ -60,6 +61,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "project.activity.ActivityBufferMiddleware",
 ]
 
 ROOT_URLCONF = "psmain.urls"
@@ -162,5 +164,56 @@ AWS_S3_OBJECT_PARAMETERS = {"CacheControl": "max-age-86400"}
 PUBLIC_MEDIA_LOCATION = "media"
 MEDIA_URL = f"https://{AWS_S3_CUSTOM_DOMAIN}/{PUBLIC_MEDIA_LOCATION}/"
 DEFAULT_FILE_STORAGE = "psmain.storage_backends.MediaStorage"
+# Signed media URLs are reused until MEDIA_URL_CACHE_MARGIN seconds before they
+# expire. List upload_to prefixes (e.g. "videos/") in MEDIA_URL_CACHE_EXCLUDE to
+# sign those fields' URLs on every call.
+MEDIA_URL_CACHE = "default"
+MEDIA_URL_CACHE_MARGIN = 300
+MEDIA_URL_CACHE_EXCLUDE = []
+# Uploads to these file fields are stored once per content, by SHA-256, under
+# "<upload_to>blobs/" (so "videos/" above still covers them), and shared
+# between rows. Blobs nothing points at for MEDIA_BLOB_GC_GRACE_HOURS are
+# deleted by the gc_media_blobs command.
+MEDIA_BLOB_FIELDS = [
+    "course.Video.video_file",
+    "course.File.file",
+    "project.ProjectAttachment.file",
+]
+MEDIA_BLOB_GC_GRACE_HOURS = 24
+
+# Image renditions and other work that shouldn't hold up a request run on a
+# small thread pool after the transaction commits (see helpers.tasks).
+BACKGROUND_TASK_WORKERS = 2
+BACKGROUND_TASKS_EAGER = False
+
+# Project and task activities are buffered per request or transaction and
+# written with one bulk_create. With ACTIVITY_ASYNC a writer thread does the
+# inserts, fed by a queue of at most ACTIVITY_QUEUE_SIZE activities.
+ACTIVITY_BUFFERING = True
+ACTIVITY_ASYNC = False
+ACTIVITY_QUEUE_SIZE = 10000
+ACTIVITY_BATCH_SIZE = 500
+# Repeated updates by the same user on the same project or task within this
+# many seconds of each other are kept as one activity with a count. 0 keeps
+# every update.
+ACTIVITY_COLLAPSE_WINDOW = 300
+# archive_activity moves older activity to compressed files in media storage.
+ACTIVITY_RETENTION_MONTHS = 12
+
+# Project summaries are cached until a task of the project is saved or deleted.
+# Queryset.update() skips signals, so this timeout bounds how stale they get.
+PROJECT_SUMMARY_CACHE = "default"
+PROJECT_SUMMARY_CACHE_TIMEOUT = 300
+# Project.progress is the average of its tasks' progress weighted by this
+# Task field, "estimated_hours" or "priority".
+PROJECT_PROGRESS_WEIGHT = "estimated_hours"
+# Working hours in a day, to turn Task.estimated_hours into a duration in
+# days for the dependency schedule.
+TASK_HOURS_PER_DAY = 8
+# Board columns whose rank keys grow longer than this are rebalanced in the
+# background.
+TASK_RANK_REBALANCE_LENGTH = 12
+# Hours a user can take on in a week, for the assignee suggestions.
+WORKLOAD_WEEKLY_CAPACITY = 40
 
 MEDIA_ROOT = os.path.join(BASE_DIR, "static/images")
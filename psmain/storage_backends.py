@@ -1,3 +1,7 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
 from storages.backends.s3boto3 import S3Boto3Storage
 
 # class StaticStorage(S3Boto3Storage):
@@ -9,3 +13,37 @@ class MediaStorage(S3Boto3Storage):
     location = "media"
     default_acl = "private"
     file_overwrite = False
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        # Signing a URL costs an HMAC chain per file, so signed URLs are
+        # cached and reused until shortly before they expire.
+        if parameters or http_method or not self.signs_urls() or self.is_excluded_from_url_cache(name):
+            return super().url(name, parameters, expire, http_method)
+
+        if expire is None:
+            expire = self.querystring_expire
+        timeout = expire - getattr(settings, "MEDIA_URL_CACHE_MARGIN", 300)
+        if timeout <= 0:
+            return super().url(name, parameters, expire, http_method)
+
+        cache = self.get_url_cache()
+        key = self.get_url_cache_key(name, expire)
+        url = cache.get(key)
+        if url is None:
+            url = super().url(name, parameters, expire, http_method)
+            cache.set(key, url, timeout)
+        return url
+
+    def signs_urls(self):
+        return self.querystring_auth and (not self.custom_domain or self.cloudfront_signer)
+
+    def is_excluded_from_url_cache(self, name):
+        # Fields opt out by their upload_to prefix, e.g. "videos/".
+        return name.startswith(tuple(getattr(settings, "MEDIA_URL_CACHE_EXCLUDE", ())))
+
+    def get_url_cache(self):
+        return caches[getattr(settings, "MEDIA_URL_CACHE", "default")]
+
+    def get_url_cache_key(self, name, expire):
+        digest = hashlib.md5(f"{self.bucket_name}:{self.location}:{name}".encode()).hexdigest()
+        return f"media-url:{digest}:{expire}"